@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Compares the ways that ContentCoder can match multi-word literal phrases, on dictionaries with more and more
+(and longer) phrases:
+
+    lookup (strings)   phraseEngine='lookup', internVocabulary=False: joins up each n-gram and looks it up
+    lookup (interned)  phraseEngine='lookup': looks up each n-gram as a tuple of word IDs
+    ahocorasick        phraseEngine='ahocorasick': finds every phrase in one pass with a PhraseAutomaton
+
+All three are checked against each other to make sure that they give identical results.
+
+Usage:
+    python benchmarks/bench_phrases.py [--texts 200] [--words 300]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from contentcoder.ContentCoder import ContentCoder
+from synthetic_corpus import makeVocabulary, makeCorpus, makeDictionary
+
+engines = [('lookup (strings)', {'phraseEngine': 'lookup', 'internVocabulary': False}),
+           ('lookup (interned)', {'phraseEngine': 'lookup'}),
+           ('ahocorasick', {'phraseEngine': 'ahocorasick'})]
+
+
+def timeCorpus(cc, corpus, repeats=3):
+    """Returns the results of coding the corpus, and the best time out of a few runs."""
+
+    bestTime = float('inf')
+    for _ in range(0, repeats):
+        startTime = time.perf_counter()
+        results = [cc.Analyze(text) for text in corpus]
+        bestTime = min(bestTime, time.perf_counter() - startTime)
+
+    return results, bestTime
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Multi-word phrase matching benchmark')
+    parser.add_argument('--texts', type=int, default=200, help='number of texts to code')
+    parser.add_argument('--words', type=int, default=300, help='average number of words per text')
+    args = parser.parse_args(argv)
+
+    vocab = makeVocabulary()
+    corpus = makeCorpus(args.texts, args.words, vocab, seed=1)
+    numTokens = sum(len(text.split()) for text in corpus)
+
+    print('%-10s %-12s %-20s %14s' % ('phrases', 'max words', 'engine', 'us per token'))
+
+    for numPhrases, maxPhraseWords in ((1000, 3), (5000, 5), (20000, 8)):
+        dictString = makeDictionary(vocab, numTerms=numPhrases, multiWordRate=1.0, maxPhraseWords=maxPhraseWords)
+
+        expectedResults = None
+
+        for engineName, engineArgs in engines:
+            with contextlib.redirect_stdout(io.StringIO()):
+                cc = ContentCoder(dictString=dictString, **engineArgs)
+
+            # warm up the caches, so that we're only timing the coding itself
+            for text in corpus[:20]:
+                cc.Analyze(text)
+
+            results, elapsedSeconds = timeCorpus(cc, corpus)
+
+            if expectedResults is None:
+                expectedResults = results
+            elif results != expectedResults:
+                print('Results differ for ' + engineName + '!')
+                return 1
+
+            print('%-10d %-12d %-20s %14.3f' % (numPhrases, maxPhraseWords, engineName,
+                                                elapsedSeconds / numTokens * 1e6))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Runs the whole benchmark suite and writes its results as JSON, so that they can be compared across versions.
+
+Every dictionary shape is generated at each scale:
+
+    literal        almost nothing but plain words
+    prefix         mostly prefix wildcards ('kato*')
+    leading        mostly leading wildcards ('*ing'), the hardest kind to index
+    multiword      mostly multi-word phrases, some of them ending in a wildcard
+
+and every corpus is coded with each of them:
+
+    tweets         lots of very short texts
+    essays         a few dozen medium-length texts
+    books          a couple of very long texts
+
+For each combination we measure how long the dictionary takes to load, how fast Analyze() codes the corpus with and
+without the wildcard memory (in texts and tokens per second), and the peak memory that loading and coding takes.
+We also time the tokenizer on its own for each corpus. Timings are the best of --repeats runs.
+
+Results are written to --output as a JSON file with one record per measurement. Passing a file from an earlier run
+to --compare prints every measurement that got worse by more than --threshold (and every one that got better), and
+exits with a non-zero status if anything regressed, which makes it easy to use in CI.
+
+Usage:
+    python benchmarks/bench_suite.py [--scales small,medium] [--output results.json]
+    python benchmarks/bench_suite.py --quick --compare results.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from contentcoder.ContentCoder import ContentCoder
+from contentcoder.happiestfuntokenizing import Tokenizer
+from synthetic_corpus import makeVocabulary, makeCorpus, makeDictionary
+
+# the arguments to makeDictionary() for each dictionary shape
+dictionaryShapes = {'literal': {'wildcardRate': 0.02, 'multiWordRate': 0.3},
+                    'prefix': {'wildcardRate': 0.8, 'multiWordRate': 0.05, 'prefixShare': 0.95, 'suffixShare': 0.03},
+                    'leading': {'wildcardRate': 0.8, 'multiWordRate': 0.05, 'prefixShare': 0.1, 'suffixShare': 0.8,
+                                'suffixLengths': (3, 7)},
+                    'multiword': {'wildcardRate': 0.2, 'multiWordRate': 0.7, 'multiWordWildcardRate': 0.2,
+                                  'maxPhraseWords': 4}}
+
+# the number of terms in each dictionary
+dictionaryScales = {'small': 1000,
+                    'medium': 10000,
+                    'large': 50000}
+
+# (number of texts, words per text) for each corpus
+corpusShapes = {'tweets': (1000, 25),
+                'essays': (40, 1500),
+                'books': (2, 50000)}
+
+# --quick codes a tenth as much text
+quickFactor = 10
+
+# which direction is better, for each metric
+metricDirections = {'seconds': 'lower',
+                    'texts_per_second': 'higher',
+                    'tokens_per_second': 'higher',
+                    'peak_mb': 'lower'}
+
+
+def bestTime(function, repeats):
+    """Returns the result of function() and the best time, in seconds, out of a few runs."""
+
+    best = float('inf')
+    result = None
+    for _ in range(0, repeats):
+        gc.collect()
+        startTime = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - startTime)
+
+    return result, best
+
+
+def peakMemory(function):
+    """Returns the peak memory, in MB, that Python allocated while running function()."""
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return peak / 1e6
+
+
+def loadCoder(dictString):
+    """Makes a ContentCoder from a dictionary string, without all of the chatter."""
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ContentCoder(dictString=dictString)
+
+
+def codeCorpus(dictString, corpus, wildcardMem):
+    """Loads a fresh ContentCoder and codes the corpus with it. Used to measure peak memory."""
+
+    cc = loadCoder(dictString)
+    for text in corpus:
+        cc.Analyze(text, wildcardMem=wildcardMem)
+
+    return
+
+
+def timeCoding(dictString, corpus, wildcardMem, repeats):
+    """Returns the best time, in seconds, that it takes to code the corpus. Each run gets a fresh ContentCoder, so
+    that the wildcard memory always starts out cold, but only the coding itself is timed."""
+
+    best = float('inf')
+    for _ in range(0, repeats):
+        cc = loadCoder(dictString)
+        gc.collect()
+        startTime = time.perf_counter()
+        for text in corpus:
+            cc.Analyze(text, wildcardMem=wildcardMem)
+        best = min(best, time.perf_counter() - startTime)
+
+    return best
+
+
+def record(results, name, metric, value, **details):
+    """Adds a measurement to the results and prints it."""
+
+    results.append(dict({'name': name, 'metric': metric, 'value': value,
+                         'better': metricDirections[metric]}, **details))
+    print('%-52s %-18s %14.4f' % (name, metric, value))
+
+    return
+
+
+def gitCommit():
+    """Returns the commit that we're running from, if we can tell."""
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def runSuite(scales, corpusNames, repeats, quick):
+    """Runs every benchmark and returns a list of result records."""
+
+    results = []
+
+    vocab = makeVocabulary()
+    tokenizer = Tokenizer(preserve_case=False, preserve_keywords=False)
+
+    corpora = {}
+    for corpusName in corpusNames:
+        numTexts, wordsPerText = corpusShapes[corpusName]
+        if quick and numTexts >= quickFactor:
+            numTexts = numTexts // quickFactor
+        elif quick:
+            wordsPerText = wordsPerText // quickFactor
+        corpora[corpusName] = makeCorpus(numTexts, wordsPerText, vocab, seed=1)
+
+    print('%-52s %-18s %14s' % ('benchmark', 'metric', 'value'))
+
+    for corpusName, corpus in corpora.items():
+        numTokens = sum(len(tokenizer.tokenize(text)) for text in corpus)
+        _, elapsedSeconds = bestTime(lambda: [tokenizer.tokenize(text) for text in corpus], repeats)
+        record(results, 'tokenize/' + corpusName, 'tokens_per_second', numTokens / elapsedSeconds,
+               corpus=corpusName, texts=len(corpus), tokens=numTokens)
+
+    for scale in scales:
+        for shapeName, shapeArgs in dictionaryShapes.items():
+            dictString = makeDictionary(vocab, numTerms=dictionaryScales[scale], **shapeArgs)
+            dictName = shapeName + '/' + scale
+            details = {'dictionary': shapeName, 'scale': scale, 'terms': dictionaryScales[scale]}
+
+            cc, elapsedSeconds = bestTime(lambda: loadCoder(dictString), repeats)
+            record(results, 'load/' + dictName, 'seconds', elapsedSeconds, **details)
+            record(results, 'load/' + dictName, 'peak_mb', peakMemory(lambda: loadCoder(dictString)), **details)
+
+            for corpusName, corpus in corpora.items():
+                numTokens = sum(len(cc.tokenizer.tokenize(cc.PreprocessText(text))) for text in corpus)
+
+                for wildcardMem in (False, True):
+                    benchName = 'analyze/' + dictName + '/' + corpusName + ('/mem' if wildcardMem else '/nomem')
+                    benchDetails = dict(details, corpus=corpusName, wildcardMem=wildcardMem, texts=len(corpus),
+                                        tokens=numTokens)
+
+                    elapsedSeconds = timeCoding(dictString, corpus, wildcardMem, repeats)
+
+                    record(results, benchName, 'texts_per_second', len(corpus) / elapsedSeconds, **benchDetails)
+                    record(results, benchName, 'tokens_per_second', numTokens / elapsedSeconds, **benchDetails)
+                    record(results, benchName, 'peak_mb',
+                           peakMemory(lambda: codeCorpus(dictString, corpus, wildcardMem)), **benchDetails)
+
+    return results
+
+
+def compareResults(results, baselineResults, threshold):
+    """Prints how each measurement changed since the baseline run, and returns the number of regressions."""
+
+    baselineValues = {(result['name'], result['metric']): result['value'] for result in baselineResults}
+    numRegressions = 0
+
+    print('\n%-52s %-18s %12s %12s %9s' % ('benchmark', 'metric', 'baseline', 'current', 'change'))
+
+    for result in results:
+        baselineValue = baselineValues.get((result['name'], result['metric']))
+        if baselineValue is None or baselineValue == 0:
+            continue
+
+        change = (result['value'] - baselineValue) / baselineValue
+        if result['better'] == 'lower':
+            change = -change
+
+        if change < -threshold:
+            verdict = 'REGRESSED'
+            numRegressions += 1
+        elif change > threshold:
+            verdict = 'improved'
+        else:
+            continue
+
+        print('%-52s %-18s %12.4f %12.4f %+8.1f%% %s' % (result['name'], result['metric'], baselineValue,
+                                                         result['value'], change * 100, verdict))
+
+    print('\n' + str(numRegressions) + ' regression(s) beyond ' + str(round(threshold * 100)) + '%.')
+
+    return numRegressions
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='ContentCoder benchmark suite')
+    parser.add_argument('--scales', default='small,medium',
+                        help='comma-separated dictionary scales to run (' + ', '.join(dictionaryScales) + ')')
+    parser.add_argument('--corpora', default=','.join(corpusShapes),
+                        help='comma-separated corpora to run (' + ', '.join(corpusShapes) + ')')
+    parser.add_argument('--repeats', type=int, default=3, help='runs per timing; the best one is kept')
+    parser.add_argument('--quick', action='store_true', help='code a tenth as much text, for a fast smoke test')
+    parser.add_argument('--output', default=None, help='where to write the results as JSON')
+    parser.add_argument('--compare', default=None, help='a JSON results file from an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='how much worse (as a fraction) a measurement has to get to count as a regression')
+    args = parser.parse_args(argv)
+
+    scales = [scale.strip() for scale in args.scales.split(',') if scale.strip() != '']
+    corpusNames = [corpusName.strip() for corpusName in args.corpora.split(',') if corpusName.strip() != '']
+
+    for scale in scales:
+        if scale not in dictionaryScales:
+            print('Unknown scale: ' + scale)
+            return 2
+    for corpusName in corpusNames:
+        if corpusName not in corpusShapes:
+            print('Unknown corpus: ' + corpusName)
+            return 2
+
+    settings = {'scales': scales, 'corpora': corpusNames, 'repeats': args.repeats, 'quick': args.quick}
+
+    results = runSuite(scales, corpusNames, max(1, args.repeats), args.quick)
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as fout:
+            json.dump({'version': 1,
+                       'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                       'commit': gitCommit(),
+                       'python': platform.python_version(),
+                       'implementation': platform.python_implementation(),
+                       'platform': platform.platform(),
+                       'cpus': os.cpu_count(),
+                       'settings': settings,
+                       'results': results}, fout, indent=2)
+        print('\nResults written to ' + args.output)
+
+    if args.compare is not None:
+        with open(args.compare, 'r', encoding='utf-8') as fin:
+            baseline = json.load(fin)
+        if baseline.get('settings', {}).get('quick') != args.quick:
+            print('\nNote: only one of these runs used --quick, so their corpora are different sizes.')
+        if compareResults(results, baseline['results'], args.threshold) > 0:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Shows how tokenization time scales with document length, from tweets up to novels.
+
+The old tokenizer flattened its findall() results with sum(), which made it quadratic in the number of tokens. It is
+reproduced here as a reference point, and its output is checked against the current tokenizer on every document.
+
+The legacy tokenizer takes minutes on a novel, so it is only run on documents up to --legacy-max-words long.
+
+Usage:
+    python benchmarks/bench_tokenizer.py [--legacy-max-words 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from contentcoder.happiestfuntokenizing import Tokenizer, word_re, emoticon_re
+from synthetic_corpus import makeVocabulary, makeText, documentSizes
+
+
+def legacyTokenize(tokenizer, s):
+    """The tokenizer as it used to be (without the preserve_keywords handling, which we don't use here)."""
+    s = tokenizer._Tokenizer__html2unicode(s)
+    words = word_re.findall(s)
+    words = sum([list(i) for i in words], [])
+    words = list(filter(lambda x: x != '', words))
+    words = map((lambda x: x if emoticon_re.search(x) else x.lower()), words)
+    return list(words)
+
+
+def timeIt(function, minSeconds=0.5):
+    """Returns the best time per call of function(), running it for at least minSeconds."""
+
+    best = float('inf')
+    totalTime = 0.0
+    while totalTime < minSeconds:
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        totalTime += elapsed
+
+    return best
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Tokenizer scaling benchmark')
+    parser.add_argument('--legacy-max-words', type=int, default=20000,
+                        help='longest document (in words) to run the legacy tokenizer on')
+    args = parser.parse_args(argv)
+
+    vocab = makeVocabulary()
+    tokenizer = Tokenizer(preserve_case=False)
+
+    print('%-12s %10s %14s %14s %9s' % ('document', 'words', 'legacy (ms)', 'current (ms)', 'speedup'))
+
+    for docType, numWords in documentSizes.items():
+        text = makeText(numWords, vocab, seed=numWords)
+
+        currentTime = timeIt(lambda: tokenizer.tokenize(text))
+
+        if numWords > args.legacy_max_words:
+            print('%-12s %10d %14s %14.3f %9s' % (docType, numWords, '-', currentTime * 1000, '-'))
+            continue
+
+        if legacyTokenize(tokenizer, text) != tokenizer.tokenize(text):
+            print('Output mismatch on the ' + docType + ' document!')
+            return 1
+
+        legacyTime = timeIt(lambda: legacyTokenize(tokenizer, text))
+
+        print('%-12s %10d %14.3f %14.3f %8.1fx' % (docType, numWords, legacyTime * 1000, currentTime * 1000,
+                                                    legacyTime / currentTime))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Compares coding with and without the interned vocabulary (ContentCoder's internVocabulary= option) on
+dictionaries with lots of multi-word phrases.
+
+Without it, every n-gram that we look at gets joined into a new string (a list slice, then the string itself,
+then its hash). With it, most n-grams cost a single tuple slice of small ints, and strings are only built for
+literal matches and for n-gram lengths that have wildcards to try. Along with the time per token, we report how
+many n-gram strings were built per token (counted by watching for str.join() calls with sys.setprofile()), and
+check that both modes give identical results.
+
+Usage:
+    python benchmarks/bench_vocabulary.py [--texts 300] [--words 300]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from contentcoder.ContentCoder import ContentCoder
+from synthetic_corpus import makeVocabulary, makeCorpus, makeDictionary
+
+
+def codeCorpus(cc, corpus):
+    """Codes the corpus, returning the results and the seconds that it took."""
+
+    startTime = time.perf_counter()
+    results = [cc.Analyze(text, wildcardMem=False) for text in corpus]
+
+    return results, time.perf_counter() - startTime
+
+
+def countJoins(cc, corpus):
+    """Codes the corpus again, this time counting the str.join() calls made along the way."""
+
+    numJoins = 0
+
+    def profiler(frame, event, arg):
+        nonlocal numJoins
+        if event == 'c_call' and getattr(arg, '__name__', None) == 'join' and isinstance(arg.__self__, str):
+            numJoins += 1
+
+    sys.setprofile(profiler)
+    try:
+        for text in corpus:
+            cc.Analyze(text, wildcardMem=False)
+    finally:
+        sys.setprofile(None)
+
+    return numJoins
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Interned vocabulary benchmark')
+    parser.add_argument('--texts', type=int, default=300, help='number of texts to code')
+    parser.add_argument('--words', type=int, default=300, help='average number of words per text')
+    args = parser.parse_args(argv)
+
+    vocab = makeVocabulary()
+    corpus = makeCorpus(args.texts, args.words, vocab, seed=1)
+    numTokens = sum(len(text.split()) for text in corpus)
+
+    print('%-36s %-8s %14s %18s' % ('dictionary', 'interned', 'us per token', 'strings per token'))
+
+    for multiWordRate, multiWordWildcardRate in ((0.15, 0.0), (0.5, 0.0), (0.5, 0.2)):
+        dictString = makeDictionary(vocab, multiWordRate=multiWordRate, multiWordWildcardRate=multiWordWildcardRate)
+        dictLabel = str(int(multiWordRate * 100)) + '% multi-word phrases'
+        if multiWordWildcardRate > 0:
+            dictLabel += ' (some wild)'
+
+        baselineResults = None
+
+        for internVocabulary in (False, True):
+            with contextlib.redirect_stdout(io.StringIO()):
+                cc = ContentCoder(dictString=dictString, internVocabulary=internVocabulary)
+
+            # warm up the caches, so that we're only timing the coding itself
+            codeCorpus(cc, corpus[:20])
+
+            # best of three, to keep the noise down
+            results, elapsedSeconds = codeCorpus(cc, corpus)
+            for _ in range(0, 2):
+                elapsedSeconds = min(elapsedSeconds, codeCorpus(cc, corpus)[1])
+            numJoins = countJoins(cc, corpus)
+
+            if baselineResults is None:
+                baselineResults = results
+            elif results != baselineResults:
+                print('Results differ with internVocabulary=' + str(internVocabulary) + '!')
+                return 1
+
+            print('%-36s %-8s %14.3f %18.3f' % (dictLabel, internVocabulary, elapsedSeconds / numTokens * 1e6,
+                                                numJoins / numTokens))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Generates reproducible synthetic texts and dictionaries for the benchmarks in this folder.
+
+Texts are drawn from a Zipf-like vocabulary, so that a handful of words recur constantly and most words are rare,
+which is roughly what real corpora look like. A sprinkling of punctuation, numbers, urls, emoticons, and HTML
+entities keeps the tokenizer honest."""
+
+import random
+
+extraTokens = ['.', ',', '?', '!', '...', "don't", "it's", 'U.S.A.', 'i.e.', '3.14', '1,000', '(800) 123-4567',
+               'http://example.com/some/page', ':)', ':D', '&amp;', '&lt;3', '@someone', '#hashtag', 'CAPS']
+
+# rough sizes, in words, of the kinds of documents people code
+documentSizes = {'tweet': 25,
+                 'comment': 150,
+                 'essay': 1500,
+                 'transcript': 15000,
+                 'novel': 100000}
+
+
+def makeVocabulary(numWords=20000, seed=0):
+    """Returns a list of made-up (but pronounceable-ish) words, most frequent first."""
+
+    rng = random.Random(seed)
+    syllables = ['ka', 'to', 're', 'mi', 'son', 'an', 'el', 'que', 'dor', 'li', 'ver', 'po', 'ing', 'ed', 'un', 'sh']
+
+    vocab = []
+    seen = set()
+    while len(vocab) < numWords:
+        word = ''.join(rng.choice(syllables) for _ in range(rng.randint(1, 4)))
+        if word not in seen:
+            seen.add(word)
+            vocab.append(word)
+
+    return vocab
+
+
+def makeText(numWords, vocab, seed=0, extraRate=0.08):
+    """Returns a text of roughly numWords words drawn from vocab with Zipf-like frequencies."""
+
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    words = rng.choices(vocab, weights=weights, k=numWords)
+
+    for i in range(0, numWords):
+        if rng.random() < extraRate:
+            words[i] = rng.choice(extraTokens)
+        elif rng.random() < 0.05:
+            words[i] = words[i].capitalize()
+
+    return ' '.join(words)
+
+
+def makeCorpus(numTexts, wordsPerText, vocab, seed=0):
+    """Returns a list of numTexts texts, each with about wordsPerText words."""
+
+    rng = random.Random(seed)
+    return [makeText(max(1, int(rng.gauss(wordsPerText, wordsPerText / 4))), vocab, seed=rng.random())
+            for _ in range(0, numTexts)]
+
+
+def makeDictionary(vocab, numCats=20, numTerms=5000, wildcardRate=0.3, multiWordRate=0.15, multiWordWildcardRate=0.0,
+                   maxPhraseWords=3, prefixShare=0.7, suffixShare=0.2, suffixLengths=(3, 3), seed=0):
+    """Returns a dictionary, in the 2007 .dic format, built from the words in vocab. Some terms are wildcards
+    (a mix of prefix, suffix, and infix patterns) and some are multi-word phrases. multiWordWildcardRate is the
+    share of multi-word phrases whose last word is a prefix wildcard (e.g., 'kind of ex*'). Multi-word phrases are 2 to maxPhraseWords words long.
+    Of the single-word wildcards, prefixShare are prefix patterns ('kato*'), suffixShare are leading wildcards
+    ('*ing'), and the rest are infix patterns ('ka*ed'). Leading wildcards keep between suffixLengths[0] and
+    suffixLengths[1] letters of the word."""
+
+    rng = random.Random(seed)
+    catNames = ['cat' + str(i + 1) for i in range(0, numCats)]
+
+    terms = {}
+    while len(terms) < numTerms:
+        roll = rng.random()
+        if roll < multiWordRate:
+            term = ' '.join(rng.choice(vocab[:2000]) for _ in range(rng.randint(2, maxPhraseWords)))
+            if multiWordWildcardRate > 0 and rng.random() < multiWordWildcardRate:
+                term = term[:max(term.rindex(' ') + 3, len(term) - 2)] + '*'
+        else:
+            term = rng.choice(vocab)
+            if rng.random() < wildcardRate:
+                shape = rng.random()
+                if shape < prefixShare:
+                    term = term[:max(2, len(term) - 2)] + '*'
+                elif shape < prefixShare + suffixShare:
+                    if suffixLengths[0] == suffixLengths[1]:
+                        term = '*' + term[-suffixLengths[0]:]
+                    else:
+                        term = '*' + term[-rng.randint(suffixLengths[0], suffixLengths[1]):]
+                else:
+                    term = term[:2] + '*' + term[-2:]
+        terms[term] = rng.sample(range(1, numCats + 1), rng.randint(1, 3))
+
+    lines = ['%']
+    lines.extend(str(i + 1) + '\t' + catNames[i] for i in range(0, numCats))
+    lines.append('%')
+    lines.extend(term + '\t' + '\t'.join(str(catNum) for catNum in cats) for term, cats in terms.items())
+
+    return '\n'.join(lines)
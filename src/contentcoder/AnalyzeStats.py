@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import threading
+
+
+class AnalyzeStats:
+    """Cumulative timings and hot-path counts for a ContentCoder, collected when it is made with collectStats=True.
+
+    Each text is counted on its own while it's being coded, and then added in here all at once, so a single
+    AnalyzeStats can be shared by several threads (and the stats from worker processes can be merged in).
+
+    The stages that get timed are:
+        preprocess    PreprocessText(): abbreviations, numbers, and punctuation
+        tokenize      the tokenizer
+        match         looking up every word and phrase in the dictionary (this includes wildcardScan)
+        wildcardScan  searching the wildcards for strings that weren't found any other way"""
+
+    counterNames = ('texts',
+                    'tokens',
+                    'tokenCacheHits',
+                    'tokenCacheMisses',
+                    'literalHits',
+                    'wildcardHits',
+                    'memoryHits',
+                    'memoryMisses',
+                    'wildcardScans',
+                    'wildcardAttempts',
+                    'wildcardScanMatches')
+
+    stageNames = ('preprocess', 'tokenize', 'match', 'wildcardScan')
+
+    # the help text for each counter, for ToPrometheus()
+    counterHelp = {'texts': 'Texts coded.',
+                   'tokens': 'Tokens coded.',
+                   'tokenCacheHits': 'Words whose dictionary lookup was already in the token cache.',
+                   'tokenCacheMisses': 'Words that had to be looked up in the dictionary.',
+                   'literalHits': 'Words and phrases that matched a dictionary entry exactly.',
+                   'wildcardHits': 'Words and phrases that matched a wildcard entry.',
+                   'memoryHits': 'Wildcard memory lookups that found an answer.',
+                   'memoryMisses': 'Wildcard memory lookups that came up empty.',
+                   'wildcardScans': 'Searches through the wildcard entries.',
+                   'wildcardAttempts': 'Wildcard patterns tested (with wildcardEngine="trie", index lookups).',
+                   'wildcardScanMatches': 'Searches through the wildcard entries that found a match.'}
+
+    def __init__(self):
+
+        self.counters = dict.fromkeys(self.counterNames, 0)
+        self.seconds = dict.fromkeys(self.stageNames, 0.0)
+
+        self.lock = threading.Lock()
+
+        return
+
+    def __getstate__(self):
+        # locks can't be pickled (e.g., when a ContentCoder gets sent to AnalyzeBatch()'s worker processes)
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def NewCounters(self) -> dict:
+        """Returns a fresh set of counters (and stage timings, under 'seconds') for coding a single text."""
+
+        counters = dict.fromkeys(self.counterNames, 0)
+        counters['seconds'] = dict.fromkeys(self.stageNames, 0.0)
+
+        return counters
+
+    def Add(self, counters) -> None:
+        """Adds in the counters from NewCounters() once a text has been coded."""
+
+        with self.lock:
+            for counterName in self.counterNames:
+                self.counters[counterName] += counters[counterName]
+            for stageName in self.stageNames:
+                self.seconds[stageName] += counters['seconds'][stageName]
+
+        return
+
+    def Merge(self, other) -> None:
+        """Adds everything from another AnalyzeStats (e.g., from a worker process) into this one."""
+
+        with other.lock:
+            counters = dict(other.counters)
+            counters['seconds'] = dict(other.seconds)
+
+        self.Add(counters)
+
+        return
+
+    def Reset(self) -> None:
+        """Sets every count and timing back to zero."""
+
+        with self.lock:
+            self.counters = dict.fromkeys(self.counterNames, 0)
+            self.seconds = dict.fromkeys(self.stageNames, 0.0)
+
+        return
+
+    def Stats(self) -> dict:
+        """Returns the counts, the seconds spent in each stage, and a few handy ratios."""
+
+        with self.lock:
+            stats = dict(self.counters)
+            stats['seconds'] = dict(self.seconds)
+
+        memoryLookups = stats['memoryHits'] + stats['memoryMisses']
+        tokenLookups = stats['tokenCacheHits'] + stats['tokenCacheMisses']
+        totalSeconds = stats['seconds']['preprocess'] + stats['seconds']['tokenize'] + stats['seconds']['match']
+
+        stats['memoryHitRate'] = stats['memoryHits'] / memoryLookups if memoryLookups > 0 else 0.0
+        stats['tokenCacheHitRate'] = stats['tokenCacheHits'] / tokenLookups if tokenLookups > 0 else 0.0
+        stats['attemptsPerMatch'] = (stats['wildcardAttempts'] / stats['wildcardScanMatches']
+                                     if stats['wildcardScanMatches'] > 0 else 0.0)
+        stats['tokensPerSecond'] = stats['tokens'] / totalSeconds if totalSeconds > 0 else 0.0
+
+        return stats
+
+    def ToPrometheus(self, prefix='contentcoder') -> str:
+        """Returns the counts and timings in the Prometheus text exposition format, ready to be scraped."""
+
+        with self.lock:
+            counters = dict(self.counters)
+            seconds = dict(self.seconds)
+
+        lines = []
+
+        for counterName in self.counterNames:
+            metricName = prefix + '_' + camelToSnake(counterName) + '_total'
+            lines.append('# HELP ' + metricName + ' ' + self.counterHelp[counterName])
+            lines.append('# TYPE ' + metricName + ' counter')
+            lines.append(metricName + ' ' + str(counters[counterName]))
+
+        metricName = prefix + '_stage_seconds_total'
+        lines.append('# HELP ' + metricName + ' Seconds spent in each stage of coding.')
+        lines.append('# TYPE ' + metricName + ' counter')
+        for stageName in self.stageNames:
+            lines.append(metricName + '{stage="' + camelToSnake(stageName) + '"} ' + repr(seconds[stageName]))
+
+        return '\n'.join(lines) + '\n'
+
+
+def camelToSnake(name):
+    """Turns 'tokenCacheHits' into 'token_cache_hits', for metric names."""
+    return ''.join(['_' + character.lower() if character.isupper() else character for character in name])
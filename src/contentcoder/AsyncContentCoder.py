@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import asyncio
+import os
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from .ContentCoder import _initBatchWorker, _analyzeBatchChunk
+
+
+class AsyncContentCoder:
+    """Codes texts with a ContentCoder from asyncio code, without ever blocking the event loop.
+
+    The actual coding happens on a pool of worker threads (which all share the ContentCoder) or worker processes
+    (which each get their own copy of it). Texts that come in within 'batchDelay' seconds of each other get sent
+    to the pool together, up to 'batchSize' at a time, so that short texts don't spend more time being handed
+    around than being coded. No more than 'maxInFlight' texts are ever waiting on the pool: once that many are,
+    Analyze() waits its turn, which slows down whoever is feeding us rather than letting texts pile up in memory.
+    Results are exactly what ContentCoder.Analyze() returns.
+
+    Example:
+        async with AsyncContentCoder(cc) as acc:
+            results = await acc.Analyze(text)
+            async for results in acc.AnalyzeStream(websocketTexts(), relativeFreq=False):
+                ..."""
+
+    def __init__(self,
+                 contentCoder,
+                 executor:str="thread",
+                 workers:int=None,
+                 maxInFlight:int=None,
+                 batchSize:int=16,
+                 batchDelay:float=0.002,
+                 largeTextSize:int=20000):
+        """executor: "thread" or "process". Threads share one copy of the dictionary and only code texts in
+                  parallel on a free-threaded Python build. Processes each load their own copy when the pool
+                  starts, and their captured words are merged back into contentCoder as their results come in.
+        workers: the number of worker threads or processes. Defaults to the number of CPU cores.
+        maxInFlight: how many texts can be waiting on the pool at once. Defaults to 4 batches per worker.
+        batchSize: the most texts that get sent to a worker at a time.
+        batchDelay: how long (in seconds) a text waits for others to share its batch before it gets sent anyway.
+        largeTextSize: texts with at least this many characters get sent right away, since there's nothing to
+                       gain from batching them."""
+
+        if executor not in ["thread", "process"]:
+            print('The \'executor=\' argument must be either \'thread\' or \'process\'. Using \'thread\'...')
+            executor = "thread"
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if maxInFlight is None:
+            maxInFlight = workers * batchSize * 4
+
+        self.contentCoder = contentCoder
+        self.executorType = executor
+        self.workers = workers
+        self.maxInFlight = maxInFlight
+        self.batchSize = max(1, batchSize)
+        self.batchDelay = batchDelay
+        self.largeTextSize = largeTextSize
+
+        if executor == "process":
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_initBatchWorker,
+                                                initargs=(contentCoder,))
+            self.analyzeChunk = _analyzeBatchChunk
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+            self.analyzeChunk = self.__AnalyzeChunk
+
+        # made the first time that we need it, so that it belongs to whichever event loop we end up running on
+        self.inFlight = None
+
+        # texts waiting to be batched up: one list of (text, future) for each set of Analyze() options, since
+        # a batch can only be coded with one set of them
+        self.pendingBatches = {}
+        self.flushHandle = None
+
+        # the batches that have been sent to the pool and haven't come back yet
+        self.runningBatches = set()
+
+        return
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, excType, excValue, traceback):
+        await self.Close()
+        return False
+
+    async def Analyze(self, inputText:str, **analyzeArgs) -> dict:
+        """Analyzes a string without blocking the event loop and returns the results. Takes the same keyword
+        arguments as ContentCoder.Analyze()."""
+
+        if self.inFlight is None:
+            self.inFlight = asyncio.Semaphore(self.maxInFlight)
+
+        async with self.inFlight:
+            future = asyncio.get_running_loop().create_future()
+            self.__Enqueue(inputText, analyzeArgs, future)
+            return await future
+
+    async def AnalyzeStream(self, texts, ordered:bool=True, **analyzeArgs):
+        """Analyzes the texts from an async iterable (or a regular one) as they arrive, and yields their results.
+        Only as many texts are read ahead as can be in flight at once.
+
+        ordered: if True, results come back in the same order as 'texts'. If False, results come back as
+                 (index, results) tuples in whatever order they finish."""
+
+        pending = deque()
+
+        async def nextResults():
+            if ordered:
+                return await pending.popleft()
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            finishedTask = next(task for task in pending if task in done)
+            pending.remove(finishedTask)
+            return await finishedTask
+
+        try:
+            textIndex = 0
+            async for text in _iterateTexts(texts):
+                task = asyncio.ensure_future(self.Analyze(text, **analyzeArgs))
+                if not ordered:
+                    task = asyncio.ensure_future(_withIndex(textIndex, task))
+                pending.append(task)
+                textIndex += 1
+
+                if len(pending) >= self.maxInFlight:
+                    yield await nextResults()
+
+            while len(pending) > 0:
+                yield await nextResults()
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return
+
+    async def Flush(self) -> None:
+        """Sends every text that is still waiting for a batch to the pool, and waits until all of them are done."""
+
+        self.__DispatchAll()
+
+        if len(self.runningBatches) > 0:
+            await asyncio.gather(*self.runningBatches, return_exceptions=True)
+
+        return
+
+    async def Close(self) -> None:
+        """Finishes up everything that's in flight and shuts down the pool."""
+
+        await self.Flush()
+        self.executor.shutdown(wait=True)
+
+        return
+
+    def __Enqueue(self, inputText, analyzeArgs, future):
+        """Adds a text to the batch for its options, sending the batch off if it's ready to go. Should not be
+        called outside of AsyncContentCoder class."""
+
+        optionsKey = tuple(sorted(analyzeArgs.items()))
+
+        batch = self.pendingBatches.setdefault(optionsKey, [])
+        batch.append((inputText, future))
+
+        if len(batch) >= self.batchSize or len(inputText) >= self.largeTextSize:
+            self.__Dispatch(optionsKey)
+        elif self.flushHandle is None:
+            self.flushHandle = asyncio.get_running_loop().call_later(self.batchDelay, self.__DispatchAll)
+
+        return
+
+    def __DispatchAll(self):
+        """Should not be called outside of AsyncContentCoder class."""
+
+        if self.flushHandle is not None:
+            self.flushHandle.cancel()
+            self.flushHandle = None
+
+        for optionsKey in list(self.pendingBatches.keys()):
+            self.__Dispatch(optionsKey)
+
+        return
+
+    def __Dispatch(self, optionsKey):
+        """Sends the batch for one set of options off to the pool. Should not be called outside of
+        AsyncContentCoder class."""
+
+        batch = self.pendingBatches.pop(optionsKey, [])
+
+        # no need to code texts that nobody is waiting on anymore
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if len(batch) == 0:
+            return
+
+        runningBatch = asyncio.get_running_loop().run_in_executor(self.executor, self.analyzeChunk,
+                                                                   [text for text, _ in batch], dict(optionsKey))
+        self.runningBatches.add(runningBatch)
+        runningBatch.add_done_callback(partial(self.__Deliver, [future for _, future in batch]))
+
+        return
+
+    def __Deliver(self, futures, runningBatch):
+        """Hands the results of a finished batch to whoever is waiting on them. Should not be called outside of
+        AsyncContentCoder class."""
+
+        self.runningBatches.discard(runningBatch)
+
+        if runningBatch.cancelled() or runningBatch.exception() is not None:
+            for future in futures:
+                if not future.done():
+                    if runningBatch.cancelled():
+                        future.cancel()
+                    else:
+                        future.set_exception(runningBatch.exception())
+            return
+
+        chunkResults, capturedFreqs, chunkStats = runningBatch.result()
+
+        if len(capturedFreqs) > 0:
+            self.contentCoder.MergeCaptures(capturedFreqs)
+
+        if chunkStats is not None:
+            self.contentCoder.analyzeStats.Merge(chunkStats)
+
+        for future, results in zip(futures, chunkResults):
+            if not future.done():
+                future.set_result(results)
+
+        return
+
+    def __AnalyzeChunk(self, texts, analyzeArgs):
+        """Analyzes a batch of texts on one of the worker threads. Their captures and stats go straight into the
+        shared ContentCoder, so there are none to send back. Should not be called outside of AsyncContentCoder
+        class."""
+
+        return [self.contentCoder.Analyze(text, **analyzeArgs) for text in texts], {}, None
+
+
+async def _iterateTexts(texts):
+    """Lets AnalyzeStream() take either an async iterable or a regular one."""
+
+    if hasattr(texts, '__aiter__'):
+        async for text in texts:
+            yield text
+    else:
+        for text in texts:
+            yield text
+
+
+async def _withIndex(textIndex, task):
+    return textIndex, await task
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import json
+
+from .create_export_dir import create_export_dir
+
+
+class CaptureAccumulator:
+    """Counts how many times each dictionary term captured each string (e.g., 'happ*' captured 'happiness' 12 times).
+
+    Terms and captured strings are each interned once, as small integer IDs, and each term keeps its counts in a
+    dict of {capture ID: count}. A captured string is only ever stored once, no matter how many terms captured it,
+    and two accumulators (e.g., from separate processes or machines) can be combined with Merge(), or saved with
+    Save() and combined later with Load(). The accumulator itself does no locking: ContentCoder takes care of that."""
+
+    def __init__(self):
+
+        self.terms = []
+        self.termIDs = {}
+        self.captures = []
+        self.captureIDs = {}
+
+        # one dict of {capture ID: count} for each term, in the same order as self.terms
+        self.termCounts = []
+        self.numPairs = 0
+
+        return
+
+    def __len__(self):
+        """The number of distinct (term, capture) pairs."""
+        return self.numPairs
+
+    def __InternTerm(self, dicTerm):
+        """Should not be called outside of CaptureAccumulator class."""
+
+        termID = self.termIDs.get(dicTerm)
+        if termID is None:
+            termID = len(self.terms)
+            self.termIDs[dicTerm] = termID
+            self.terms.append(dicTerm)
+            self.termCounts.append({})
+
+        return termID
+
+    def __InternCapture(self, capturedString):
+        """Should not be called outside of CaptureAccumulator class."""
+
+        captureID = self.captureIDs.get(capturedString)
+        if captureID is None:
+            captureID = len(self.captures)
+            self.captureIDs[capturedString] = captureID
+            self.captures.append(capturedString)
+
+        return captureID
+
+    def Add(self, dicTerm, capturedString, count=1) -> None:
+        """Adds count to the number of times that dicTerm captured capturedString."""
+
+        termCounts = self.termCounts[self.__InternTerm(dicTerm)]
+        captureID = self.__InternCapture(capturedString)
+
+        if captureID not in termCounts:
+            self.numPairs += 1
+            termCounts[captureID] = count
+        else:
+            termCounts[captureID] += count
+
+        return
+
+    def AddCounts(self, pairCounts) -> None:
+        """Adds a dict of {(dicTerm, capturedString): count}, e.g., the captures from a single text."""
+
+        for (dicTerm, capturedString), count in pairCounts.items():
+            self.Add(dicTerm, capturedString, count)
+
+        return
+
+    def Merge(self, other) -> None:
+        """Adds everything from another CaptureAccumulator into this one. Also takes the older dict of dicts of
+        counts ({dicTerm: {capturedString: count}}), as found in ContentCoder.capturedFreqs."""
+
+        if isinstance(other, CaptureAccumulator):
+            # their capture IDs -> ours, worked out once per string rather than once per pair
+            captureMap = [self.__InternCapture(capturedString) for capturedString in other.captures]
+
+            for otherTermID in range(0, len(other.terms)):
+                termCounts = self.termCounts[self.__InternTerm(other.terms[otherTermID])]
+                for otherCaptureID, count in other.termCounts[otherTermID].items():
+                    captureID = captureMap[otherCaptureID]
+                    if captureID not in termCounts:
+                        self.numPairs += 1
+                        termCounts[captureID] = count
+                    else:
+                        termCounts[captureID] += count
+        else:
+            for dicTerm, termCaptures in other.items():
+                for capturedString, count in termCaptures.items():
+                    self.Add(dicTerm, capturedString, count)
+
+        return
+
+    def Count(self, dicTerm, capturedString) -> int:
+        """Returns the number of times that dicTerm captured capturedString."""
+
+        termID = self.termIDs.get(dicTerm)
+        if termID is None:
+            return 0
+
+        return self.termCounts[termID].get(self.captureIDs.get(capturedString), 0)
+
+    def Items(self):
+        """Yields a (dicTerm, capturedString, count) tuple for every pair, one term at a time."""
+
+        for termID in range(0, len(self.terms)):
+            dicTerm = self.terms[termID]
+            for captureID, count in self.termCounts[termID].items():
+                yield dicTerm, self.captures[captureID], count
+
+    def HasCaptures(self, dicTerm) -> bool:
+        """Checks whether dicTerm has captured anything."""
+        return dicTerm in self.termIDs
+
+    def SortedCaptures(self, dicTerm) -> list:
+        """Returns a list of (capturedString, count) for everything that dicTerm captured, sorted by capturedString."""
+
+        termID = self.termIDs.get(dicTerm)
+        if termID is None:
+            return []
+
+        return sorted([(self.captures[captureID], count) for captureID, count in self.termCounts[termID].items()])
+
+    def ToDict(self) -> dict:
+        """Returns the counts as a dict of dicts: {dicTerm: {capturedString: count}}."""
+
+        capturedFreqs = {}
+        for dicTerm, capturedString, count in self.Items():
+            capturedFreqs.setdefault(dicTerm, {})[capturedString] = count
+
+        return capturedFreqs
+
+    def Clear(self) -> None:
+        """Forgets all of the counts."""
+        self.__init__()
+        return
+
+    def Save(self, filename, fileEncoding='utf-8') -> None:
+        """Saves the counts to a JSON file, which can be combined with others using Load()."""
+
+        create_export_dir(filename)
+        with open(filename, 'w', encoding=fileEncoding) as fout:
+            json.dump({'version': 1,
+                       'terms': self.terms,
+                       'captures': self.captures,
+                       'pairs': [[termID, captureID, count]
+                                 for termID in range(0, len(self.terms))
+                                 for captureID, count in self.termCounts[termID].items()]}, fout,
+                      ensure_ascii=False)
+
+        return
+
+    def Load(self, filename, fileEncoding='utf-8') -> bool:
+        """Adds the counts from a file that was saved with Save() to this accumulator. Returns True if it worked."""
+
+        with open(filename, 'r', encoding=fileEncoding) as fin:
+            capturesIn = json.load(fin)
+
+        if capturesIn.get('version') != 1:
+            print('"' + filename + '" is not a saved set of captures that this version of contentcoder can read.')
+            return False
+
+        terms = capturesIn['terms']
+        captures = capturesIn['captures']
+        for termID, captureID, count in capturesIn['pairs']:
+            self.Add(terms[termID], captures[captureID], count)
+
+        return True
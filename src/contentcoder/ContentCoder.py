@@ -4,13 +4,21 @@
 # by Ryan L. Boyd, Ph.D.
 
 import csv
-import re
+import os
+import threading
+import time
 
-re._MAXCACHE = 10000
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 
 from . import happiestfuntokenizing
+from .AnalyzeStats import AnalyzeStats
+from .CaptureAccumulator import CaptureAccumulator
 from .ContentCodingDictionary import ContentCodingDictionary, containsWildcard
+from .WildcardMemory import notInMemory
 from .create_export_dir import create_export_dir
+from .TextPreprocessing import preprocessText, normalizeText, numberRegex
 
 class ContentCoder:
 
@@ -18,7 +26,15 @@ class ContentCoder:
                  dicFilename:str='test_files/EmpathDefaultDictionary.dic',
                  fileEncoding:str='utf-8-sig',
                  dictString:str=None,
-                 dictFormat:str="2007"):
+                 dictFormat:str="2007",
+                 wildcardEngine:str="trie",
+                 wildcardMemorySize:int=100000,
+                 wildcardMemoryFile:str=None,
+                 tokenCacheSize:int=100000,
+                 internVocabulary:bool=True,
+                 phraseEngine:str="lookup",
+                 flatDictionary=None,
+                 collectStats:bool=False):
 
         self.PunctStopList = frozenset(["`", "´", "~", "!", "@", "#", "$", "%", "^", "&", "*",
                                         "(", ")", "_", "+", "-", "–", "=", "[", "]", "\\", ";", "'",
@@ -44,15 +60,59 @@ class ContentCoder:
             self.AbbreviationDict[item] = itemClean
             self.AbbreviationDict[item + ','] = itemClean
 
-        self.numberPatternRegex = re.compile(r'\d+(,\d+)*(\.\d+)?')
+        # what counts as a number. swap in a different compiled pattern to count numbers differently.
+        self.numberPatternRegex = numberRegex
 
         # if you need to use a different tokenizer, this is the place to swap it in.
         # you will also need to use the correct method in within the Analyze() function.
         self.tokenizer = happiestfuntokenizing.Tokenizer(preserve_case=False, preserve_keywords=False)
 
-        self.capturedFreqs = {}
+        # each text's captures are counted on their own, then added in here all at once. the lock is what lets
+        # several threads share one ContentCoder.
+        self.captures = CaptureAccumulator()
+        self.captureLock = threading.RLock()
+
+        # per-stage timings and hot-path counts (see AnalyzeStats.py). these cost a little time on every text,
+        # so they're only collected when asked for. this can be switched on and off at any time.
+        self.collectStats = collectStats
+        self.analyzeStats = AnalyzeStats()
+
+        # single words are looked up in the dictionary once, and what we found for them (the matching entry
+        # and the category increments that go with it) is remembered here for every text that comes after.
+        # the cache is emptied whenever it fills up, or whenever the dictionary changes.
+        self.tokenCache = {}
+        self.tokenCacheSize = tokenCacheSize
+        self.tokenCacheDict = None
+        self.tokenCacheRevision = None
+
+        # when this is on, multi-word literal phrases are matched by their word IDs (see Vocabulary.py)
+        # instead of by joining up the tokens into strings. both give exactly the same results.
+        self.internVocabulary = internVocabulary
+
+        # "lookup" checks each multi-word phrase length at each spot in a text. "ahocorasick" finds all of the
+        # literal phrases in a text in one pass (see PhraseAutomaton.py), which pays off with dictionaries that have
+        # lots of long phrases. both give exactly the same results.
+        if phraseEngine not in ["lookup", "ahocorasick"]:
+            print('The \'phraseEngine=\' argument must be either \'lookup\' or \'ahocorasick\'. Using \'lookup\'...')
+            phraseEngine = "lookup"
+        self.phraseEngine = phraseEngine
+
+        # "trie" finds wildcard matches through the dictionary's WildcardIndex. "regex" is the original
+        # approach of testing every wildcard's regex in turn. both give exactly the same results.
+        if wildcardEngine not in ["trie", "regex"]:
+            print('The \'wildcardEngine=\' argument must be either \'trie\' or \'regex\'. Using \'trie\'...')
+            wildcardEngine = "trie"
+        self.wildcardEngine = wildcardEngine
+
+        # a FlatDictionary (e.g., from attachFlatDictionary()) is read in place, rather than loaded
+        if flatDictionary is not None:
+            self.dict = ContentCodingDictionary(dicFilename=dicFilename,
+                                                fileEncoding=fileEncoding,
+                                                abbreviations=self.AbbreviationDict,
+                                                wildcardMemoryCapacity=wildcardMemorySize,
+                                                flatDictionary=flatDictionary)
 
-        if dictString is not None:
+        elif dictString is not None:
 
             if dictFormat not in ["2007", "2022"]:
                 print('You must provide a \'dictFormat=\' argument for the dictionary contents to be parsed correctly.'
@@ -66,19 +126,30 @@ class ContentCoder:
                                                 fromString=True,
                                                 dictString=dictString,
                                                 dictFormat=dictFormat,
-                                                abbreviations=self.AbbreviationDict)
+                                                abbreviations=self.AbbreviationDict,
+                                                wildcardMemoryCapacity=wildcardMemorySize)
 
         else:
             self.dict = ContentCodingDictionary(dicFilename=dicFilename,
                                                 fileEncoding=fileEncoding,
-                                                abbreviations=self.AbbreviationDict)
+                                                abbreviations=self.AbbreviationDict,
+                                                wildcardMemoryCapacity=wildcardMemorySize)
+
+        # if we've saved the wildcard memory from a previous run with this same dictionary,
+        # we can pick up right where we left off
+        self.wildcardMemoryFile = wildcardMemoryFile
+        if wildcardMemoryFile is not None:
+            self.dict.LoadWildcardMemory(wildcardMemoryFile)
+
+    def __getstate__(self):
+        # locks can't be pickled (e.g., when we get sent to AnalyzeBatch()'s worker processes)
+        state = self.__dict__.copy()
+        del state['captureLock']
+        return state
 
-        # now that the dictionary is loaded, let's bump up the maximum
-        # number of compiled regular expressions that we are caching to
-        # speed things along. We give it 5% overhead on our regexes that
-        # we have here, just in case.
-        if int(self.dict.numberOfWildcards * 1.05) > re._MAXCACHE:
-            re._MAXCACHE = int(self.dict.numberOfWildcards * 1.05)
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.captureLock = threading.RLock()
 
     def GetResultsHeader(self):
         """Returns a list of all output categories. Useful as the header row of a CSV file."""
@@ -119,26 +190,62 @@ class ContentCoder:
 
         return resultsArray
 
-    def __RetainFrequency(self, dicTerm, capturedString):
-        """Stores/keeps the frequencies of captured terms. Should not be called outside of ContentCoder class."""
+    def __RetainFrequency(self, capturedFreqs, dicTerm, capturedString):
+        """Stores/keeps the frequencies of captured terms in capturedFreqs, a dict of {(dicTerm, capturedString):
+        count} that only belongs to the text being coded. Should not be called outside of ContentCoder class."""
 
-        if dicTerm not in self.capturedFreqs.keys():
-            self.capturedFreqs[dicTerm] = {}
+        captureKey = (dicTerm, capturedString)
+        capturedFreqs[captureKey] = capturedFreqs.get(captureKey, 0) + 1
 
-        if capturedString in self.capturedFreqs[dicTerm].keys():
-            self.capturedFreqs[dicTerm][capturedString] += 1
-        else:
-            self.capturedFreqs[dicTerm][capturedString] = 1
+        return
+
+    @property
+    def capturedFreqs(self) -> dict:
+        """A copy of the captured-word frequencies as a dict of dicts: {dicTerm: {capturedString: count}}. The
+        frequencies themselves are kept in self.captures (a CaptureAccumulator)."""
+
+        with self.captureLock:
+            return self.captures.ToDict()
+
+    @capturedFreqs.setter
+    def capturedFreqs(self, capturedFreqs):
+        with self.captureLock:
+            self.captures = CaptureAccumulator()
+            self.captures.Merge(capturedFreqs)
+
+    def MergeCaptures(self, capturedFreqs):
+        """Adds the captured-word frequencies from another ContentCoder (its 'captures', or the older dict of dicts
+        from its 'capturedFreqs') into our own. This is how the results of retainCaptures=True get combined when
+        texts are coded by more than one ContentCoder."""
+
+        with self.captureLock:
+            self.captures.Merge(capturedFreqs)
 
         return
 
-    def FillCaptureGaps(self):
+    def SaveCaptures(self, filename:str, fileEncoding:str='utf-8'):
+        """Saves the captured-word frequencies so that they can be combined with others later on (e.g., from
+        another machine) using LoadCaptures()."""
 
-        listOfKeys = list(self.dict.dictTermCatMap.keys())
+        with self.captureLock:
+            self.captures.Save(filename, fileEncoding=fileEncoding)
+
+        return
+
+    def LoadCaptures(self, filename:str, fileEncoding:str='utf-8'):
+        """Adds the captured-word frequencies saved with SaveCaptures() into our own."""
 
-        for dicTerm in listOfKeys:
-            if dicTerm not in self.capturedFreqs.keys():
-                self.capturedFreqs[dicTerm] = {'': 0}
+        with self.captureLock:
+            return self.captures.Load(filename, fileEncoding=fileEncoding)
+
+    def FillCaptureGaps(self):
+        """Gives every dictionary term that hasn't captured anything a count of 0 for the empty string, so that it
+        shows up in the captures. ExportCaptures() takes care of this on its own as it goes."""
+
+        with self.captureLock:
+            for dicTerm in self.dict.dictTermCatMap.keys():
+                if not self.captures.HasCaptures(dicTerm):
+                    self.captures.Add(dicTerm, '', 0)
 
         return
 
@@ -147,106 +254,211 @@ class ContentCoder:
                        fileEncoding:str='utf-8-sig',
                        wildcardsOnly:bool=False,
                        fullset:bool=True):
-        """"If you've been aggregating the frequencies of captured words, this will export that list."""
+        """"If you've been aggregating the frequencies of captured words, this will export that list. Every term
+        that hasn't captured anything gets a row with an empty capture and a count of 0, unless fullset=False."""
 
-        if len(self.capturedFreqs.keys()) == 0:
+        if len(self.captures) == 0:
             print('\t!!! There are no terms in your frequency list. !!!\n\t!!! Did you remember to'
                   ' set \'retainFreqs\' to True? !!!')
             return
 
         listOfKeys = list(self.dict.dictTermCatMap.keys())
 
-        self.FillCaptureGaps()
-
         listOfKeys.sort()
 
         if wildcardsOnly:
             listOfKeys = [x for x in listOfKeys if containsWildcard(x)]
 
-        create_export_dir(filename)
-        with open(filename, 'w', encoding=fileEncoding, newline='') as fout:
-            csvw = csv.writer(fout)
-            csvw.writerow(['dicTerm', 'captured', 'count', 'categories'])
+        # hold on to the lock so that no other thread adds captures while we're partway through writing them
+        with self.captureLock:
+            create_export_dir(filename)
+            with open(filename, 'w', encoding=fileEncoding, newline='') as fout:
+                csvw = csv.writer(fout)
+                csvw.writerow(['dicTerm', 'captured', 'count', 'categories'])
 
-            for dicTerm in listOfKeys:
+                for dicTerm in listOfKeys:
 
-                listOfCaptures = list(self.capturedFreqs[dicTerm])
-                listOfCaptures.sort()
+                    # a term that hasn't captured anything gets a single, empty row
+                    listOfCaptures = self.captures.SortedCaptures(dicTerm)
+                    if len(listOfCaptures) == 0:
+                        listOfCaptures = [('', 0)]
 
-                for capture in listOfCaptures:
+                    for capture, count in listOfCaptures:
 
-                    # skip to the next term if we're not exporting the fullset
-                    if fullset == False and capture == '':
-                        continue
+                        # skip to the next term if we're not exporting the fullset
+                        if fullset == False and capture == '':
+                            continue
 
-                    csvw.writerow([dicTerm,
-                                   capture,
-                                   str(self.capturedFreqs[dicTerm][capture]),
-                                   ', '.join(self.dict.dictTermCatMap[dicTerm])])
+                        csvw.writerow([dicTerm,
+                                       capture,
+                                       str(count),
+                                       ', '.join(self.dict.dictTermCatMap[dicTerm])])
 
         print('Exported captured word frequencies.')
 
         return
 
-    def Analyze(self,
-                inputText:str,
-                relativeFreq=True,
-                dropPunct=True,
-                retainCaptures=False,
-                returnTokens=False,
-                wildcardMem=True):
-        """Analyze a string and return the results."""
+    def SaveWildcardMemory(self, filename:str=None):
+        """Saves the wildcard memory so that a future ContentCoder using the same dictionary can load it with
+        the 'wildcardMemoryFile=' argument. Defaults to the file that was given when this ContentCoder was made."""
+
+        if filename is None:
+            filename = self.wildcardMemoryFile
+
+        if filename is None:
+            print('You need to provide a filename to save the wildcard memory to.')
+            return
+
+        self.dict.SaveWildcardMemory(filename)
+        print('Saved wildcard memory.')
 
-        resultsRawFreq = {}
-        resultsRelativeFreq = {}
+        return
 
-        resultsRawFreq['Dic'] = int(0)
-        resultsRelativeFreq['Dic'] = 0.0
+    def ProfileDictionary(self, sampleTexts=None, top:int=20, filename:str=None, dropPunct:bool=True) -> dict:
+        """Returns the dictionary's CostReport(), measured against sampleTexts (if given). If a filename is given,
+        the report is also written out there as text. Handy for finding out why a dictionary is slow before coding
+        a big corpus with it.
 
-        resultsRawFreq['WC'] = int(0)
-        resultsRelativeFreq['WC'] = int(0)
+        The sample is coded by the same code as Analyze(), with a token cache of its own and without the wildcard
+        memory, so its counts are exactly what Stats() would show after a fresh ContentCoder (with
+        collectStats=True) coded sampleTexts with Analyze(wildcardMem=False). Nothing that was coded before
+        changes them, and coding the sample leaves this coder's token cache, wildcard memory, captures, and Stats()
+        alone."""
 
-        resultsRawFreq['BigWords'] = int(0)
-        resultsRelativeFreq['BigWords'] = 0.0
+        sample = None
+        if sampleTexts is not None:
+            sample = self.analyzeStats.NewCounters()
+            sample['scanTally'] = {}
+            sample['scannedStrings'] = {}
 
-        resultsRawFreq['Numbers'] = int(0)
-        resultsRelativeFreq['Numbers'] = 0.0
+            tokenCache = {}
+            for inputText in sampleTexts:
+                self.__CodeText(inputText=inputText, dropPunct=dropPunct, retainCaptures=False, wildcardMem=False,
+                                counters=sample, tokenCache=tokenCache)
 
-        resultsRawFreq['AllPunct'] = int(0)
-        resultsRelativeFreq['AllPunct'] = 0.0
-        resultsRawFreq['Period'] = int(0)
-        resultsRelativeFreq['Period'] = 0.0
-        resultsRawFreq['Comma'] = int(0)
-        resultsRelativeFreq['Comma'] = 0.0
-        resultsRawFreq['QMark'] = int(0)
-        resultsRelativeFreq['QMark'] = 0.0
-        resultsRawFreq['Exclam'] = int(0)
-        resultsRelativeFreq['Exclam'] = 0.0
-        resultsRawFreq['Apostro'] = int(0)
-        resultsRelativeFreq['Apostro'] = 0.0
+        if filename is not None:
+            return self.dict.ExportCostReport(filename, sample=sample, top=top)
 
-        for cat in self.dict.catNames:
-            resultsRawFreq[cat] = int(0)
-            resultsRelativeFreq[cat] = 0.0
+        return self.dict.CostReport(sample=sample, top=top)
+
+    def Stats(self) -> dict:
+        """Returns the timings and counts collected while coding texts (with collectStats=True): the seconds spent
+        in each stage, and how often words were found in the token cache, matched literally, found in the wildcard
+        memory, or had to be searched for among the wildcards."""
+
+        return self.analyzeStats.Stats()
+
+    def ResetStats(self):
+        """Sets all of the timings and counts from Stats() back to zero."""
+
+        self.analyzeStats.Reset()
 
-        resultsRawFreq['Period'] = inputText.count('.')
-        resultsRawFreq['Comma'] = inputText.count(',')
-        resultsRawFreq['QMark'] = inputText.count('?')
-        resultsRawFreq['Exclam'] = inputText.count('!')
-        resultsRawFreq['Apostro'] = inputText.count('\'') + inputText.count('’')
+        return
+
+    def ExportStats(self, filename:str=None, prefix:str='contentcoder') -> str:
+        """Returns the timings and counts from Stats() in the Prometheus text format, and writes them to filename
+        (e.g., for a node_exporter textfile collector) if one is given."""
 
-        for punctItem in list(self.PunctStopList):
-            if len(punctItem) == 1:
-                resultsRawFreq['AllPunct'] += inputText.count(punctItem)
+        statsText = self.analyzeStats.ToPrometheus(prefix=prefix)
 
-        # preprocess the text so that we can handle whatever we need to handle
-        preprocessedText = self.PreprocessText(inputText)
+        if filename is not None:
+            create_export_dir(filename)
+            with open(filename, 'w', encoding='utf-8', newline='') as fout:
+                fout.write(statsText)
 
-        # count numbers within the text
-        numberCount = len(self.numberPatternRegex.findall(preprocessedText))
-        # print('Numbers: ' + str(numberCount))
+        return statsText
+
+    def Analyze(self,
+                inputText:str,
+                relativeFreq=True,
+                dropPunct=True,
+                retainCaptures=False,
+                returnTokens=False,
+                wildcardMem=True):
+        """Analyze a string and return the results."""
+
+        rawCounts, relativeCounts, tokens = self.__CodeText(inputText=inputText,
+                                                            dropPunct=dropPunct,
+                                                            retainCaptures=retainCaptures,
+                                                            wildcardMem=wildcardMem)
+
+        if relativeFreq:
+            resultCounts = relativeCounts
+        else:
+            resultCounts = rawCounts
+
+        punctColumn = 4 + len(self.dict.catNames)
+
+        results = {'Dic': resultCounts[1],
+                   'WC': resultCounts[0],
+                   'BigWords': resultCounts[2],
+                   'Numbers': resultCounts[3],
+                   'AllPunct': resultCounts[punctColumn],
+                   'Period': resultCounts[punctColumn + 1],
+                   'Comma': resultCounts[punctColumn + 2],
+                   'QMark': resultCounts[punctColumn + 3],
+                   'Exclam': resultCounts[punctColumn + 4],
+                   'Apostro': resultCounts[punctColumn + 5]}
+
+        for catIndex, cat in enumerate(self.dict.catNames):
+            results[cat] = resultCounts[4 + catIndex]
+
+        if returnTokens:
+            results['tokenizedText'] = tokens
+
+        return results
+
+    def __CodeText(self, inputText, dropPunct, retainCaptures, wildcardMem, counters=None, tokenCache=None):
+        """Does the actual work of coding a text for Analyze() and friends. Returns the raw counts and the relative
+        frequencies as two lists whose columns line up with GetResultsHeader(), along with the tokens. Given
+        counters (from AnalyzeStats.NewCounters()) and/or a tokenCache, it counts into and looks words up in those
+        instead of our own, which is how ProfileDictionary() measures a sample. Should not be called outside of
+        ContentCoder class."""
+
+        # the columns are WC, Dic, BigWords, Numbers, then each category, then the punctuation
+        catColumns = {}
+        for catIndex, cat in enumerate(self.dict.catNames):
+            catColumns[cat] = 4 + catIndex
+
+        punctColumn = 4 + len(self.dict.catNames)
+
+        rawCounts = [int(0)] * (punctColumn + 6)
+        relativeCounts = [0.0] * (punctColumn + 6)
+
+        # this text's stats, if we're collecting them. everything that counts something checks this first.
+        addToStats = False
+        if counters is None and self.collectStats:
+            counters = self.analyzeStats.NewCounters()
+            addToStats = True
+        if counters is not None:
+            stageStart = time.perf_counter()
+
+        # preprocess the text so that we can handle whatever we need to handle, counting punctuation
+        # and numbers as we go
+        preprocessedText, punctCounts, numberCount = preprocessText(inputText,
+                                                                    punctStopList=self.PunctStopList,
+                                                                    abbreviations=self.AbbreviationDict,
+                                                                    numberPattern=self.numberPatternRegex)
+        rawCounts[punctColumn:punctColumn + 6] = punctCounts
+
+        if counters is not None:
+            stageEnd = time.perf_counter()
+            counters['seconds']['preprocess'] += stageEnd - stageStart
+            stageStart = stageEnd
+
+        if tokenCache is None:
+            tokenCache = self.GetTokenCache()
+
+        # the captures for this text alone, which get added to self.capturedFreqs once we're done with it
+        capturedFreqs = {}
 
         tokens = self.tokenizer.tokenize(preprocessedText)
+
+        if counters is not None:
+            stageEnd = time.perf_counter()
+            counters['seconds']['tokenize'] += stageEnd - stageStart
+            stageStart = stageEnd
+
         # remove stop words
         tokensNoPunct = [x for x in tokens if x not in self.PunctStopList]
 
@@ -256,8 +468,8 @@ class ContentCoder:
         totalStringLengthNoPunct = len(tokensNoPunct)
         totalStringLength = len(tokens)
 
-        resultsRawFreq['WC'] = int(totalStringLengthNoPunct)
-        resultsRelativeFreq['WC'] = int(totalStringLengthNoPunct)
+        rawCounts[0] = int(totalStringLengthNoPunct)
+        relativeCounts[0] = int(totalStringLengthNoPunct)
 
         singleWordRelFreqValue = 0.0
         if totalStringLengthNoPunct > 0:
@@ -265,137 +477,505 @@ class ContentCoder:
 
         for token in tokens:
             if len(token) > 6:
-                resultsRawFreq['BigWords'] += int(1)
-                resultsRelativeFreq['BigWords'] += singleWordRelFreqValue
+                rawCounts[2] += int(1)
+                relativeCounts[2] += singleWordRelFreqValue
 
-        if resultsRawFreq['WC'] > 0:
-            resultsRelativeFreq['AllPunct'] = resultsRawFreq['AllPunct'] / resultsRawFreq['WC']
-            resultsRelativeFreq['Period'] = resultsRawFreq['Period'] / resultsRawFreq['WC']
-            resultsRelativeFreq['Comma'] = resultsRawFreq['Comma'] / resultsRawFreq['WC']
-            resultsRelativeFreq['QMark'] = resultsRawFreq['QMark'] / resultsRawFreq['WC']
-            resultsRelativeFreq['Exclam'] = resultsRawFreq['Exclam'] / resultsRawFreq['WC']
-            resultsRelativeFreq['Apostro'] = resultsRawFreq['Apostro'] / resultsRawFreq['WC']
+        if rawCounts[0] > 0:
+            for column in range(punctColumn, punctColumn + 6):
+                relativeCounts[column] = rawCounts[column] / rawCounts[0]
 
         # last thing for us to do is make sure that any word with an asterisk in it has that
         # asterisk escaped. we do this after we count BigWords just so we don't throw things off
         tokens = [x.replace('*', r'\*') for x in tokens]
 
+        # the word IDs of our tokens, for matching multi-word literal phrases without building strings. with the
+        # aho-corasick engine, we find all of those phrases (by where they start) right here, up front.
+        vocabulary = None
+        phraseStarts = None
+        if self.phraseEngine == "ahocorasick" and self.dict.maxWords > 1:
+            phraseStarts = self.dict.GetPhraseAutomaton().FindAll(self.dict.GetVocabulary().Lookup(tokens))
+        elif self.internVocabulary and self.dict.maxWords > 1:
+            vocabulary = self.dict.GetVocabulary()
+            tokenIDs = vocabulary.Lookup(tokens)
+
+        # multi-word wildcard entries get matched one token at a time, but a token with a space in it (e.g., a phone
+        # number) doesn't line up with the words of an entry. any stretch of text with one of those in it gets
+        # matched as a single string instead, the way that it always has been, and none of its phrase lengths get
+        # ruled out by what the first word is.
+        tokensWithSpaces = None
+        if any([' ' in token for token in tokens]):
+            tokensWithSpaces = [' ' in token for token in tokens]
+
         # let's go through and start analyzing!
         for i in range(0, totalStringLength):
-            for numberOfWords in range(self.dict.maxWords, 0, -1):
 
-                if numberOfWords not in self.dict.dictDataStandard.keys():
-                    continue
+            # the longest entry that we're still looking for at this spot. a freshly-matched wildcard moves us
+            # along without ending the search, so after one of those, we carry on with shorter entries from there.
+            longestEntry = self.dict.maxWords
 
-                # make sure that we don't overextend past our array
-                if (i + numberOfWords > totalStringLength):
-                    continue
+            while True:
 
-                # build the string that we're looking to analyze
-                targetString = ''
+                # what the word at this spot matches on its own, and the lengths of the multi-word entries that could
+                # possibly start with it (longest first). the same words turn up over and over, so we only need to
+                # work this out once for each of them.
+                resolvedToken = tokenCache.get(tokens[i])
+                if resolvedToken is None:
+                    resolvedToken = self.__ResolveToken(tokens[i], catColumns, wildcardMem, counters)
+                    if self.tokenCacheSize is None or len(tokenCache) < self.tokenCacheSize:
+                        tokenCache[tokens[i]] = resolvedToken
+                    if counters is not None:
+                        counters['tokenCacheMisses'] += 1
+                elif counters is not None:
+                    counters['tokenCacheHits'] += 1
 
-                if (numberOfWords > 1):
-                    targetString = ' '.join(tokens[i:i + numberOfWords])
-                else:
-                    targetString = tokens[i]
+                dicEntry, catIncrements, phraseLengths, prunedPhraseLengths, lengthsRuledOut = resolvedToken
+                if tokensWithSpaces is None:
+                    phraseLengths = prunedPhraseLengths
 
-                # looking for a perfect, literal match
-                if targetString in self.dict.dictDataStandard[numberOfWords]:
+                matchFound = False
+                movedAlong = False
 
-                    resultsRawFreq['Dic'] += numberOfWords
-                    resultsRelativeFreq['Dic'] += numberOfWords * singleWordRelFreqValue
+                for numberOfWords in phraseLengths:
 
-                    # increment frequencies for all of the categories associated with this term
-                    # note that we replace asterisk here with an escaped asterisk because,
-                    # we we're not looking at a wildcard entry, the asterisk will NOT be
-                    # escaped in self.dict.dictDataStandard[numberOfWords], but it WILL
-                    # still be escaped everywhere else in the dictionary
-                    for cat in self.dict.dictTermCatMap[targetString].keys():
-                        incrementValue = numberOfWords * self.dict.dictTermCatMap[targetString][cat]
-                        resultsRawFreq[cat] += incrementValue
-                        resultsRelativeFreq[cat] += incrementValue * singleWordRelFreqValue
+                    # make sure that we don't overextend past our array
+                    if numberOfWords > longestEntry or i + numberOfWords > totalStringLength:
+                        continue
 
-                    # if we're retaining frequencies, we do that here
-                    if retainCaptures:
-                        self.__RetainFrequency(targetString, targetString)
+                    # the only entries of this length start with a wildcard word that this word doesn't match
+                    if (tokensWithSpaces is not None and numberOfWords in lengthsRuledOut and
+                            not any(tokensWithSpaces[i:i + numberOfWords])):
+                        continue
 
-                    # make sure that we move along, little doggy
-                    i += numberOfWords - 1
-                    break
+                    # looking for a perfect, literal match. with an interned vocabulary, we only need to build
+                    # the string that we're looking to analyze if it matched, or if a wildcard matches it.
+                    targetString = None
+                    if phraseStarts is not None:
+                        literalMatch = i in phraseStarts and numberOfWords in phraseStarts[i]
+                    elif vocabulary is not None:
+                        literalMatch = tokenIDs[i:i + numberOfWords] in vocabulary.phrases[numberOfWords]
+                    else:
+                        targetString = ' '.join(tokens[i:i + numberOfWords])
+                        literalMatch = targetString in self.dict.dictDataStandard[numberOfWords]
+
+                    # matching the wildcards token by token tells us right away whether there's anything here at all.
+                    # anything that the wildcard memory remembers matching here is exactly what we'd find, so
+                    # we only need to ask it once we know that something matches.
+                    tokenWildcardEntry = None
+                    if not literalMatch:
+                        if not self.dict.dictDataWildsList[numberOfWords]:
+                            continue
+
+                        if self.wildcardEngine == "trie" and (tokensWithSpaces is None or
+                                                              not any(tokensWithSpaces[i:i + numberOfWords])):
+                            if counters is not None:
+                                scanStart = time.perf_counter()
+                            tokenWildcardEntry = self.dict.MatchWildcardTokens(tokens[i:i + numberOfWords])
+                            if counters is not None:
+                                self.__CountScan(counters, scanStart, tokenWildcardEntry, numberOfWords,
+                                                 tokens[i:i + numberOfWords])
+                            if tokenWildcardEntry is None:
+                                continue
+
+                    if targetString is None:
+                        targetString = ' '.join(tokens[i:i + numberOfWords])
+
+                    if literalMatch:
+
+                        rawCounts[1] += numberOfWords
+                        relativeCounts[1] += numberOfWords * singleWordRelFreqValue
+
+                        # increment frequencies for all of the categories associated with this term
+                        # note that we replace asterisk here with an escaped asterisk because,
+                        # we we're not looking at a wildcard entry, the asterisk will NOT be
+                        # escaped in self.dict.dictDataStandard[numberOfWords], but it WILL
+                        # still be escaped everywhere else in the dictionary
+                        for cat in self.dict.dictTermCatMap[targetString].keys():
+                            incrementValue = numberOfWords * self.dict.dictTermCatMap[targetString][cat]
+                            rawCounts[catColumns[cat]] += incrementValue
+                            relativeCounts[catColumns[cat]] += incrementValue * singleWordRelFreqValue
+
+                        # if we're retaining frequencies, we do that here
+                        if retainCaptures:
+                            self.__RetainFrequency(capturedFreqs, targetString, targetString)
+
+                        if counters is not None:
+                            counters['literalHits'] += 1
+
+                        matchFound = True
+                        break
+
+                    # if we're using wildcard memory, this will help speed up previously-identified captures.
+                    # the memory also remembers strings that no wildcard matched, so those don't get re-tested.
+                    if wildcardMem:
+                        wildcardMemory = self.dict.GetWildcardMemory(numberOfWords)
+                        wildcardEntry = wildcardMemory.Get(targetString)
+
+                        if counters is not None:
+                            counters['memoryMisses' if wildcardEntry is notInMemory else 'memoryHits'] += 1
+
+                        if wildcardEntry is None:
+                            continue
+
+                        if wildcardEntry is not notInMemory:
+
+                            rawCounts[1] += numberOfWords
+                            relativeCounts[1] += numberOfWords * singleWordRelFreqValue
+
+                            # increment frequencies for all of the categories associated with this term
+                            for cat in self.dict.dictTermCatMap[wildcardEntry].keys():
+                                incrementValue = numberOfWords * self.dict.dictTermCatMap[wildcardEntry][cat]
+                                rawCounts[catColumns[cat]] += incrementValue
+                                relativeCounts[catColumns[cat]] += incrementValue * singleWordRelFreqValue
+
+                            # if we're retaining frequencies, we do that here
+                            if retainCaptures:
+                                self.__RetainFrequency(capturedFreqs, wildcardEntry, targetString)
+
+                            if counters is not None:
+                                counters['wildcardHits'] += 1
+
+                            matchFound = True
+                            break
 
-                # if we're using wildcard memory, this will help speed up previously-identified captures
-                elif wildcardMem and numberOfWords in self.dict.wildcardMemory and \
-                        targetString in self.dict.wildcardMemory[numberOfWords].keys():
+                    # here, we do the wildcard stuff (unless we already did it token by token)
+                    if tokenWildcardEntry is not None:
+                        wildcardEntry = tokenWildcardEntry
+                    else:
+                        if counters is not None:
+                            scanStart = time.perf_counter()
+                        if self.wildcardEngine == "trie":
+                            wildcardEntry = self.dict.MatchWildcard(targetString, numberOfWords)
+                        else:
+                            wildcardEntry = self.dict.MatchWildcardRegEx(targetString, numberOfWords)
+                        if counters is not None:
+                            self.__CountScan(counters, scanStart, wildcardEntry, numberOfWords, targetString)
+
+                    if wildcardMem: wildcardMemory.Put(targetString, wildcardEntry)
+
+                    if wildcardEntry is not None:
+
+                        rawCounts[1] += numberOfWords
+                        relativeCounts[1] += numberOfWords * singleWordRelFreqValue
+
+                        # increment frequencies for all of the categories associated with this term
+                        for cat in self.dict.dictTermCatMap[wildcardEntry].keys():
+                            incrementValue = numberOfWords * self.dict.dictTermCatMap[wildcardEntry][cat]
+                            rawCounts[catColumns[cat]] += incrementValue
+                            relativeCounts[catColumns[cat]] += incrementValue * singleWordRelFreqValue
+
+                        # if we're retaining frequencies, we do that here
+                        if retainCaptures:
+                            self.__RetainFrequency(capturedFreqs, wildcardEntry, targetString)
+
+                        if counters is not None:
+                            counters['wildcardHits'] += 1
+
+                        # make sure that we move along, little doggy. note that, unlike the branches above,
+                        # a freshly-matched wildcard has never stopped the search for shorter matches, so we
+                        # keep going from here to stay consistent with previously-coded results.
+                        i += numberOfWords - 1
+                        longestEntry = numberOfWords - 1
+                        movedAlong = True
+                        break
+
+                if movedAlong:
+                    continue
 
-                    wildcardEntry = self.dict.wildcardMemory[numberOfWords][targetString]
+                # single words are always the last thing that we check
+                if not matchFound and dicEntry is not None:
 
-                    resultsRawFreq['Dic'] += numberOfWords
-                    resultsRelativeFreq['Dic'] += numberOfWords * singleWordRelFreqValue
+                    rawCounts[1] += 1
+                    relativeCounts[1] += singleWordRelFreqValue
 
-                    # increment frequencies for all of the categories associated with this term
-                    for cat in self.dict.dictTermCatMap[wildcardEntry].keys():
-                        incrementValue = numberOfWords * self.dict.dictTermCatMap[wildcardEntry][cat]
-                        resultsRawFreq[cat] += incrementValue
-                        resultsRelativeFreq[cat] += incrementValue * singleWordRelFreqValue
+                    for catColumn, incrementValue in catIncrements:
+                        rawCounts[catColumn] += incrementValue
+                        relativeCounts[catColumn] += incrementValue * singleWordRelFreqValue
 
-                    # if we're retaining frequencies, we do that here
                     if retainCaptures:
-                        self.__RetainFrequency(wildcardEntry, targetString)
+                        self.__RetainFrequency(capturedFreqs, dicEntry, tokens[i])
 
-                    # make sure that we move along, little doggy
-                    i += numberOfWords - 1
-                    break
+                    if counters is not None:
+                        counters['literalHits' if tokens[i] in self.dict.dictDataStandard[1] else 'wildcardHits'] += 1
 
-                # here, we do the wildcard stuff
-                else:
-                    for wildcardEntry in self.dict.dictDataWildsList[numberOfWords]:
+                break
 
-                        # test the wildcard:
-                        if len(self.dict.dictDataWildsRegEx[wildcardEntry].findall(targetString)) > 0:
+        # add in numbers, if that's what we're doing
+        rawCounts[3] += numberCount
+        relativeCounts[3] += numberCount * singleWordRelFreqValue
+
+        if len(capturedFreqs) > 0:
+            with self.captureLock:
+                self.captures.AddCounts(capturedFreqs)
+
+        if counters is not None:
+            counters['seconds']['match'] += time.perf_counter() - stageStart
+            counters['texts'] += 1
+            counters['tokens'] += totalStringLength
+        if addToStats:
+            self.analyzeStats.Add(counters)
+
+        return rawCounts, relativeCounts, tokens
+
+    def __CountScan(self, counters, scanStart, wildcardEntry, numWords, target):
+        """Counts a search through the wildcard entries of length numWords for target (a string, or a list of
+        tokens), which started at scanStart (from time.perf_counter()) and found wildcardEntry. Should not be called
+        outside of ContentCoder class."""
+
+        counters['seconds']['wildcardScan'] += time.perf_counter() - scanStart
+        counters['wildcardScans'] += 1
+
+        # ProfileDictionary() also wants to know which entry won each search, and what got searched for
+        scanTally = counters.get('scanTally')
+        if scanTally is not None:
+            scanKey = (numWords, wildcardEntry)
+            scanTally[scanKey] = scanTally.get(scanKey, 0) + 1
+            counters['scannedStrings'].setdefault(target if isinstance(target, str) else ' '.join(target), numWords)
+
+        if wildcardEntry is not None:
+            counters['wildcardScanMatches'] += 1
+
+        # the regex engine tests every pattern in turn, up to and including the one that matched. the trie engine
+        # gets its answer from a single index lookup.
+        if self.wildcardEngine == "regex":
+            wildcardList = self.dict.dictDataWildsList.get(numWords, [])
+            counters['wildcardAttempts'] += (len(wildcardList) if wildcardEntry is None
+                                             else wildcardList.index(wildcardEntry) + 1)
+        else:
+            counters['wildcardAttempts'] += 1
 
-                            resultsRawFreq['Dic'] += numberOfWords
-                            resultsRelativeFreq['Dic'] += numberOfWords * singleWordRelFreqValue
+        return
 
-                            if wildcardMem: self.dict.wildcardMemory[numberOfWords][targetString] = wildcardEntry
+    def __ResolveToken(self, token, catColumns, wildcardMem, counters=None):
+        """Looks up a single word in the dictionary. Returns the entry that it matched on its own (or None), a tuple
+        of (column, increment) pairs for that entry's categories, the lengths of the multi-word entries that
+        could start with it, those same lengths without the ones that can be skipped as long as none of the
+        phrase's words has a space in it, and the skippable lengths themselves. Should not be called outside of
+        ContentCoder class."""
 
-                            # increment frequencies for all of the categories associated with this term
-                            for cat in self.dict.dictTermCatMap[wildcardEntry].keys():
-                                incrementValue = numberOfWords * self.dict.dictTermCatMap[wildcardEntry][cat]
-                                resultsRawFreq[cat] += incrementValue
-                                resultsRelativeFreq[cat] += incrementValue * singleWordRelFreqValue
+        phraseLengths = self.dict.PhraseLengthsStartingWith(token)
+        lengthsRuledOut = self.dict.PhraseLengthsRuledOut(token)
+        prunedPhraseLengths = tuple([numWords for numWords in phraseLengths if numWords not in lengthsRuledOut])
 
-                            # if we're retaining frequencies, we do that here
-                            if retainCaptures:
-                                self.__RetainFrequency(wildcardEntry, targetString)
+        if 1 not in self.dict.dictDataStandard:
+            dicEntry = None
 
-                            # make sure that we move along, little doggy
-                            i += numberOfWords - 1
-                            break
+        elif token in self.dict.dictDataStandard[1]:
+            dicEntry = token
 
-        # add in numbers, if that's what we're doing
-        resultsRawFreq, resultsRelativeFreq = self.AddNumbers(resultsRawFreq, resultsRelativeFreq,
-                                                              numberCount, singleWordRelFreqValue)
+        else:
+            dicEntry = notInMemory
 
-        if relativeFreq:
-            if returnTokens:
-                resultsRelativeFreq['tokenizedText'] = tokens
-            return resultsRelativeFreq
+            if wildcardMem:
+                wildcardMemory = self.dict.GetWildcardMemory(1)
+                dicEntry = wildcardMemory.Get(token)
+
+                if counters is not None:
+                    counters['memoryMisses' if dicEntry is notInMemory else 'memoryHits'] += 1
+
+            if dicEntry is notInMemory:
+                if counters is not None:
+                    scanStart = time.perf_counter()
+                if self.wildcardEngine == "trie":
+                    dicEntry = self.dict.MatchWildcard(token, 1)
+                else:
+                    dicEntry = self.dict.MatchWildcardRegEx(token, 1)
+                if counters is not None:
+                    self.__CountScan(counters, scanStart, dicEntry, 1, token)
+
+                if wildcardMem: wildcardMemory.Put(token, dicEntry)
+
+        if dicEntry is None:
+            return None, (), phraseLengths, prunedPhraseLengths, lengthsRuledOut
+
+        catIncrements = tuple((catColumns[cat], 1 * catWeight)
+                              for cat, catWeight in self.dict.dictTermCatMap[dicEntry].items())
+
+        return dicEntry, catIncrements, phraseLengths, prunedPhraseLengths, lengthsRuledOut
+
+    def GetTokenCache(self) -> dict:
+        """Returns the cache of single-word lookups, emptying it first if the dictionary has changed since it
+        was filled (or if it has filled up). Threads share the cache. Two of them might both look up the same word
+        and store the same answer, or one might keep using a cache that another has just replaced, but neither
+        changes what gets found."""
+
+        if (self.tokenCacheDict is not self.dict or self.tokenCacheRevision != self.dict.revision or
+                (self.tokenCacheSize is not None and len(self.tokenCache) >= self.tokenCacheSize)):
+            self.tokenCache = {}
+            self.tokenCacheDict = self.dict
+            self.tokenCacheRevision = self.dict.revision
+
+        return self.tokenCache
+
+    def AnalyzeBatch(self,
+                     texts,
+                     workers:int=None,
+                     chunksize:int=64,
+                     ordered:bool=True,
+                     maxChunksInFlight:int=None,
+                     backend:str="process",
+                     **analyzeArgs):
+        """Analyzes many texts at once, spread out over a pool of worker processes (or threads). 'texts' can be any iterable
+        (including a generator that reads from a file), and the results come back as an iterator, so you can
+        start writing them out right away. Any other keyword arguments (relativeFreq, dropPunct, etc.) are
+        passed along to Analyze().
+
+        workers: the number of worker processes to use. Defaults to the number of CPU cores. With workers=1,
+                 the texts are simply analyzed one after another in this process.
+        chunksize: how many texts get sent to a worker at a time.
+        ordered: if True, results come back in the same order as 'texts'. If False, results come back as
+                 (index, result) tuples in whatever order they finish, which can be a bit faster.
+        maxChunksInFlight: how many chunks can be waiting on workers at once. This is what keeps memory use
+                           flat for huge inputs. Defaults to 4 chunks per worker.
+        backend: "process" or "thread".
+
+        With the "process" backend, each worker gets its own copy of this ContentCoder (dictionary, wildcard
+        memory, and all) when the pool starts up. If retainCaptures=True, the workers' captured-word frequencies
+        are merged back into this ContentCoder's as results come in.
+
+        With the "thread" backend, the workers all share this ContentCoder, so there's only ever one copy of the
+        dictionary and its caches. On a regular Python build, the threads take turns, so this only pays off on a
+        free-threaded build (e.g., python3.13t), where they can all run at once."""
+
+        if backend not in ["process", "thread"]:
+            print('The \'backend=\' argument must be either \'process\' or \'thread\'. Using \'process\'...')
+            backend = "process"
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if workers <= 1:
+            for textIndex, text in enumerate(texts):
+                results = self.Analyze(text, **analyzeArgs)
+                yield results if ordered else (textIndex, results)
+            return
+
+        if maxChunksInFlight is None:
+            maxChunksInFlight = workers * 4
+
+        if backend == "thread":
+            executor = ThreadPoolExecutor(max_workers=workers)
+            analyzeChunk = self.__AnalyzeChunk
         else:
-            if returnTokens:
-                resultsRawFreq['tokenizedText'] = tokens
-            return resultsRawFreq
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_initBatchWorker, initargs=(self,))
+            analyzeChunk = _analyzeBatchChunk
 
-    def PreprocessText(self, inputText):
-        '''Cleans up text prior to processing.'''
-        textSplit = inputText.lower().strip().split()
+        try:
+            textIterator = iter(texts)
+            chunkStart = 0
+            pending = deque()
+
+            while True:
+
+                # keep the workers fed, but don't read further ahead than we need to
+                while len(pending) < maxChunksInFlight:
+                    chunk = list(islice(textIterator, chunksize))
+                    if len(chunk) == 0:
+                        break
+                    pending.append((chunkStart, executor.submit(analyzeChunk, chunk, analyzeArgs)))
+                    chunkStart += len(chunk)
+
+                if len(pending) == 0:
+                    break
+
+                # wait on the oldest chunk if we need to keep things in order, otherwise on whichever is done first
+                if ordered:
+                    finishedChunks = [pending.popleft()]
+                else:
+                    wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                    finishedChunks = [(start, future) for start, future in pending if future.done()]
+                    pending = deque((start, future) for start, future in pending if not future.done())
+
+                for start, future in finishedChunks:
+                    chunkResults, capturedFreqs, chunkStats = future.result()
+
+                    if len(capturedFreqs) > 0:
+                        self.MergeCaptures(capturedFreqs)
+
+                    if chunkStats is not None:
+                        self.analyzeStats.Merge(chunkStats)
+
+                    for resultIndex, results in enumerate(chunkResults):
+                        yield results if ordered else (start + resultIndex, results)
+
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
-        # handle those little abbreviations
-        for i in range(0, len(textSplit)):
-            if textSplit[i] in self.AbbreviationDict.keys():
-                textSplit[i] = self.AbbreviationDict[textSplit[i]]
+        return
+
+    def __AnalyzeChunk(self, texts, analyzeArgs):
+        """Analyzes a chunk of texts in one of AnalyzeBatch()'s worker threads. Their captures and stats have
+        already gone straight into this ContentCoder, so there are none to send back. Should not be called outside
+        of ContentCoder class."""
+
+        return [self.Analyze(text, **analyzeArgs) for text in texts], {}, None
+
+    def AnalyzeMatrix(self,
+                      texts,
+                      relativeFreq=True,
+                      dropPunct=True,
+                      retainCaptures=False,
+                      wildcardMem=True,
+                      out=None):
+        """Analyzes a sequence of texts and returns the results as a NumPy matrix, along with its column names.
+        Row i of the matrix holds the results for texts[i], and its columns are the same as GetResultsHeader().
+        This skips building a results dict for every text, which adds up when you're coding millions of them.
+
+        If you already have a float64 matrix with the right number of columns (e.g., so that you can code a
+        huge corpus in chunks), pass it as 'out' and it will be filled in place, starting from the first row. The
+        matrix that comes back is then a view of just the rows that were filled, so len() of it tells you how many
+        texts were coded. A ValueError is raised if 'out' has the wrong shape or type, or if there are more texts
+        than it has rows.
+
+        Requires NumPy, which you can install along with contentcoder using: pip install contentcoder[numpy]"""
+
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('AnalyzeMatrix() requires NumPy. You can install it with: '
+                              'pip install contentcoder[numpy]') from None
+
+        columnNames = self.GetResultsHeader()
+
+        if out is None:
+            if not hasattr(texts, '__len__'):
+                texts = list(texts)
+            out = numpy.zeros((len(texts), len(columnNames)), dtype=numpy.float64)
+
+        # checked before anything gets coded, so that a bad 'out' doesn't cost us a partly-coded chunk
+        elif not isinstance(out, numpy.ndarray) or out.ndim != 2 or out.shape[1] != len(columnNames):
+            raise ValueError('AnalyzeMatrix() needs \'out\' to be a 2-dimensional NumPy array with ' +
+                             str(len(columnNames)) + ' columns (one for each of GetResultsHeader()).')
+        elif out.dtype != numpy.float64:
+            raise ValueError('AnalyzeMatrix() needs \'out\' to be a float64 array, not ' + str(out.dtype) + '.')
+        elif hasattr(texts, '__len__') and len(texts) > out.shape[0]:
+            raise ValueError('AnalyzeMatrix() was given ' + str(len(texts)) + ' texts, but \'out\' only has room '
+                             'for ' + str(out.shape[0]) + '.')
+
+        numRows = 0
+        for rowIndex, text in enumerate(texts):
+
+            # we can only find out that there are too many texts in a generator once we get to them
+            if rowIndex >= out.shape[0]:
+                raise ValueError('AnalyzeMatrix() was given more texts than \'out\' has room for (' +
+                                 str(out.shape[0]) + '). The first ' + str(out.shape[0]) + ' have been filled in.')
+
+            rawCounts, relativeCounts, _ = self.__CodeText(inputText=text,
+                                                           dropPunct=dropPunct,
+                                                           retainCaptures=retainCaptures,
+                                                           wildcardMem=wildcardMem)
+
+            if relativeFreq:
+                out[rowIndex] = relativeCounts
+            else:
+                out[rowIndex] = rawCounts
+
+            numRows = rowIndex + 1
+
+        return out[:numRows], columnNames
 
-        text = ' '.join(textSplit)
-        return text
+    def PreprocessText(self, inputText):
+        '''Cleans up text prior to processing.'''
+        return normalizeText(inputText, self.AbbreviationDict)
 
     def AddNumbers(self, resultsRawFreq, resultsRelativeFreq, numberCount, singleWordRelFreqValue):
 
@@ -408,6 +988,37 @@ class ContentCoder:
 
 
 
+# each of AnalyzeBatch()'s worker processes keeps its own ContentCoder here
+_batchWorkerCoder = None
+
+
+def _initBatchWorker(contentCoder):
+    """Runs once in each of AnalyzeBatch()'s worker processes."""
+    global _batchWorkerCoder
+    _batchWorkerCoder = contentCoder
+
+    # forked workers inherit the parent's captured frequencies and stats, which we don't want to send back twice
+    _batchWorkerCoder.captures = CaptureAccumulator()
+    _batchWorkerCoder.analyzeStats = AnalyzeStats()
+
+
+def _analyzeBatchChunk(texts, analyzeArgs):
+    """Analyzes a chunk of texts in one of AnalyzeBatch()'s worker processes. Returns the results along with
+    whatever captured-word frequencies were retained while coding them, and the stats (if we're collecting them)."""
+
+    chunkResults = [_batchWorkerCoder.Analyze(text, **analyzeArgs) for text in texts]
+
+    captures = _batchWorkerCoder.captures
+    _batchWorkerCoder.captures = CaptureAccumulator()
+
+    chunkStats = None
+    if _batchWorkerCoder.collectStats:
+        chunkStats = _batchWorkerCoder.analyzeStats
+        _batchWorkerCoder.analyzeStats = AnalyzeStats()
+
+    return chunkResults, captures, chunkStats
+
+
 # we need this to correctly round
 def normal_round(num, ndigits=0):
     """
@@ -11,22 +11,47 @@ import re
 import os
 import io
 import json
+import hashlib
+import struct
+import uuid
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from itertools import zip_longest
 from .create_export_dir import create_export_dir
+from .WildcardIndex import WildcardIndex, WildcardPhraseIndex, SortedTermIndex
+from .WildcardMemory import WildcardMemory
+from .Vocabulary import Vocabulary
+from .PhraseAutomaton import PhraseAutomaton
+from .CostProfile import profileDictionaryCost, formatCostReport
+from .FlatDictionary import FlatDictionary, FlatTermCatMap, FlatTermSet, buildFlatDictionary, openFlatDictionary
 
 
 containsWildcardRegex = re.compile(r'(?<!\\\\)\*')
 literalAsteriskRegex = re.compile(r'\\\\\\\*')
 
+# compiled dictionaries (see ContentCodingDictionary.Compile()) start with these bytes, followed by
+# the format version as a 2-byte unsigned int and then a flat dictionary. bump the version whenever the saved
+# contents change.
+compiledDictMagic = b'CCDICT'
+compiledDictVersion = 3
+
 class ContentCodingDictionary:
 
     def __init__(self, dicFilename, fileEncoding, fromString=False, dictString=None,
-                 dictFormat=None, abbreviations=None, verbose=True):
+                 dictFormat=None, abbreviations=None, verbose=True, wildcardMemoryCapacity=100000,
+                 flatDictionary=None):
 
         self.abbreviationDict = abbreviations
 
+        # set when we're reading from a (read-only) FlatDictionary instead of holding everything ourselves
+        self.flatDictionary = None
+
+        # one WildcardMemory per n-gram length. 'wildcardMemoryCapacity' is the number of
+        # strings that each one of them can hold (None for no limit).
         self.wildcardMemory = {}
+        self.wildcardMemoryCapacity = wildcardMemoryCapacity
         self.maxWords = -1
         self.numCats = -1
         self.numberOfWildcards = 0
@@ -35,18 +60,63 @@ class ContentCodingDictionary:
         self.catOrder = {}
         self.catNamesHierarchical = {}
 
+        # these are read-only from outside of this class: everything that gets built from them (the token cache, the
+        # wildcard indexes and memories, the phrase index, etc.) only finds out that they've changed through
+        # UpdateCategories() and friends. whoever changes them directly has to call MarkChanged() afterwards.
         self.dictTermCatMap = {}
         self.dictDataStandard = {}
         self.dictDataWildsList = {}
-        self.dictDataWildsRegEx = {}
+        self.dictDataWildsRegEx = WildcardRegExCache()
+
+        # the WildcardIndex for each n-gram length gets built the first time that we need it, and
+        # dropped whenever the wildcard list for that length changes
+        self.wildcardIndex = {}
+
+        # every multi-word entry, indexed by its first word: word -> {numWords: number of entries}. this lets us skip
+        # the n-gram lengths that can't possibly match at a given spot in a text. entries whose first word has a
+        # wildcard in it are also counted by their length, since those are worked out with the wildcardPhraseIndex.
+        self.phraseFirstWords = {}
+        self.phraseWildFirstWordLengths = {}
+
+        # goes up by one every time that the dictionary's contents change, so that anything built from the
+        # dictionary (e.g., ContentCoder's token cache) can tell when it needs to be rebuilt
+        self.revision = 0
+
+        # the interned form of our multi-word literal phrases, built the first time that we need it and
+        # rebuilt whenever the dictionary has changed since then
+        self.vocabulary = None
+        self.vocabularyRevision = None
+        self.phraseAutomaton = None
+        self.phraseAutomatonRevision = None
+
+        # the same goes for the WildcardPhraseIndex that matches multi-word wildcard entries one token at a time
+        self.wildcardPhraseIndex = None
+        self.wildcardPhraseIndexRevision = None
+
+        # used by BulkUpdate() to keep track of the work that we've put off until the update is finished
+        self.bulkUpdateDepth = 0
+        self.bulkUnsortedWildcardLengths = set()
+        self.bulkMaxWordsStale = False
+
+        # what to do if we've been handed a flat dictionary (e.g., one in shared memory) to read from
+        if flatDictionary is not None:
+            self.AttachFlat(flatDictionary, verbose=verbose)
 
         # what to do if we're loading a dictionary from a string
-        if fromString:
+        elif fromString:
             if dictFormat == '2007':
                 self.LoadDictionary2007(dicText=dictString, verbose=verbose)
             elif dictFormat == '2022':
                 self.LoadDictionary2022(dicText=dictString, verbose=verbose)
 
+        # a compiled dictionary has already been parsed and sorted, so we can load it as-is
+        elif dicFilename.endswith('ccd'):
+            self.LoadCompiled(filename=dicFilename, verbose=verbose)
+
+        # a flat dictionary doesn't even need loading. we just map the file into memory and read from it.
+        elif dicFilename.endswith('ccf'):
+            self.AttachFlat(openFlatDictionary(dicFilename), verbose=verbose)
+
         # what to do if we're doing it from a file
         else:
 
@@ -57,10 +127,11 @@ class ContentCodingDictionary:
             elif dicFilename.endswith('dic'):
                 self.LoadDictionary2007(dicText=dictStringRead, verbose=verbose)
             else:
-                print('This dictionary file needs to have one of the appropriate extensions (dic, dicx, csv).')
+                print('This dictionary file needs to have one of the appropriate extensions (dic, dicx, csv, ccd, '
+                      'ccf).')
 
         for numberOfWords in range(self.maxWords, 0, -1):
-            self.wildcardMemory[numberOfWords] = {}
+            self.GetWildcardMemory(numberOfWords)
 
         return
 
@@ -106,27 +177,28 @@ class ContentCodingDictionary:
         self.numCats = len(self.catNames)
 
         # iterate over all of the rows of the dictionary
-        for line in dicBody.splitlines():
+        with self.BulkUpdate():
+            for line in dicBody.splitlines():
 
-            lineSplit = line.strip().split('\t')
+                lineSplit = line.strip().split('\t')
 
-            dicTerm = self.FixAbbreviations(dicTerm=' '.join(lineSplit[0].lower().strip().split()))
+                dicTerm = self.FixAbbreviations(dicTerm=' '.join(lineSplit[0].lower().strip().split()))
 
-            if dicTerm.strip() == '':
-                continue
+                if dicTerm.strip() == '':
+                    continue
 
-            dicCategories = {}
+                dicCategories = {}
 
-            # build the list of categories that we're going to map this word to
-            for i in range(1, len(lineSplit)):
-                entryCatMarker = lineSplit[i].strip()
-                # skip empty entry
-                if entryCatMarker == '':
-                    continue
-                else:
-                    dicCategories[catNameNumberMap[entryCatMarker]] = 1.0
+                # build the list of categories that we're going to map this word to
+                for i in range(1, len(lineSplit)):
+                    entryCatMarker = lineSplit[i].strip()
+                    # skip empty entry
+                    if entryCatMarker == '':
+                        continue
+                    else:
+                        dicCategories[catNameNumberMap[entryCatMarker]] = 1.0
 
-            self.UpdateCategories(dicTerm=dicTerm, newCategories=dicCategories, verbose=False)
+                self.UpdateCategories(dicTerm=dicTerm, newCategories=dicCategories, verbose=False)
 
         if verbose:
             print('Dictionary loaded.')
@@ -149,52 +221,204 @@ class ContentCodingDictionary:
                 self.catNamesHierarchical[self.catNames[i]] = self.catNames[i]
 
         # iterate over all of the rows of the dictionary
-        for line in csvr:
+        with self.BulkUpdate():
+            for line in csvr:
 
-            dicTerm = self.FixAbbreviations(dicTerm=' '.join(line[0].lower().strip().split()))
+                dicTerm = self.FixAbbreviations(dicTerm=' '.join(line[0].lower().strip().split()))
 
-            if dicTerm.strip() == '':
-                continue
+                if dicTerm.strip() == '':
+                    continue
 
-            dicCategories = {}
+                dicCategories = {}
 
-            # build a list of categories and their weights
-            for i in range(0, self.numCats):
+                # build a list of categories and their weights
+                for i in range(0, self.numCats):
+
+                    entryCatMarker = line[i + 1].strip()
+
+                    # purely for debugging:
+                    # if dicTerm == 'to-day':
+                    #    print(self.catNames[i] + ': ' + entryCatMarker)
 
-                entryCatMarker = line[i + 1].strip()
+                    # skip empty entry
+                    if entryCatMarker == '':
+                        continue
+                    else:
+                        if isfloat(entryCatMarker):
+                            termWeight = float(entryCatMarker)
+                            if termWeight == 0:
+                                continue
+                            else:
+                                dicCategories[self.catNames[i]] = termWeight
+                        elif isinteger(entryCatMarker):
+                            termWeight = int(entryCatMarker)
+                            if termWeight == 0:
+                                continue
+                            else:
+                                dicCategories[self.catNames[i]] = termWeight
+                        else:
+                            dicCategories[self.catNames[i]] = int(1)
 
                 # purely for debugging:
                 # if dicTerm == 'to-day':
-                #    print(self.catNames[i] + ': ' + entryCatMarker)
+                #    print(dicCategories)
+                self.UpdateCategories(dicTerm=dicTerm, newCategories=dicCategories, verbose=False)
 
-                # skip empty entry
-                if entryCatMarker == '':
-                    continue
-                else:
-                    if isfloat(entryCatMarker):
-                        termWeight = float(entryCatMarker)
-                        if termWeight == 0:
-                            continue
-                        else:
-                            dicCategories[self.catNames[i]] = termWeight
-                    elif isinteger(entryCatMarker):
-                        termWeight = int(entryCatMarker)
-                        if termWeight == 0:
-                            continue
-                        else:
-                            dicCategories[self.catNames[i]] = termWeight
-                    else:
-                        dicCategories[self.catNames[i]] = int(1)
+        if verbose:
+            print('Dictionary loaded.')
+        return
+
+    def Compile(self, filename='Current Dictionary - Compiled.ccd') -> None:
+        """Saves the currently-loaded dictionary as a compiled, binary file. Compiled dictionaries hold
+        everything that we would otherwise work out while parsing a .dic/.dicx file (the term-to-category
+        map, category order, hierarchical category names, and the wildcards in priority order), so they load
+        faster: about two to three times as fast as parsing the same .dic file. The phrase index is still rebuilt
+        term by term when one is loaded, and the wildcard index is rebuilt as it's needed. Pass the .ccd file to
+        ContentCoder in place of a .dic/.dicx file to use it.
+
+        A compiled dictionary is laid out the same way as a flat dictionary (see FlatDictionary.py): nothing but
+        arrays of numbers and strings, so loading one never runs any code from it. Unlike a flat dictionary, it
+        gets loaded into a regular dictionary that can still be changed. It can only be used on machines with the
+        same byte order as the one that compiled it."""
+
+        create_export_dir(filename)
+        with open(filename, 'wb') as fout:
+            fout.write(compiledDictMagic)
+            fout.write(struct.pack('>H', compiledDictVersion))
+            fout.write(buildFlatDictionary(self))
+
+        print('Dictionary compiled.')
+        return
+
+    def LoadCompiled(self, filename, verbose=True) -> None:
+        """Loads a dictionary that was saved with Compile(). Raises a ValueError if the file isn't a compiled
+        dictionary, was compiled with a different version of contentcoder, or is damaged."""
+
+        with open(filename, 'rb') as fin:
+            compiledBytes = fin.read()
+
+        headerLength = len(compiledDictMagic) + struct.calcsize('>H')
+
+        if compiledBytes[:len(compiledDictMagic)] != compiledDictMagic or len(compiledBytes) < headerLength:
+            raise ValueError('"' + filename + '" is not a compiled dictionary.')
+
+        fileVersion = struct.unpack_from('>H', compiledBytes, len(compiledDictMagic))[0]
+        if fileVersion != compiledDictVersion:
+            raise ValueError('"' + filename + '" was compiled with a different version of contentcoder (format ' +
+                             str(fileVersion) + ', expected ' + str(compiledDictVersion) + '). Please recompile '
+                             'it.')
+
+        try:
+            flatDictionary = FlatDictionary(compiledBytes[headerLength:])
+
+            dictTermCatMap = {}
+            dictDataStandard = {numWords: set() for numWords in flatDictionary.standardCounts.keys()}
+            for termIndex in flatDictionary.TermIndexes():
+                dicTerm = flatDictionary.Term(termIndex)
+                dictTermCatMap[dicTerm] = flatDictionary.Categories(termIndex)
+                if flatDictionary.termIsStandard[termIndex] == 1:
+                    dictDataStandard[flatDictionary.termNumWords[termIndex]].add(dicTerm)
+
+            dictDataWildsList = {numWords: flatDictionary.WildcardList(numWords)
+                                 for numWords in flatDictionary.wildcards.keys()}
+        except (ValueError, KeyError, IndexError, TypeError, struct.error) as error:
+            raise ValueError('"' + filename + '" is damaged and can\'t be loaded (' + str(error) + '). Please '
+                             'recompile it.') from error
+
+        self.maxWords = flatDictionary.maxWords
+        self.numCats = len(flatDictionary.catNames)
+        self.numberOfWildcards = flatDictionary.numberOfWildcards
+        self.catNames = flatDictionary.catNames
+        self.catOrder = flatDictionary.catOrder
+        self.catNamesHierarchical = flatDictionary.catNamesHierarchical
+        self.dictTermCatMap = dictTermCatMap
+        self.dictDataStandard = dictDataStandard
+        self.dictDataWildsList = dictDataWildsList
+        self.wildcardIndex = {}
+        self.flatDictionary = None
+        self.revision += 1
+
+        self.phraseFirstWords = {}
+        self.phraseWildFirstWordLengths = {}
+        for dicTerm in self.dictTermCatMap.keys():
+            self.__UpdatePhraseIndex(dicTerm, change=1)
+
+        if verbose:
+            print('Dictionary loaded.')
+        return
+
+    def ExportFlat(self, filename='Current Dictionary - Flat.ccf') -> None:
+        """Saves the currently-loaded dictionary as a flat dictionary (see FlatDictionary.py). Pass the .ccf file to
+        ContentCoder in place of a .dic/.dicx file to use it. Rather than being loaded, it gets mapped into memory,
+        so any number of processes can read from the same copy of it. Flat dictionaries are read-only, and they
+        can only be used on machines with the same byte order as the one that made them."""
+
+        create_export_dir(filename)
+        with open(filename, 'wb') as fout:
+            fout.write(buildFlatDictionary(self))
+
+        print('Flat dictionary exported.')
+        return
+
+    def ShareFlat(self, name=None):
+        """Puts a flat copy of the currently-loaded dictionary into shared memory and returns the
+        multiprocessing.shared_memory.SharedMemory block that holds it. Other processes can then pass
+        attachFlatDictionary(block.name) to ContentCoder's 'flatDictionary=' argument to read from it without
+        loading a copy of their own. The block stays around until you call its unlink() method."""
+
+        from multiprocessing import shared_memory
+
+        flatBytes = buildFlatDictionary(self)
+
+        if name is None:
+            name = 'contentcoder-' + uuid.uuid4().hex[:16]
 
-            # purely for debugging:
-            # if dicTerm == 'to-day':
-            #    print(dicCategories)
-            self.UpdateCategories(dicTerm=dicTerm, newCategories=dicCategories, verbose=False)
+        sharedMemory = shared_memory.SharedMemory(name=name, create=True, size=len(flatBytes))
+        sharedMemory.buf[:len(flatBytes)] = flatBytes
+
+        return sharedMemory
+
+    def AttachFlat(self, flatDictionary, verbose=True) -> None:
+        """Reads from a FlatDictionary from now on. dictTermCatMap and dictDataStandard become read-only views of
+        it, so the dictionary can no longer be changed."""
+
+        self.flatDictionary = flatDictionary
+
+        self.maxWords = flatDictionary.maxWords
+        self.numCats = len(flatDictionary.catNames)
+        self.numberOfWildcards = flatDictionary.numberOfWildcards
+        self.catNames = flatDictionary.catNames
+        self.catOrder = flatDictionary.catOrder
+        self.catNamesHierarchical = flatDictionary.catNamesHierarchical
+        self.dictTermCatMap = FlatTermCatMap(flatDictionary)
+        self.dictDataStandard = {numWords: FlatTermSet(flatDictionary, numWords)
+                                 for numWords in flatDictionary.standardCounts.keys()}
+        self.dictDataWildsList = {numWords: flatDictionary.WildcardList(numWords)
+                                  for numWords in flatDictionary.wildcards.keys()}
+        self.wildcardIndex = {}
+        self.revision += 1
+
+        # the multi-word entries are the only ones that we need to know about up front
+        self.phraseFirstWords = {}
+        self.phraseWildFirstWordLengths = {}
+        for termIndex in flatDictionary.TermIndexes():
+            if flatDictionary.termNumWords[termIndex] > 1:
+                self.__UpdatePhraseIndex(flatDictionary.Term(termIndex), change=1)
 
         if verbose:
             print('Dictionary loaded.')
         return
 
+    def __IsReadOnly(self) -> bool:
+        """Should not be called outside of ContentCodingDictionary class."""
+
+        if self.flatDictionary is not None:
+            print('This dictionary is being read from a flat dictionary, which can\'t be changed. No action has been'
+                  ' taken.')
+            return True
+
+        return False
+
     def ExportDict2007Format(self, dicOutFilename='Current Dictionary - 2007 Format.dic', fileEncoding='utf-8',
                              separateDicts=False, separateDictsFolder='Current Dictionary - Separate Dicts/'):
         """Exports a copy of the currently-loaded dictionary into 2007/2015 format.
@@ -204,8 +428,10 @@ class ContentCodingDictionary:
 
         create_export_dir(dicOutFilename)
 
+        dicTerms = self.GetSortedTermList(list(self.dictTermCatMap.keys()))
+
         with open(dicOutFilename, 'w', encoding=fileEncoding, newline='') as fout:
-            fout.write(self.DictToString2007())
+            self.WriteDict2007(fout, dicTerms=dicTerms)
 
         dictCounter = 0
 
@@ -224,18 +450,10 @@ class ContentCodingDictionary:
                     fout.write(str(dictCounter) + '\t' + dictCat)
                     fout.write('\r\n%')
 
-                    dicTerms = self.GetSortedTermList(list(self.dictTermCatMap.keys()))
-
-                    dicTermsForCat = set([])
-                    for dicTerm in dicTerms:
-
-                        if dictCat in self.dictTermCatMap[dicTerm].keys():
-                            dicTermsForCat.add(dicTerm)
-
-                    dicTermsForCat = self.GetSortedTermList(list(dicTermsForCat))
-
-                    for term in dicTermsForCat:
-                        fout.write('\r\n' + term + '\t' + str(dictCounter))
+                    # the terms are already in order, so the ones in this category are, too
+                    for term in dicTerms:
+                        if dictCat in self.dictTermCatMap[term]:
+                            fout.write('\r\n' + term + '\t' + str(dictCounter))
 
         print('Dictionary exported to LIWC2007 format.')
 
@@ -246,7 +464,7 @@ class ContentCodingDictionary:
 
         create_export_dir(dicOutFilename)
         with open(dicOutFilename, 'w', encoding=fileEncoding, newline='') as fout:
-            fout.write(self.DictToString2022(useHierarchicalCatNames, omitCategories))
+            self.WriteDict2022(fout, useHierarchicalCatNames, omitCategories)
 
         print('Dictionary exported to LIWC-22 format.')
 
@@ -273,34 +491,35 @@ class ContentCodingDictionary:
                 existingCatNames = set([])
                 existingCatNames.add(catName)
 
-                for dicTerm in self.dictTermCatMap.keys():
-                    if catName in self.dictTermCatMap[dicTerm].keys():
+                with singleDict.BulkUpdate():
+                    for dicTerm in self.dictTermCatMap.keys():
+                        if catName in self.dictTermCatMap[dicTerm].keys():
 
-                        catNameForIndividualTerm = dicTerm
+                            catNameForIndividualTerm = dicTerm
 
-                        if friendlyVarNames:
-                            catNameForIndividualTerm = re.sub("[^0-9a-zA-Z]", "_", dicTerm)
+                            if friendlyVarNames:
+                                catNameForIndividualTerm = re.sub("[^0-9a-zA-Z]", "_", dicTerm)
 
-                        if (catNameForIndividualTerm in existingCatNames):
-                            catNameAddition = 1
-                            tempCatName = catNameForIndividualTerm + '_' + str(catNameAddition)
-                            while tempCatName in existingCatNames:
-                                catNameAddition += 1
+                            if (catNameForIndividualTerm in existingCatNames):
+                                catNameAddition = 1
                                 tempCatName = catNameForIndividualTerm + '_' + str(catNameAddition)
-                            catNameForIndividualTerm = tempCatName
+                                while tempCatName in existingCatNames:
+                                    catNameAddition += 1
+                                    tempCatName = catNameForIndividualTerm + '_' + str(catNameAddition)
+                                catNameForIndividualTerm = tempCatName
 
-                        existingCatNames.add(catNameForIndividualTerm)
+                            existingCatNames.add(catNameForIndividualTerm)
 
-                        catWeights = {catName: 1.0,
-                                      catNameForIndividualTerm: 1.0}
+                            catWeights = {catName: 1.0,
+                                          catNameForIndividualTerm: 1.0}
 
-                        singleDict.UpdateCategories(dicTerm, catWeights, False)
+                            singleDict.UpdateCategories(dicTerm, catWeights, False)
 
                 singleDictFilename = str(dictCounter).zfill(3) + '_' + catName + '.dicx'
                 singleDictFilename = os.path.join(separateDictsFolder, singleDictFilename)
 
                 with open(singleDictFilename, 'w', encoding=fileEncoding, newline='') as fout:
-                    fout.write(singleDict.DictToString2022(useHierarchicalCatNames=False, omitCategories=[]))
+                    singleDict.WriteDict2022(fout, useHierarchicalCatNames=False, omitCategories=[])
 
                 dictCounter += 1
 
@@ -310,7 +529,7 @@ class ContentCodingDictionary:
         """Exports the category mapping as a JSON file."""
         create_export_dir(dicOutFilename)
         with open(dicOutFilename, 'w', encoding=fileEncoding) as fout:
-            json.dump(self.dictTermCatMap, fout, ensure_ascii=False, indent=indent)
+            self.WriteDictJSON(fout, indent=indent)
 
         print('Exported dictionary as JSON.')
         return
@@ -339,35 +558,49 @@ class ContentCodingDictionary:
     def DictToString2007(self, ) -> str:
         """Returns a copy of the currently-loaded dictionary as a string."""
 
-        dictString = ''
+        dictString = io.StringIO()
+        self.WriteDict2007(dictString)
+
+        return dictString.getvalue()
+
+    def WriteDict2007(self, fout, dicTerms=None) -> None:
+        """Writes the currently-loaded dictionary in 2007/2015 format to fout (anything with a write() method,
+        e.g., an open file), one line at a time. dicTerms is the list of terms to write, already in the order of
+        GetSortedTermList(); it defaults to all of them."""
 
-        dictString += '%\r\n'
+        fout.write('%\r\n')
         for cat in self.catNames:
-            dictString += str(self.catOrder[cat] + 1) + '\t' + cat + '\r\n'
-        dictString += '%'
+            fout.write(str(self.catOrder[cat] + 1) + '\t' + cat + '\r\n')
+        fout.write('%')
 
-        dicTerms = self.GetSortedTermList(list(self.dictTermCatMap.keys()))
+        if dicTerms is None:
+            dicTerms = self.GetSortedTermList(list(self.dictTermCatMap.keys()))
 
         for dicTerm in dicTerms:
 
-            lineToWrite = '\r\n' + dicTerm
             catsForTerm = []
 
             for mappedCat in self.dictTermCatMap[dicTerm].keys():
                 catsForTerm.append(self.catOrder[mappedCat] + 1)
 
             catsForTerm.sort()
-            lineToWrite += '\t' + '\t'.join(str(item) for item in catsForTerm)
-            dictString += lineToWrite
+            fout.write('\r\n' + dicTerm + '\t' + '\t'.join(str(item) for item in catsForTerm))
 
-        return dictString
+        return
 
     def DictToString2022(self, useHierarchicalCatNames=False, omitCategories=[]) -> str:
         """Returns a copy of the currently-loaded dictionary as a string."""
 
         dictString = io.StringIO()
+        self.WriteDict2022(dictString, useHierarchicalCatNames, omitCategories)
+
+        return dictString.getvalue()
+
+    def WriteDict2022(self, fout, useHierarchicalCatNames=False, omitCategories=[]) -> None:
+        """Writes the currently-loaded dictionary in LIWC-22 format to fout (anything with a write() method,
+        e.g., an open file), one row at a time."""
 
-        csvWriter = csv.writer(dictString)
+        csvWriter = csv.writer(fout)
         header = ["DicTerm"]
         catsToOmit = set(omitCategories)
 
@@ -390,13 +623,12 @@ class ContentCodingDictionary:
 
         csvWriter.writerow(header)
 
-        dicTerms = self.GetSortedTermList(list(self.dictTermCatMap.keys()))
-
+        # first, see if we're working with a weighted dictionary or not. this stops at the first weight that
+        # isn't 1, and doesn't need the terms to be in any particular order.
         weightedDict = False
-        # first, see if we're working with a weighted dictionary or not
-        for dicTerm in dicTerms:
-            for cat in self.dictTermCatMap[dicTerm].keys():
-                if self.dictTermCatMap[dicTerm][cat] != 1:
+        for catWeights in self.dictTermCatMap.values():
+            for catWeight in catWeights.values():
+                if catWeight != 1:
                     weightedDict = True
                     break
 
@@ -404,7 +636,7 @@ class ContentCodingDictionary:
                 break
 
         # now, we actually go and write it out
-        for dicTerm in dicTerms:
+        for dicTerm in self.GetSortedTermList(list(self.dictTermCatMap.keys())):
 
             lineToWrite = [''] * (self.numCats + 1)
             lineToWrite[0] = dicTerm
@@ -423,7 +655,33 @@ class ContentCodingDictionary:
 
             csvWriter.writerow(lineToWrite)
 
-        return dictString.getvalue()
+        return
+
+    def WriteDictJSON(self, fout, indent=4) -> None:
+        """Writes the category mapping ({dicTerm: {category: weight}}) as JSON to fout (anything with a write()
+        method, e.g., an open file), one term at a time. The output is the same as json.dump() would give."""
+
+        jsonEncoder = json.JSONEncoder(ensure_ascii=False, indent=indent)
+
+        # with an indent, every entry starts on a new line and the closing brace gets one of its own
+        itemSeparator = ', ' if indent is None else ','
+        closingBrace = '}' if indent is None else '\n}'
+
+        numTermsWritten = 0
+        for dicTerm, catWeights in self.dictTermCatMap.items():
+
+            # encoding each term as a dict of its own gives us the entry exactly as it would appear in the whole
+            # thing, wrapped in a pair of braces (and, with an indent, a trailing line break) that we trim off
+            termString = jsonEncoder.encode({dicTerm: dict(catWeights)})[1:-1]
+            if indent is not None:
+                termString = termString[:-1]
+
+            fout.write(('{' if numTermsWritten == 0 else itemSeparator) + termString)
+            numTermsWritten += 1
+
+        fout.write('{}' if numTermsWritten == 0 else closingBrace)
+
+        return
 
     def ExportDictPosterFormat(self, dicOutFilename, fileEncoding):
         """Exports a copy of the currently-loaded dictionary as a 'poster' formatted spreadsheet."""
@@ -440,59 +698,96 @@ class ContentCodingDictionary:
             for cat in self.dictTermCatMap[dicTerm]:
                 posterArrays[self.catOrder[cat]].append(dicTerm)
 
-        rotatedList = list(map(list, zip_longest(*posterArrays, fillvalue=None)))
-
+        # each row takes one term from every category's column, so we can write them out as we go rather than
+        # turning the whole thing on its side first
         with open(dicOutFilename, 'w', encoding=fileEncoding, newline='') as fout:
             csvWriter = csv.writer(fout)
-            for row in rotatedList:
+            for row in zip_longest(*posterArrays, fillvalue=None):
                 csvWriter.writerow(row)
 
         print('Dictionary exported to poster format.')
 
-    def ExportAsteriskOverlaps(self, filename, fileEncoding='utf-8-sig'):
+    def ExportAsteriskOverlaps(self, filename, fileEncoding='utf-8-sig', workers=1, chunksize=64):
         """Exports a list of all terms in the currently-loaded dictionary that overlap
         with other terms. For example, if your dictionary has both 'think' and 'think*'
-        then there is a conceptual overlap."""
+        then there is a conceptual overlap.
+
+        Each wildcard's overlaps are found through a SortedTermIndex, so only the terms that start (or end) the
+        right way get tested, and the rows are written out as they're found. With workers > 1, the wildcards
+        are split into chunks of 'chunksize' and handed out to that many worker processes. The rows come out the
+        same (and in the same order) either way."""
 
         create_export_dir(filename)
 
         print('Checking for asterisk overlaps...')
 
+        listOfDicTerms = self.GetSortedTermList(list(self.dictTermCatMap.keys()))
+        listOfDicTermsWild = [dicTerm for dicTerm in listOfDicTerms if containsWildcard(dicTerm)]
+
         with open(filename, 'w', encoding=fileEncoding, newline='') as fout:
             csvw = csv.writer(fout)
             csvw.writerow(['Wildcard', 'WildcardCats', 'Overlaps', 'OverlapCats', 'OverlapUniqueCats'])
 
-            listOfDicTerms = self.GetSortedTermList(list(self.dictTermCatMap.keys()))
-            listOfDicTermsWild = [dicTerm for dicTerm in listOfDicTerms if containsWildcard(dicTerm)]
+            for dicTerm, overlapPositions in self.__FindAsteriskOverlaps(listOfDicTerms, listOfDicTermsWild,
+                                                                         workers, chunksize):
+                for overlapPosition in overlapPositions:
+                    wordCompare = listOfDicTerms[overlapPosition]
 
-            for dicTerm in listOfDicTermsWild:
-                regWord = compileWildcard(dicTerm)
+                    # get a list of all categories covered by these terms
+                    wildcardCats = set(list(self.dictTermCatMap[dicTerm].keys()))
+                    overlapCats = set(list(self.dictTermCatMap[wordCompare].keys()))
+                    overlapUniqueCats = set([])
 
-                for wordCompare in listOfDicTerms:
-                    if wordCompare == dicTerm:
-                        continue
+                    for cat in list(self.dictTermCatMap[wordCompare].keys()):
+                        if cat not in wildcardCats:
+                            overlapUniqueCats.add(cat)
 
-                    if (dicTerm.replace('*', '') == wordCompare) or (bool(regWord.search(wordCompare)) == True):
+                    csvw.writerow([dicTerm,
+                                   ', '.join(list(wildcardCats)),
+                                   wordCompare,
+                                   ', '.join(list(overlapCats)),
+                                   ', '.join(list(overlapUniqueCats))])
 
-                        wildcardCats = set([])
-                        overlapCats = set([])
-                        overlapUniqueCats = set([])
+        print('Asterisk overlaps exported.')
 
-                        # get a list of all categories covered by these terms
-                        wildcardCats = set(list(self.dictTermCatMap[dicTerm].keys()))
-                        overlapCats = set(list(self.dictTermCatMap[wordCompare].keys()))
+        return
 
-                        for cat in list(self.dictTermCatMap[wordCompare].keys()):
-                            if cat not in wildcardCats:
-                                overlapUniqueCats.add(cat)
+    def __FindAsteriskOverlaps(self, listOfDicTerms, listOfDicTermsWild, workers, chunksize):
+        """Yields (wildcard, positions of the terms in listOfDicTerms that it overlaps with) for each of
+        listOfDicTermsWild, in order. Should not be called outside of ContentCodingDictionary class."""
 
-                        csvw.writerow([dicTerm,
-                                       ', '.join(list(wildcardCats)),
-                                       wordCompare,
-                                       ', '.join(list(overlapCats)),
-                                       ', '.join(list(overlapUniqueCats))])
+        if workers is None:
+            workers = os.cpu_count() or 1
 
-        print('Asterisk overlaps exported.')
+        if workers <= 1 or len(listOfDicTermsWild) <= chunksize:
+            termIndex = SortedTermIndex(listOfDicTerms)
+            termPositions = {dicTerm: position for position, dicTerm in enumerate(listOfDicTerms)}
+            for dicTerm in listOfDicTermsWild:
+                yield dicTerm, findAsteriskOverlaps(termIndex, termPositions, dicTerm)
+            return
+
+        # the categories get written out here rather than in the workers, so that they come out in the same order
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initOverlapWorker,
+                                 initargs=(listOfDicTerms,)) as executor:
+            pending = deque()
+            chunkStarts = iter(range(0, len(listOfDicTermsWild), chunksize))
+
+            while True:
+
+                # keep the workers fed, but don't let the finished chunks pile up
+                while len(pending) < workers * 4:
+                    chunkStart = next(chunkStarts, None)
+                    if chunkStart is None:
+                        break
+                    chunk = listOfDicTermsWild[chunkStart:chunkStart + chunksize]
+                    pending.append((chunk, executor.submit(_findOverlapChunk, chunk)))
+
+                if len(pending) == 0:
+                    break
+
+                chunk, future = pending.popleft()
+                for dicTerm, overlapPositions in zip(chunk, future.result()):
+                    yield dicTerm, overlapPositions
 
         return
 
@@ -502,12 +797,17 @@ class ContentCodingDictionary:
         assigned to. That is, this function will remove the dicTerm from any category not listed in newCategories.
         Right now, this will only assign weights of 1.0. This should be updated later to allow for more flexibility."""
 
+        if self.__IsReadOnly():
+            return
+
         dicTermClean = ' '.join(dicTerm.strip().split())
 
         if dicTermClean == '':
             if verbose: print('Your dictionary term parameter is an empty string. No action has been taken.')
             return
 
+        self.revision += 1
+
         numWords = len(dicTermClean.strip().split())
         if numWords > self.maxWords: self.maxWords = numWords
 
@@ -523,21 +823,24 @@ class ContentCodingDictionary:
         if len(newCategories.keys()) == 0:
             if dicTermClean in self.dictTermCatMap.keys():
                 self.dictTermCatMap.pop(dicTermClean)
+                self.__UpdatePhraseIndex(dicTermClean, change=-1)
 
                 # if it's a wildcard term, we need to remove it from a couple of places
                 if dicTermWild:
-                    self.dictDataWildsRegEx.pop(dicTermClean)
+                    self.dictDataWildsRegEx.pop(dicTermClean, None)
                     self.dictDataWildsList[numWords].remove(dicTermClean)
+                    self.__WildcardsChanged(numWords)
                     self.numberOfWildcards = self.numberOfWildcards - 1
                 # if it's a regular term, then we can drop it from the one place it's in
                 else:
                     self.dictDataStandard[numWords].remove(dicTermClean)
 
-            # we have to make sure to update the max words if we're removing stuff
-            self.maxWords = -1
-            for entry in self.dictTermCatMap.keys():
-                wordLen = len(entry.strip().split())
-                if wordLen > self.maxWords: self.maxWords = wordLen
+            # we have to make sure to update the max words if we're removing stuff. only the longest
+            # terms can change it, and during a bulk update we leave it until the very end.
+            if self.bulkUpdateDepth > 0:
+                self.bulkMaxWordsStale = True
+            elif numWords >= self.maxWords:
+                self.__RecomputeMaxWords()
 
             if verbose: print('Removed "' + dicTermClean + '" from the dictionary.')
             return
@@ -549,8 +852,13 @@ class ContentCodingDictionary:
             addedToCategories = []
             unchangedCategories = []
 
-            if dicTermClean not in self.dictTermCatMap.keys():
+            # a wildcard term is in self.dictDataWildsList from the moment that it gets its first category
+            # until it's removed, so this tells us whether it's already in there without searching the list
+            inWildsList = dicTermClean in self.dictTermCatMap
+
+            if not inWildsList:
                 self.dictTermCatMap[dicTermClean] = {}
+                self.__UpdatePhraseIndex(dicTermClean, change=1)
                 if dicTermWild: self.numberOfWildcards += 1
 
             currentCats = list(self.dictTermCatMap[dicTermClean].keys())
@@ -575,16 +883,17 @@ class ContentCodingDictionary:
 
                     # if they're trying to add the term to a category that doesn't exist,
                     # we have got to add that category.
-                    if cat not in self.catNames:
+                    if cat not in self.catOrder:
                         if verbose: print('The category "' + cat + '" is not in the current dictionary.'
                                                                    ' Adding category...')
                         self.catNames.append(cat)
                         self.catOrder[cat] = len(self.catOrder.keys())
                         self.numCats += 1
 
-                    if (dicTermWild) and (dicTermClean not in self.dictDataWildsList[numWords]):
+                    if (dicTermWild) and (not inWildsList):
+                        # the regex for this term gets compiled the first time that we need it
                         self.dictDataWildsList[numWords].append(dicTermClean)
-                        self.dictDataWildsRegEx[dicTermClean] = compileWildcard(dicTermClean)
+                        inWildsList = True
 
                     elif (dicTermClean not in self.dictDataStandard[numWords]):
                         # since we have already established that this contains NO wildcards,
@@ -595,7 +904,11 @@ class ContentCodingDictionary:
                     self.dictTermCatMap[dicTermClean][cat] = newCategories[cat]
 
             if dicTermWild:
-                self.SortWildcardList_numWords(numWords)
+                if self.bulkUpdateDepth > 0:
+                    self.bulkUnsortedWildcardLengths.add(numWords)
+                    self.__WildcardsChanged(numWords)
+                else:
+                    self.SortWildcardList_numWords(numWords)
 
         if verbose:
             print('Your categories have been updated for "' + dicTermClean + '": ')
@@ -605,12 +918,161 @@ class ContentCodingDictionary:
 
         return
 
+    @contextmanager
+    def BulkUpdate(self):
+        """Lets you make lots of calls to UpdateCategories() without paying to re-sort the wildcard list or
+        recompute self.maxWords after every single one of them. Use it as a context manager:
+
+            with dictionary.BulkUpdate():
+                for dicTerm in newTerms:
+                    dictionary.UpdateCategories(dicTerm, newTerms[dicTerm], verbose=False)
+
+        Everything is put back in order once the outermost 'with' block is finished. Until then, the
+        dictionary should not be used to code any text."""
+
+        self.bulkUpdateDepth += 1
+
+        try:
+            yield self
+        finally:
+            self.bulkUpdateDepth -= 1
+            if self.bulkUpdateDepth == 0:
+                self.__FinishBulkUpdate()
+
+        return
+
+    def UpdateCategoriesBulk(self, termCategories, verbose=False):
+        """Same as calling UpdateCategories() for each (dicTerm, newCategories) pair in termCategories (or for each
+        item, if termCategories is a dict), but inside of a single BulkUpdate()."""
+
+        if isinstance(termCategories, dict):
+            termCategories = termCategories.items()
+
+        with self.BulkUpdate():
+            for dicTerm, newCategories in termCategories:
+                self.UpdateCategories(dicTerm=dicTerm, newCategories=newCategories, verbose=verbose)
+
+        return
+
+    def __FinishBulkUpdate(self) -> None:
+        """Does all of the work that UpdateCategories() put off during a BulkUpdate(). Should not be called outside
+        of ContentCodingDictionary class."""
+
+        for numWords in sorted(self.bulkUnsortedWildcardLengths):
+            self.SortWildcardList_numWords(numWords)
+        self.bulkUnsortedWildcardLengths.clear()
+
+        if self.bulkMaxWordsStale:
+            self.__RecomputeMaxWords()
+            self.bulkMaxWordsStale = False
+
+        return
+
+    def MarkChanged(self) -> None:
+        """Throws away everything that has been worked out from dictTermCatMap, dictDataStandard, and
+        dictDataWildsList (the wildcard indexes and memories, the phrase index, maxWords, and every ContentCoder's
+        token cache). Those attributes should only be changed through UpdateCategories() and the like, which takes
+        care of this as it goes, but if you do change them yourself, call this once you're done."""
+
+        if self.__IsReadOnly():
+            return
+
+        self.__RecomputeMaxWords()
+        self.numberOfWildcards = sum([len(wildcardList) for wildcardList in self.dictDataWildsList.values()])
+
+        self.phraseFirstWords = {}
+        self.phraseWildFirstWordLengths = {}
+        for dicTerm in self.dictTermCatMap.keys():
+            self.__UpdatePhraseIndex(dicTerm, change=1)
+
+        for numWords in set(self.dictDataWildsList.keys()) | set(self.wildcardIndex.keys()) | \
+                set(self.wildcardMemory.keys()):
+            self.__WildcardsChanged(numWords)
+
+        self.revision += 1
+
+        return
+
+    def PhraseLengthsStartingWith(self, word) -> tuple:
+        """Returns the lengths of the multi-word entries that could match a phrase starting with word, longest
+        first. A word with a space in it (e.g., a phone number) can stand in for several words of an entry,
+        so it gets every length."""
+
+        if ' ' in word:
+            numWordsList = self.dictDataStandard.keys()
+        else:
+            numWordsList = set(self.phraseFirstWords.get(word, {}).keys())
+            numWordsList.update(self.phraseWildFirstWordLengths.keys())
+
+        return tuple(sorted([numWords for numWords in numWordsList
+                             if 1 < numWords <= self.maxWords and numWords in self.dictDataStandard], reverse=True))
+
+    def PhraseLengthsRuledOut(self, word) -> frozenset:
+        """Returns the lengths, out of PhraseLengthsStartingWith(word), whose only candidates are wildcard entries
+        with a first word that can't match word. This only holds for a phrase where none of the words has a space
+        in it: a later word with a space (e.g., a phone number) shifts the words of the joined phrase around, so
+        an entry's first word can end up matching something other than word. Callers have to check for that."""
+
+        if ' ' in word or len(self.phraseWildFirstWordLengths) == 0:
+            return frozenset()
+
+        literalLengths = self.phraseFirstWords.get(word, {})
+        wildcardPhraseIndex = self.GetWildcardPhraseIndex()
+
+        return frozenset([numWords for numWords in self.phraseWildFirstWordLengths.keys()
+                          if numWords not in literalLengths and not wildcardPhraseIndex.CanStart(word, numWords)])
+
+    def __UpdatePhraseIndex(self, dicTerm, change) -> None:
+        """Adds (change=1) or removes (change=-1) a term in the first-word index of multi-word entries. Should not
+        be called outside of ContentCodingDictionary class."""
+
+        dicTermSplit = dicTerm.split(' ')
+        numWords = len(dicTermSplit)
+
+        if numWords < 2:
+            return
+
+        # every entry is filed under its first word as it's written, since that's what a literal match needs (and
+        # an entry with an escaped asterisk can be both). the first word of a wildcard entry is only an exact match
+        # for the first token if it has no asterisks at all, so the others are counted by their length, too.
+        self.__CountPhraseLength(self.phraseFirstWords.setdefault(dicTermSplit[0], {}), numWords, change)
+        if len(self.phraseFirstWords[dicTermSplit[0]]) == 0:
+            self.phraseFirstWords.pop(dicTermSplit[0])
+
+        if containsWildcard(dicTerm) and '*' in dicTermSplit[0]:
+            self.__CountPhraseLength(self.phraseWildFirstWordLengths, numWords, change)
+
+        return
+
+    def __CountPhraseLength(self, lengthCounts, numWords, change) -> None:
+        """Should not be called outside of ContentCodingDictionary class."""
+
+        lengthCounts[numWords] = lengthCounts.get(numWords, 0) + change
+
+        if lengthCounts[numWords] <= 0:
+            lengthCounts.pop(numWords)
+
+        return
+
+    def __RecomputeMaxWords(self) -> None:
+        """Should not be called outside of ContentCodingDictionary class."""
+
+        self.maxWords = -1
+        for entry in self.dictTermCatMap.keys():
+            wordLen = len(entry.strip().split())
+            if wordLen > self.maxWords: self.maxWords = wordLen
+
+        return
+
     def ImposeHierarchy(self, hierarchy, verbose=False, updateHierarchicalCatNames=False):
         '''This function will take lower-level categories and make sure that they
         are cross-categorized into higher-level categories. Note that this function
         does *not* remove dictionary terms from categories that are not specified
         in the hierarchy provided by users (as would be done with UpdateCategories()).'''
 
+        if self.__IsReadOnly():
+            return
+
         hierarchyClean = hierarchy.strip().split('/')
         hierarchyClean = [cat.strip() for cat in hierarchyClean]
         hierarchyClean.reverse()
@@ -626,6 +1088,8 @@ class ContentCodingDictionary:
             print('\tYour hierarchy needs at least 2 levels to be imposed.')
             return
 
+        self.revision += 1
+
         if updateHierarchicalCatNames == True:
             tempHierarchyForward = hierarchyClean.copy()
             tempHierarchyForward.reverse()
@@ -657,9 +1121,14 @@ class ContentCodingDictionary:
         Takes a python dictionary as input, where the key is the top-level
         category and the value is a list of *immediately* subordinate categories.'''
 
+        if self.__IsReadOnly():
+            return
+
         topLevelCat = hierarchy.key()
         subordinateCats = set(hierarchy[topLevelCat])
 
+        self.revision += 1
+
         for dicTerm in self.dictTermCatMap.keys():
 
             if exclude_onegrams:
@@ -688,18 +1157,11 @@ class ContentCodingDictionary:
     def GetSortedTermList(self, dicTermList) -> list:
         '''Provides a rule-appropriate list of terms of the dictionary'''
 
-        termList = dicTermList.copy()
-        termList.sort()
+        termList = sorted(dicTermList)
 
-        # relocate words that start with wildcards to the end
-        termListWildcardStarts = []
-
-        for i in range(0, len(termList)):
-            if termList[i].startswith('*'):
-                termListWildcardStarts.append(termList[i])
-
-        for term in termListWildcardStarts:
-            termList.remove(term)
+        # relocate words that start with wildcards to the end, keeping both groups in order
+        termListWildcardStarts = [term for term in termList if term.startswith('*')]
+        termList = [term for term in termList if not term.startswith('*')]
 
         termList.extend(termListWildcardStarts)
 
@@ -762,9 +1224,233 @@ class ContentCodingDictionary:
             sortedDictTerms.extend(sortedDictTerms_wordsBeginningWithWilds)
 
             self.dictDataWildsList[numWords] = sortedDictTerms
+            self.__WildcardsChanged(numWords)
+
+        return
+
+    def __WildcardsChanged(self, numWords) -> None:
+        """Drops everything that we've worked out from the wildcard list for this n-gram length, since it may
+        no longer be correct. Should not be called outside of ContentCodingDictionary class."""
+
+        self.wildcardIndex.pop(numWords, None)
+
+        # a wildcard list can be re-sorted without any of its entries changing, which still changes their priorities
+        self.revision += 1
+
+        if numWords in self.wildcardMemory:
+            self.wildcardMemory[numWords].Clear()
 
         return
 
+    def GetVocabulary(self) -> Vocabulary:
+        """Returns the Vocabulary for this dictionary's multi-word literal phrases, building it if it doesn't
+        exist yet or if the dictionary has changed since it was built."""
+
+        if self.vocabulary is None or self.vocabularyRevision != self.revision:
+            self.vocabulary = Vocabulary(self.dictDataStandard)
+            self.vocabularyRevision = self.revision
+
+        return self.vocabulary
+
+    def GetPhraseAutomaton(self) -> PhraseAutomaton:
+        """Returns the PhraseAutomaton for this dictionary's multi-word literal phrases (as interned by
+        GetVocabulary()), building it if it doesn't exist yet or if the dictionary has changed since it was built."""
+
+        if self.phraseAutomaton is None or self.phraseAutomatonRevision != self.revision:
+            self.phraseAutomaton = PhraseAutomaton(self.GetVocabulary().phrases)
+            self.phraseAutomatonRevision = self.revision
+
+        return self.phraseAutomaton
+
+    def GetWildcardPhraseIndex(self) -> WildcardPhraseIndex:
+        """Returns the WildcardPhraseIndex for this dictionary's multi-word wildcard entries, building it if it
+        doesn't exist yet or if the dictionary has changed since it was built."""
+
+        if self.wildcardPhraseIndex is None or self.wildcardPhraseIndexRevision != self.revision:
+            self.wildcardPhraseIndex = WildcardPhraseIndex(self.dictDataWildsList)
+            self.wildcardPhraseIndexRevision = self.revision
+
+        return self.wildcardPhraseIndex
+
+    def GetWildcardMemory(self, numWords) -> WildcardMemory:
+        """Returns the WildcardMemory for this n-gram length, creating it if it doesn't exist yet."""
+
+        memory = self.wildcardMemory.get(numWords)
+
+        if memory is None:
+            # setdefault() makes sure that two threads getting here at once still end up sharing one memory
+            memory = self.wildcardMemory.setdefault(numWords, WildcardMemory(capacity=self.wildcardMemoryCapacity))
+
+        return memory
+
+    def WildcardMemoryStats(self) -> dict:
+        """Returns the size, capacity, and hit/miss/eviction counts of the wildcard memory for each n-gram
+        length, along with the totals across all lengths. Useful for choosing 'wildcardMemoryCapacity'."""
+
+        stats = {}
+        totals = {'size': 0, 'hits': 0, 'misses': 0, 'evictions': 0}
+
+        for numWords in sorted(self.wildcardMemory.keys()):
+            stats[numWords] = self.wildcardMemory[numWords].Stats()
+            for key in totals.keys():
+                totals[key] += stats[numWords][key]
+
+        lookups = totals['hits'] + totals['misses']
+        totals['hitRate'] = totals['hits'] / lookups if lookups > 0 else 0.0
+        stats['total'] = totals
+
+        return stats
+
+    def CostReport(self, sample=None, top=20) -> dict:
+        """Returns a report on what this dictionary costs to code with: the number of entries of each length, the
+        shapes of its wildcards, how many wildcard patterns a word that matches nothing gets tested against, and the
+        entries that are known to be expensive (or that can never match). Given a sample (what
+        ContentCoder.ProfileDictionary() counted while coding some texts), the report also says how often each
+        entry actually got tested and matched, and how long each wildcard search took."""
+
+        return profileDictionaryCost(self, sample=sample, top=top)
+
+    def ExportCostReport(self, filename='Current Dictionary - Cost Report.txt', sample=None, top=20,
+                         fileEncoding='utf-8') -> dict:
+        """Writes CostReport() to a readable text file, and returns the report."""
+
+        report = self.CostReport(sample=sample, top=top)
+
+        create_export_dir(filename)
+        with open(filename, 'w', encoding=fileEncoding) as fout:
+            fout.write(formatCostReport(report))
+
+        print('Cost report exported.')
+
+        return report
+
+    def Fingerprint(self) -> str:
+        """Returns a hash of the dictionary's contents (categories, terms, weights, and the order in which
+        wildcards are tried). Two dictionaries with the same fingerprint code every text identically."""
+
+        hasher = hashlib.sha256()
+
+        hasher.update(json.dumps(self.catNames, ensure_ascii=False).encode('utf-8'))
+
+        for dicTerm in sorted(self.dictTermCatMap.keys()):
+            catWeights = sorted([cat, repr(float(weight))] for cat, weight in self.dictTermCatMap[dicTerm].items())
+            hasher.update(json.dumps([dicTerm, catWeights], ensure_ascii=False).encode('utf-8'))
+
+        for numWords in sorted(self.dictDataWildsList.keys()):
+            hasher.update(json.dumps([numWords, self.dictDataWildsList[numWords]], ensure_ascii=False).encode('utf-8'))
+
+        return hasher.hexdigest()
+
+    def SaveWildcardMemory(self, filename, fileEncoding='utf-8') -> None:
+        """Saves everything currently held in the wildcard memory (including strings that matched no wildcard)
+        so that it can be reloaded with LoadWildcardMemory() the next time this dictionary is used."""
+
+        memoryOut = {}
+        for numWords in sorted(self.wildcardMemory.keys()):
+            # least recently used first, so that reloading the file keeps the same eviction order
+            memoryOut[str(numWords)] = [[targetString, wildcardEntry] for targetString, wildcardEntry
+                                        in self.wildcardMemory[numWords].Items()]
+
+        create_export_dir(filename)
+
+        # written to a temporary file first and then swapped in, so that a save that gets interrupted never
+        # leaves a half-written file behind for LoadWildcardMemory() to find
+        tempFilename = filename + '.' + uuid.uuid4().hex[:8] + '.tmp'
+        try:
+            with open(tempFilename, 'w', encoding=fileEncoding) as fout:
+                json.dump({'version': 1,
+                           'fingerprint': self.Fingerprint(),
+                           'memory': memoryOut}, fout, ensure_ascii=False)
+            os.replace(tempFilename, filename)
+        finally:
+            if os.path.exists(tempFilename):
+                os.remove(tempFilename)
+
+        return
+
+    def LoadWildcardMemory(self, filename, fileEncoding='utf-8', verbose=True) -> bool:
+        """Loads a wildcard memory that was saved with SaveWildcardMemory(). The file is only used if it was
+        saved from a dictionary with exactly the same contents as this one. Returns True if it was loaded."""
+
+        if not os.path.exists(filename):
+            return False
+
+        try:
+            with open(filename, 'r', encoding=fileEncoding) as fin:
+                memoryIn = json.load(fin)
+
+            if memoryIn.get('version') != 1 or memoryIn.get('fingerprint') != self.Fingerprint():
+                if verbose: print('The wildcard memory in "' + filename + '" was saved from a different dictionary.'
+                                  ' Ignoring it...')
+                return False
+
+            # everything gets read before anything gets remembered, so a damaged file leaves the memory as it was
+            memoryEntries = [(int(numWords), str(targetString), wildcardEntry)
+                             for numWords, entries in memoryIn['memory'].items()
+                             for targetString, wildcardEntry in entries]
+            for numWords, targetString, wildcardEntry in memoryEntries:
+                if wildcardEntry is not None and wildcardEntry not in self.dictTermCatMap:
+                    raise ValueError(wildcardEntry)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            if verbose: print('The wildcard memory in "' + filename + '" is damaged. Ignoring it...')
+            return False
+
+        for numWords, targetString, wildcardEntry in memoryEntries:
+            self.GetWildcardMemory(numWords).Put(targetString, wildcardEntry)
+
+        if verbose: print('Wildcard memory loaded.')
+        return True
+
+    def ClearWildcardMemory(self, resetStats=False) -> None:
+        """Forgets all remembered wildcard matches (and, optionally, the hit/miss/eviction counts)."""
+
+        for memory in self.wildcardMemory.values():
+            memory.Clear()
+            if resetStats:
+                memory.ResetStats()
+
+        return
+
+    def MatchWildcard(self, targetString, numWords):
+        """Returns the highest-priority wildcard entry of length numWords that matches targetString, or None.
+        Uses a WildcardIndex, so it returns exactly what MatchWildcardRegEx() would, only faster."""
+
+        if self.flatDictionary is not None:
+            return self.flatDictionary.MatchWildcard(targetString, numWords)
+
+        index = self.wildcardIndex.get(numWords)
+
+        if index is None:
+            index = WildcardIndex(self.dictDataWildsList.get(numWords, []))
+            self.wildcardIndex[numWords] = index
+
+        return index.Match(targetString)
+
+    def MatchWildcardTokens(self, tokens):
+        """Returns the highest-priority multi-word wildcard entry that matches tokens, or None. Gives the same
+        answer as MatchWildcard(' '.join(tokens), len(tokens)) as long as none of the tokens has a space in it,
+        but never has to build that string."""
+
+        return self.GetWildcardPhraseIndex().Match(tokens)
+
+    def MatchWildcardRegEx(self, targetString, numWords):
+        """Same as MatchWildcard(), but tests every wildcard regex of length numWords in priority order."""
+
+        for wildcardEntry in self.dictDataWildsList.get(numWords, []):
+            if len(self.dictDataWildsRegEx[wildcardEntry].findall(targetString)) > 0:
+                return wildcardEntry
+
+        return None
+
+
+class WildcardRegExCache(dict):
+    """Maps each wildcard entry to its compiled regex, compiling it the first time that it's asked for."""
+
+    def __missing__(self, dicTerm):
+        compiledTerm = compileWildcard(dicTerm)
+        self[dicTerm] = compiledTerm
+        return compiledTerm
+
 
 # used while reading in the dictionary
 # to check for weighted dictionary
@@ -811,4 +1497,38 @@ def compileWildcard(dicTerm):
                               .replace(r'ESCAPEDASTERISKREPLACEMELATER', r'\*')
                               .replace(r'WILDCARDASTERISKREPLACEMELATER', r'.*')
                               + r'$')
-    return compiledTerm
\ No newline at end of file
+    return compiledTerm
+
+
+def findAsteriskOverlaps(termIndex, termPositions, dicTerm):
+    """Returns the positions (in the list that termIndex, a SortedTermIndex, was made from) of every other term
+    that the wildcard dicTerm overlaps with: the terms that it matches, plus the term that it turns into once its
+    asterisks are taken out. termPositions maps each term to its position."""
+
+    overlapPositions = set(termIndex.Matches(dicTerm))
+
+    withoutAsterisks = termPositions.get(dicTerm.replace('*', ''))
+    if withoutAsterisks is not None:
+        overlapPositions.add(withoutAsterisks)
+
+    overlapPositions.discard(termPositions[dicTerm])
+
+    return sorted(overlapPositions)
+
+
+# set up in each of ExportAsteriskOverlaps()'s worker processes by _initOverlapWorker()
+_overlapWorkerIndex = None
+_overlapWorkerPositions = None
+
+
+def _initOverlapWorker(listOfDicTerms):
+    """Runs once in each of ExportAsteriskOverlaps()'s worker processes."""
+    global _overlapWorkerIndex, _overlapWorkerPositions
+    _overlapWorkerIndex = SortedTermIndex(listOfDicTerms)
+    _overlapWorkerPositions = {dicTerm: position for position, dicTerm in enumerate(listOfDicTerms)}
+
+
+def _findOverlapChunk(listOfDicTermsWild):
+    """Finds the overlaps for a chunk of wildcards in one of ExportAsteriskOverlaps()'s worker processes."""
+    return [findAsteriskOverlaps(_overlapWorkerIndex, _overlapWorkerPositions, dicTerm)
+            for dicTerm in listOfDicTermsWild]
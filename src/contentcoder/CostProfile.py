@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Works out how much a dictionary costs to code with, and which of its entries are to blame.
+
+Without a sample corpus, the report is worked out from the dictionary alone: how many entries there are of each
+length, what shapes its wildcards come in, how many wildcard patterns an unmatched word has to be tested against,
+and which entries are known to be expensive. With a sample (what ContentCoder's ProfileDictionary() counted while
+coding some texts with the same code as Analyze()), it also says how often each wildcard entry actually got tested
+and how long the searches take."""
+
+import time
+
+from .WildcardIndex import splitWildcardFragments
+
+# how bad each kind of flagged entry is, so that the worst ones can be listed first
+flagSeverity = {'duplicate pattern': 4,
+                'wildcard first word': 3,
+                'unanchored': 3,
+                'short prefix': 2,
+                'leading wildcard': 1}
+
+flagReasons = {'duplicate pattern': 'has the same pattern as an earlier entry, so it can never match anything',
+               'wildcard first word': 'starts with a wildcard word, so every position of every text has to be '
+                                      'checked for a phrase of this length',
+               'unanchored': 'starts and ends with a wildcard, so it has to be tested against every string',
+               'short prefix': 'has a very short literal prefix, so it matches a large share of all words and '
+                               'hides any later wildcard that would match the same ones',
+               'leading wildcard': 'starts with a wildcard, so strings can only be ruled out by how they end'}
+
+
+def wildcardShape(dicTerm):
+    """Returns the shape of a wildcard entry: 'prefix' ('happ*'), 'leading' ('*ness'), 'infix' ('h*ppy'),
+    'unanchored' ('*app*'), 'any' ('*'), 'multiple' (anything with more than one wildcard that isn't unanchored),
+    or, for multi-word entries, 'phrase, wildcard first word' or 'phrase, wildcard later word'."""
+
+    dicTermSplit = dicTerm.split(' ')
+    if len(dicTermSplit) > 1:
+        if len(splitWildcardFragments(dicTermSplit[0])) > 1:
+            return 'phrase, wildcard first word'
+        return 'phrase, wildcard later word'
+
+    fragments = splitWildcardFragments(dicTerm)
+
+    if len(fragments) == 1:
+        return 'literal'
+    if len(fragments) == 2:
+        if fragments[0] != '' and fragments[1] != '':
+            return 'infix'
+        if fragments[0] != '':
+            return 'prefix'
+        if fragments[1] != '':
+            return 'leading'
+        return 'any'
+    if fragments[0] == '' and fragments[-1] == '':
+        return 'unanchored'
+
+    return 'multiple'
+
+
+def flagEntries(dictionary, shortPrefixLength=2):
+    """Returns a list of (dicTerm, numWords, flag) for the wildcard entries that are known to be expensive (or
+    useless), worst first."""
+
+    flagged = []
+
+    for numWords in sorted(dictionary.dictDataWildsList.keys()):
+        seenPatterns = set()
+
+        for dicTerm in dictionary.dictDataWildsList[numWords]:
+            pattern = tuple(tuple(splitWildcardFragments(word)) for word in dicTerm.split(' '))
+            shape = wildcardShape(dicTerm)
+
+            if pattern in seenPatterns:
+                flagged.append((dicTerm, numWords, 'duplicate pattern'))
+                continue
+            seenPatterns.add(pattern)
+
+            if shape == 'phrase, wildcard first word':
+                flagged.append((dicTerm, numWords, 'wildcard first word'))
+            elif shape in ['unanchored', 'any']:
+                flagged.append((dicTerm, numWords, 'unanchored'))
+            elif shape == 'prefix' and len(pattern[0][0]) <= shortPrefixLength:
+                flagged.append((dicTerm, numWords, 'short prefix'))
+            elif shape == 'leading':
+                flagged.append((dicTerm, numWords, 'leading wildcard'))
+
+    flagged.sort(key=lambda entry: -flagSeverity[entry[2]])
+
+    return flagged
+
+
+def profileDictionaryCost(dictionary, sample=None, top=20, timingSample=2000):
+    """Returns a dict describing what it costs to code with dictionary (a ContentCodingDictionary).
+
+    sample: optionally, the counters from ContentCoder.ProfileDictionary(), which coded some texts with this
+            dictionary. Along with the usual AnalyzeStats counts, they hold scanTally ((numWords, the entry that
+            won or None) -> number of wildcard searches) and scannedStrings (every string searched for -> numWords).
+    top: how many entries to list in each ranking.
+    timingSample: at most this many wildcard searches get timed with each engine."""
+
+    wildsList = dictionary.dictDataWildsList
+
+    wildcardSets = {numWords: set(wildsList[numWords]) for numWords in wildsList.keys()}
+
+    lengths = {}
+    for dicTerm in dictionary.dictTermCatMap.keys():
+        numWords = len(dicTerm.split(' '))
+        lengthCounts = lengths.setdefault(numWords, {'literal': 0, 'wildcard': 0})
+        lengthCounts['wildcard' if dicTerm in wildcardSets.get(numWords, ()) else 'literal'] += 1
+
+    shapes = {}
+    for numWords in wildsList.keys():
+        for dicTerm in wildsList[numWords]:
+            shape = wildcardShape(dicTerm)
+            shapes[shape] = shapes.get(shape, 0) + 1
+
+    # a phrase length with a wildcard first word gets checked at every position, not only after its first words
+    forcedLengths = sorted(set([numWords for numWords in wildsList.keys() if numWords > 1 and
+                                any([len(splitWildcardFragments(dicTerm.split(' ')[0])) > 1
+                                     for dicTerm in wildsList[numWords]])]))
+
+    # a word that matches nothing gets tested against every single-word wildcard, and every phrase that starts
+    # with it against every wildcard of that length. the trie engine still has to test the unanchored ones.
+    attemptsPerUnmatchedToken = len(wildsList.get(1, [])) + sum([len(wildsList[numWords])
+                                                                for numWords in forcedLengths])
+
+    flagged = flagEntries(dictionary)
+    flagCounts = {}
+    for _, _, flag in flagged:
+        flagCounts[flag] = flagCounts.get(flag, 0) + 1
+
+    report = {'terms': len(dictionary.dictTermCatMap),
+              'maxWords': dictionary.maxWords,
+              'lengths': {numWords: lengths[numWords] for numWords in sorted(lengths.keys())},
+              'wildcardShapes': dict(sorted(shapes.items(), key=lambda shape: -shape[1])),
+              'lengthsCheckedEverywhere': forcedLengths,
+              'estimatedRegExAttemptsPerUnmatchedToken': attemptsPerUnmatchedToken,
+              'flagCounts': flagCounts,
+              'flaggedEntries': [{'entry': dicTerm, 'numWords': numWords, 'flag': flag, 'reason': flagReasons[flag]}
+                                 for dicTerm, numWords, flag in flagged[:top]]}
+
+    if sample is not None:
+        report['sample'] = measureSample(dictionary, sample, top, timingSample)
+
+    return report
+
+
+def measureSample(dictionary, sample, top, timingSample):
+    """Works out, from the wildcard searches that ContentCoder counted while coding a sample, how many regex attempts
+    each entry would get with wildcardEngine="regex", and times the searches with each engine. Should not be called
+    outside of profileDictionaryCost()."""
+
+    wildsList = dictionary.dictDataWildsList
+    wildcardPriorities = {numWords: {dicTerm: priority for priority, dicTerm in enumerate(wildsList[numWords])}
+                          for numWords in wildsList.keys()}
+
+    # numWords -> how many searches were won by the entry at each priority, and how many found nothing
+    matchedAt = {numWords: [0] * len(wildsList[numWords]) for numWords in wildsList.keys()}
+    unmatched = dict.fromkeys(wildsList.keys(), 0)
+
+    for (numWords, wildcardEntry), numScans in sample['scanTally'].items():
+        if wildcardEntry is None:
+            unmatched[numWords] += numScans
+        else:
+            matchedAt[numWords][wildcardPriorities[numWords][wildcardEntry]] += numScans
+
+    numTokens = sample['tokens']
+    numWildcardHits = sample['wildcardScanMatches']
+    timingStrings = list(sample['scannedStrings'].items())[:timingSample]
+
+    # with the regex engine, every entry gets tested on every search that isn't won by an earlier entry
+    entryAttempts = []
+    entryMatches = []
+    totalAttempts = 0
+    for numWords in wildsList.keys():
+        stillSearching = unmatched[numWords]
+        for priority in range(len(wildsList[numWords]) - 1, -1, -1):
+            stillSearching += matchedAt[numWords][priority]
+            totalAttempts += stillSearching
+            entryAttempts.append((stillSearching, wildsList[numWords][priority], numWords))
+            if matchedAt[numWords][priority] > 0:
+                entryMatches.append((matchedAt[numWords][priority], wildsList[numWords][priority], numWords))
+
+    entryAttempts.sort(key=lambda entry: -entry[0])
+    entryMatches.sort(key=lambda entry: -entry[0])
+
+    return {'texts': sample['texts'],
+            'tokens': numTokens,
+            'literalHits': sample['literalHits'],
+            'wildcardHits': sample['wildcardHits'],
+            'wildcardScans': sample['wildcardScans'],
+            'distinctStringsScanned': len(sample['scannedStrings']),
+            'wildcardScansPerToken': sample['wildcardScans'] / numTokens if numTokens > 0 else 0.0,
+            'regExAttemptsPerToken': totalAttempts / numTokens if numTokens > 0 else 0.0,
+            'regExAttemptsPerMatch': totalAttempts / numWildcardHits if numWildcardHits > 0 else 0.0,
+            'microsecondsPerScan': {'trie': timeScans(dictionary.MatchWildcard, timingStrings),
+                                    'regex': timeScans(dictionary.MatchWildcardRegEx, timingStrings)},
+            'mostTestedEntries': [{'entry': dicTerm, 'numWords': numWords, 'regExAttempts': attempts}
+                                  for attempts, dicTerm, numWords in entryAttempts[:top]],
+            'mostMatchedEntries': [{'entry': dicTerm, 'numWords': numWords, 'matches': matches}
+                                   for matches, dicTerm, numWords in entryMatches[:top]]}
+
+
+def timeScans(matchWildcard, timingStrings):
+    """Returns the average time, in microseconds, that matchWildcard() takes to search for each of timingStrings.
+    Should not be called outside of profileDictionaryCost()."""
+
+    if len(timingStrings) == 0:
+        return 0.0
+
+    startTime = time.perf_counter()
+    for targetString, numWords in timingStrings:
+        matchWildcard(targetString, numWords)
+
+    return (time.perf_counter() - startTime) / len(timingStrings) * 1e6
+
+
+def formatCostReport(report):
+    """Returns a report from profileDictionaryCost() as readable text."""
+
+    lines = ['Dictionary cost report',
+             '======================',
+             '',
+             'Terms: ' + str(report['terms']) + ' (longest: ' + str(report['maxWords']) + ' words)',
+             '',
+             '%-8s %10s %10s' % ('words', 'literal', 'wildcard')]
+
+    for numWords, lengthCounts in report['lengths'].items():
+        lines.append('%-8d %10d %10d' % (numWords, lengthCounts['literal'], lengthCounts['wildcard']))
+
+    lines.extend(['', 'Wildcard shapes:'])
+    for shape, count in report['wildcardShapes'].items():
+        lines.append('    %-30s %8d' % (shape, count))
+
+    lines.append('')
+    if len(report['lengthsCheckedEverywhere']) > 0:
+        lines.append('Phrase lengths checked at every position: ' +
+                     ', '.join([str(numWords) for numWords in report['lengthsCheckedEverywhere']]))
+    lines.append('Regex attempts for a word that matches nothing: ' +
+                 str(report['estimatedRegExAttemptsPerUnmatchedToken']))
+
+    if len(report['flaggedEntries']) > 0:
+        lines.extend(['', 'Flagged entries (' + ', '.join([flag + ': ' + str(count) for flag, count
+                                                           in report['flagCounts'].items()]) + '):'])
+        for flaggedEntry in report['flaggedEntries']:
+            lines.append('    ' + flaggedEntry['entry'] + ' ... ' + flaggedEntry['reason'])
+
+    if 'sample' in report:
+        sample = report['sample']
+        lines.extend(['',
+                      'Measured on ' + str(sample['texts']) + ' texts (' + str(sample['tokens']) + ' tokens):',
+                      '    literal hits:                %d' % sample['literalHits'],
+                      '    wildcard hits:               %d' % sample['wildcardHits'],
+                      '    wildcard searches per token: %.3f' % sample['wildcardScansPerToken'],
+                      '    distinct strings searched:   %d' % sample['distinctStringsScanned'],
+                      '    regex attempts per token:    %.1f' % sample['regExAttemptsPerToken'],
+                      '    regex attempts per match:    %.1f' % sample['regExAttemptsPerMatch'],
+                      '    microseconds per search:     %.2f (trie), %.2f (regex)' %
+                      (sample['microsecondsPerScan']['trie'], sample['microsecondsPerScan']['regex'])])
+
+        lines.extend(['', 'Entries tested most often (with wildcardEngine="regex"):'])
+        for entry in sample['mostTestedEntries']:
+            lines.append('    %-40s %12d' % (entry['entry'], entry['regExAttempts']))
+
+        lines.extend(['', 'Entries matched most often:'])
+        for entry in sample['mostMatchedEntries']:
+            lines.append('    %-40s %12d' % (entry['entry'], entry['matches']))
+
+    return '\n'.join(lines) + '\n'
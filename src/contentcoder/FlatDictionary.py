@@ -0,0 +1,455 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import json
+import mmap
+import re
+import struct
+import sys
+import threading
+
+from array import array
+from collections.abc import Mapping, Set
+from zlib import crc32
+
+from .WildcardIndex import splitWildcardFragments, fragmentsMatch, fragmentsRegEx
+
+# flat dictionaries start with these bytes, followed by the format version as a 2-byte unsigned int and the length
+# of the JSON metadata as an 8-byte unsigned int. bump the version whenever the layout changes.
+flatDictMagic = b'CCFLAT'
+flatDictVersion = 1
+
+# every array starts on a multiple of this many bytes, so that any of them can be cast in place
+flatDictAlignment = 8
+
+# see attachFlatDictionary()
+_attachLock = threading.Lock()
+
+
+class FlatDictionary:
+    """A read-only dictionary laid out as a handful of flat arrays in one block of memory.
+
+    Nothing in the block is a Python object, so it can live in an mmap'ed file or in multiprocessing.shared_memory
+    and be attached by any number of processes at once. Every process reads the same pages, and since there are no
+    reference counts in there to update, the operating system never has to copy them. Attaching is almost free:
+    the arrays are used in place, through memoryviews.
+
+    Terms are stored as one big blob of UTF-8, and are found through an open-addressing hash table (crc32, with
+    linear probing). Each term's categories and weights sit in three parallel arrays. Single-word wildcards are
+    matched through two more hash tables, one holding the literal prefixes of entries like 'happ*' and the other
+    the literal suffixes of entries like '*ness', which means that matching a word takes two probes per
+    character. Whatever has wildcards at both ends or in the middle is tested in priority order, like everywhere
+    else. The multi-word wildcard entries are read into memory as regular lists, since there are few of them.
+
+    Use buildFlatDictionary() (or ContentCodingDictionary.ExportFlat()/ShareFlat()) to make one, then
+    openFlatDictionary() or attachFlatDictionary() to use it. The arrays use this machine's byte order."""
+
+    def __init__(self, buffer, source=None):
+        """buffer: anything that supports the buffer protocol (bytes, an mmap, SharedMemory.buf, etc.)
+        source: how another process can get at the same block: ('file', filename) or ('sharedMemory', name).
+                This is what gets pickled in place of the block itself. With None, the whole block is pickled."""
+
+        self.buffer = buffer
+        self.source = source
+        self.view = memoryview(buffer).cast('B')
+
+        if bytes(self.view[:len(flatDictMagic)]) != flatDictMagic:
+            raise ValueError('This is not a flat dictionary.')
+
+        fileVersion, metadataLength = struct.unpack_from('<HQ', self.view, len(flatDictMagic))
+        if fileVersion != flatDictVersion:
+            raise ValueError('This flat dictionary was made with a different version of contentcoder (format ' +
+                             str(fileVersion) + ', expected ' + str(flatDictVersion) + '). Please rebuild it.')
+
+        headerLength = len(flatDictMagic) + struct.calcsize('<HQ')
+        metadata = json.loads(bytes(self.view[headerLength:headerLength + metadataLength]).decode('utf-8'))
+
+        if metadata['byteorder'] != sys.byteorder:
+            raise ValueError('This flat dictionary was made on a machine with a different byte order.')
+
+        self.catNames = metadata['catNames']
+        self.catOrder = metadata['catOrder']
+        self.catNamesHierarchical = metadata['catNamesHierarchical']
+        self.maxWords = metadata['maxWords']
+        self.numberOfWildcards = metadata['numberOfWildcards']
+        self.numTerms = metadata['numTerms']
+        self.standardCounts = {int(numWords): count for numWords, count in metadata['standardCounts'].items()}
+
+        # each section is (offset, number of items, typecode) from the start of the block
+        self.sections = {}
+        for sectionName, (offset, numItems, typecode) in metadata['sections'].items():
+            itemSize = struct.calcsize(typecode)
+            if offset + numItems * itemSize > len(self.view):
+                raise ValueError('This flat dictionary has been cut short.')
+            self.sections[sectionName] = self.view[offset:offset + numItems * itemSize].cast(typecode)
+
+        self.terms = self.__StringTable('terms')
+        self.termNumWords = self.sections['termNumWords']
+        self.termIsStandard = self.sections['termIsStandard']
+        self.catStarts = self.sections['catStarts']
+        self.catIndexes = self.sections['catIndexes']
+        self.catWeights = self.sections['catWeights']
+        self.catWeightIsInt = self.sections['catWeightIsInt']
+
+        # numWords -> the term indexes of its wildcard entries, in priority order
+        self.wildcards = {}
+        self.prefixStems = {}
+        self.suffixStems = {}
+        self.otherWildcards = {}
+        for numWords in metadata['wildcardLengths']:
+            self.wildcards[numWords] = self.sections['wildcards' + str(numWords)]
+            self.prefixStems[numWords] = self.__StringTable('prefixStems' + str(numWords))
+            self.suffixStems[numWords] = self.__StringTable('suffixStems' + str(numWords))
+            self.otherWildcards[numWords] = self.sections['otherWildcards' + str(numWords)]
+
+        return
+
+    def __reduce__(self):
+        # the memoryviews can't be pickled, and there would be no point: the other process can attach the block
+        if self.source is not None and self.source[0] == 'file':
+            return openFlatDictionary, (self.source[1],)
+        if self.source is not None and self.source[0] == 'sharedMemory':
+            return attachFlatDictionary, (self.source[1],)
+        return FlatDictionary, (bytes(self.view),)
+
+    def __len__(self):
+        return self.numTerms
+
+    def __StringTable(self, tableName):
+        """Returns the (blob, offsets, values, slots) of a string hash table. Should not be called outside of
+        FlatDictionary class."""
+
+        return (self.sections[tableName + 'Blob'], self.sections[tableName + 'Offsets'],
+                self.sections[tableName + 'Values'], self.sections[tableName + 'Slots'])
+
+    def __Probe(self, stringTable, key):
+        """Returns the value stored for key (UTF-8 bytes) in a string hash table, or -1 if it isn't there. Should
+        not be called outside of FlatDictionary class."""
+
+        blob, offsets, values, slots = stringTable
+
+        mask = len(slots) - 1
+        if mask < 0:
+            return -1
+
+        slot = crc32(key) & mask
+
+        while True:
+            entry = slots[slot]
+            if entry == 0:
+                return -1
+            if blob[offsets[entry - 1]:offsets[entry]] == key:
+                return values[entry - 1]
+            slot = (slot + 1) & mask
+
+    def Lookup(self, dicTerm) -> int:
+        """Returns the index of dicTerm, or -1 if it isn't in the dictionary."""
+        return self.__Probe(self.terms, dicTerm.encode('utf-8'))
+
+    def Term(self, termIndex) -> str:
+        """Returns the term with this index."""
+
+        blob, offsets, _, _ = self.terms
+        return bytes(blob[offsets[termIndex]:offsets[termIndex + 1]]).decode('utf-8')
+
+    def Categories(self, termIndex) -> dict:
+        """Returns the {category: weight} dict for the term with this index, in the same order as the original."""
+
+        categories = {}
+        for position in range(self.catStarts[termIndex], self.catStarts[termIndex + 1]):
+            catWeight = self.catWeights[position]
+            categories[self.catNames[self.catIndexes[position]]] = (int(catWeight) if self.catWeightIsInt[position]
+                                                                    else catWeight)
+
+        return categories
+
+    def IsStandard(self, dicTerm, numWords) -> bool:
+        """Checks whether dicTerm is in ContentCodingDictionary.dictDataStandard[numWords]."""
+
+        termIndex = self.Lookup(dicTerm)
+        return termIndex >= 0 and self.termIsStandard[termIndex] == 1 and self.termNumWords[termIndex] == numWords
+
+    def TermIndexes(self, numWords=None, standardOnly=False):
+        """Yields the index of every term (with numWords words, and/or in dictDataStandard, if asked), in the
+        order that they were added to the dictionary."""
+
+        for termIndex in range(0, self.numTerms):
+            if numWords is not None and self.termNumWords[termIndex] != numWords:
+                continue
+            if standardOnly and self.termIsStandard[termIndex] != 1:
+                continue
+            yield termIndex
+
+    def WildcardList(self, numWords) -> list:
+        """Returns the wildcard entries with numWords words, in priority order."""
+        return [self.Term(termIndex) for termIndex in self.wildcards.get(numWords, ())]
+
+    def MatchWildcard(self, targetString, numWords):
+        """Returns the highest-priority wildcard entry of length numWords that matches targetString, or None.
+        Gives the same answer as WildcardIndex.Match()."""
+
+        wildcards = self.wildcards.get(numWords)
+        if wildcards is None or len(wildcards) == 0:
+            return None
+
+        if '\n' in targetString:
+            for termIndex in wildcards:
+                if self.__Matches(targetString, termIndex):
+                    return self.Term(termIndex)
+            return None
+
+        numEntries = len(wildcards)
+        bestPriority = numEntries
+
+        # every prefix and every suffix of the target that starts or ends on a character boundary. a UTF-8
+        # continuation byte always looks like 10xxxxxx, so those are the places to skip.
+        key = targetString.encode('utf-8')
+        prefixStems = self.prefixStems[numWords]
+        suffixStems = self.suffixStems[numWords]
+
+        for position in range(0, len(key) + 1):
+            if position < len(key) and 0x80 <= key[position] < 0xC0:
+                continue
+
+            priority = self.__Probe(prefixStems, key[:position])
+            if 0 <= priority < bestPriority:
+                bestPriority = priority
+
+            priority = self.__Probe(suffixStems, key[position:])
+            if 0 <= priority < bestPriority:
+                bestPriority = priority
+
+        for priority in self.otherWildcards[numWords]:
+            if priority >= bestPriority:
+                break
+            if self.__Matches(targetString, wildcards[priority]):
+                bestPriority = priority
+                break
+
+        if bestPriority < numEntries:
+            return self.Term(wildcards[bestPriority])
+
+        return None
+
+    def __Matches(self, targetString, termIndex):
+        """Should not be called outside of FlatDictionary class."""
+
+        fragments = splitWildcardFragments(self.Term(termIndex))
+
+        # a wildcard's regex can't match across a line break, and our fragment searches don't know that
+        if '\n' in targetString:
+            return re.match(fragmentsRegEx(fragments), targetString) is not None
+
+        return fragmentsMatch(targetString, fragments)
+
+
+class FlatTermCatMap(Mapping):
+    """A read-only stand-in for ContentCodingDictionary.dictTermCatMap that reads from a FlatDictionary."""
+
+    def __init__(self, flatDictionary):
+        self.flatDictionary = flatDictionary
+
+    def __getitem__(self, dicTerm):
+        termIndex = self.flatDictionary.Lookup(dicTerm)
+        if termIndex < 0:
+            raise KeyError(dicTerm)
+        return self.flatDictionary.Categories(termIndex)
+
+    def __contains__(self, dicTerm):
+        return self.flatDictionary.Lookup(dicTerm) >= 0
+
+    def __iter__(self):
+        for termIndex in self.flatDictionary.TermIndexes():
+            yield self.flatDictionary.Term(termIndex)
+
+    def __len__(self):
+        return len(self.flatDictionary)
+
+
+class FlatTermSet(Set):
+    """A read-only stand-in for one of ContentCodingDictionary.dictDataStandard's sets that reads from a
+    FlatDictionary."""
+
+    def __init__(self, flatDictionary, numWords):
+        self.flatDictionary = flatDictionary
+        self.numWords = numWords
+
+    def __contains__(self, dicTerm):
+        return self.flatDictionary.IsStandard(dicTerm, self.numWords)
+
+    def __iter__(self):
+        for termIndex in self.flatDictionary.TermIndexes(numWords=self.numWords, standardOnly=True):
+            yield self.flatDictionary.Term(termIndex)
+
+    def __len__(self):
+        return self.flatDictionary.standardCounts.get(self.numWords, 0)
+
+
+def buildFlatDictionary(dictionary) -> bytes:
+    """Lays out a ContentCodingDictionary as a flat dictionary and returns the block of bytes."""
+
+    terms = list(dictionary.dictTermCatMap.keys())
+    if len(terms) >= 2 ** 32 - 1:
+        raise ValueError('This dictionary is too big to be flattened.')
+
+    termIndexes = {dicTerm: termIndex for termIndex, dicTerm in enumerate(terms)}
+    catIndexes = {cat: catIndex for catIndex, cat in enumerate(dictionary.catNames)}
+
+    sections = {}
+
+    def addStringTable(tableName, strings, values):
+        blob = bytearray()
+        offsets = array('Q', [0])
+        encodedStrings = []
+        for string in strings:
+            encodedStrings.append(string.encode('utf-8'))
+            blob.extend(encodedStrings[-1])
+            offsets.append(len(blob))
+
+        # at most half full, so that probes stay short
+        numSlots = 1
+        while numSlots < len(strings) * 2:
+            numSlots *= 2
+        slots = array('I', [0]) * (numSlots if len(strings) > 0 else 0)
+        for entryIndex, encodedString in enumerate(encodedStrings):
+            slot = crc32(encodedString) & (numSlots - 1)
+            while slots[slot] != 0:
+                slot = (slot + 1) & (numSlots - 1)
+            slots[slot] = entryIndex + 1
+
+        sections[tableName + 'Blob'] = array('B', bytes(blob))
+        sections[tableName + 'Offsets'] = offsets
+        sections[tableName + 'Values'] = array('I', values)
+        sections[tableName + 'Slots'] = slots
+
+    addStringTable('terms', terms, range(0, len(terms)))
+
+    standardLengths = {}
+    for numWords, standardTerms in dictionary.dictDataStandard.items():
+        for dicTerm in standardTerms:
+            standardLengths[dicTerm] = numWords
+
+    termNumWords = [len(dicTerm.split(' ')) for dicTerm in terms]
+    if len(termNumWords) > 0 and max(termNumWords) > 65535:
+        raise ValueError('This dictionary has an entry that is too long (more than 65535 words) to be flattened.')
+
+    sections['termNumWords'] = array('H', termNumWords)
+    sections['termIsStandard'] = array('B', [1 if dicTerm in standardLengths else 0 for dicTerm in terms])
+
+    catStarts = array('I', [0])
+    termCatIndexes = array('I')
+    catWeights = array('d')
+    catWeightIsInt = array('B')
+    for dicTerm in terms:
+        for cat, catWeight in dictionary.dictTermCatMap[dicTerm].items():
+            termCatIndexes.append(catIndexes[cat])
+            catWeights.append(float(catWeight))
+            catWeightIsInt.append(1 if isinstance(catWeight, int) else 0)
+        catStarts.append(len(catWeights))
+
+    sections['catStarts'] = catStarts
+    sections['catIndexes'] = termCatIndexes
+    sections['catWeights'] = catWeights
+    sections['catWeightIsInt'] = catWeightIsInt
+
+    # the stem tables only hold the entries with a single wildcard at one end. like in WildcardIndex, the first
+    # entry to claim a stem is the one that counts.
+    wildcardLengths = sorted(dictionary.dictDataWildsList.keys())
+    for numWords in wildcardLengths:
+        wildcardList = dictionary.dictDataWildsList[numWords]
+        prefixStems = {}
+        suffixStems = {}
+        otherWildcards = array('I')
+
+        for priority, dicTerm in enumerate(wildcardList):
+            fragments = splitWildcardFragments(dicTerm)
+            if len(fragments) == 2 and fragments[1] == '':
+                prefixStems.setdefault(fragments[0], priority)
+            elif len(fragments) == 2 and fragments[0] == '':
+                suffixStems.setdefault(fragments[1], priority)
+            else:
+                otherWildcards.append(priority)
+
+        sections['wildcards' + str(numWords)] = array('I', [termIndexes[dicTerm] for dicTerm in wildcardList])
+        addStringTable('prefixStems' + str(numWords), list(prefixStems.keys()), list(prefixStems.values()))
+        addStringTable('suffixStems' + str(numWords), list(suffixStems.keys()), list(suffixStems.values()))
+        sections['otherWildcards' + str(numWords)] = otherWildcards
+
+    # the metadata says where each section is, which depends on how long the metadata is. the offsets only
+    # ever make it longer, so we just keep going until it stops changing.
+    metadata = {'byteorder': sys.byteorder,
+                'catNames': dictionary.catNames,
+                'catOrder': dictionary.catOrder,
+                'catNamesHierarchical': dictionary.catNamesHierarchical,
+                'maxWords': dictionary.maxWords,
+                'numberOfWildcards': dictionary.numberOfWildcards,
+                'numTerms': len(terms),
+                'standardCounts': {str(numWords): len(standardTerms)
+                                   for numWords, standardTerms in dictionary.dictDataStandard.items()},
+                'wildcardLengths': wildcardLengths,
+                'sections': {}}
+
+    headerLength = len(flatDictMagic) + struct.calcsize('<HQ')
+    metadataBytes = b''
+    while True:
+        offset = _Align(headerLength + len(metadataBytes))
+        sectionOffsets = {}
+        for sectionName, sectionArray in sections.items():
+            sectionOffsets[sectionName] = [offset, len(sectionArray), sectionArray.typecode]
+            offset = _Align(offset + len(sectionArray) * sectionArray.itemsize)
+
+        metadata['sections'] = sectionOffsets
+        newMetadataBytes = json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+        finished = len(newMetadataBytes) == len(metadataBytes)
+        metadataBytes = newMetadataBytes
+        if finished:
+            break
+
+    block = bytearray(flatDictMagic)
+    block.extend(struct.pack('<HQ', flatDictVersion, len(metadataBytes)))
+    block.extend(metadataBytes)
+    for sectionArray in sections.values():
+        block.extend(b'\x00' * (_Align(len(block)) - len(block)))
+        block.extend(sectionArray.tobytes())
+
+    return bytes(block)
+
+
+def openFlatDictionary(filename) -> FlatDictionary:
+    """Memory-maps a flat dictionary file (read-only), so that every process that opens it shares its pages."""
+
+    with open(filename, 'rb') as fin:
+        mapped = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return FlatDictionary(mapped, source=('file', filename))
+
+
+def attachFlatDictionary(sharedMemoryName) -> FlatDictionary:
+    """Attaches to a flat dictionary that was put into shared memory with ContentCodingDictionary.ShareFlat()."""
+
+    from multiprocessing import shared_memory
+
+    try:
+        sharedMemory = shared_memory.SharedMemory(name=sharedMemoryName, track=False)
+    except TypeError:
+        # before python 3.13, attaching to a block also signed it up to be deleted once this process is done with
+        # it, even though it isn't ours to delete. so we keep it from signing up.
+        from multiprocessing import resource_tracker
+        with _attachLock:
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                sharedMemory = shared_memory.SharedMemory(name=sharedMemoryName)
+            finally:
+                resource_tracker.register = register
+
+    flatDictionary = FlatDictionary(sharedMemory.buf, source=('sharedMemory', sharedMemoryName))
+
+    # the block has to stay attached for as long as we're using it
+    flatDictionary.sharedMemory = sharedMemory
+
+    return flatDictionary
+
+
+def _Align(offset):
+    return (offset + flatDictAlignment - 1) // flatDictAlignment * flatDictAlignment
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+
+class PhraseAutomaton:
+    """An Aho-Corasick automaton over word IDs that finds every multi-word literal phrase in a text in a single
+    left-to-right pass.
+
+    The automaton is built from the phrases of a Vocabulary (tuples of word IDs). Its states are the prefixes of
+    those phrases, so following a text's word IDs through it tells us, after each word, which phrases end right
+    there. Word IDs that appear in no phrase (Vocabulary.unknownID) simply send us back to the start."""
+
+    def __init__(self, phrases):
+
+        # for each state: word ID -> next state, the state to fall back on when there's no transition for a word,
+        # and the lengths of all of the phrases that end at this state (including those of its fallback states)
+        self.transitions = [{}]
+        self.failures = [0]
+        self.outputs = [()]
+
+        for numWords, phraseSet in phrases.items():
+            for phrase in phraseSet:
+                state = 0
+                for wordID in phrase:
+                    nextState = self.transitions[state].get(wordID)
+                    if nextState is None:
+                        nextState = len(self.transitions)
+                        self.transitions[state][wordID] = nextState
+                        self.transitions.append({})
+                        self.failures.append(0)
+                        self.outputs.append(())
+                    state = nextState
+                self.outputs[state] = self.outputs[state] + (numWords,)
+
+        # the fallback for each state is the longest proper suffix of its phrase prefix that is also a prefix of
+        # some phrase. working through the states breadth-first means that shorter prefixes are always done first.
+        stateQueue = list(self.transitions[0].values())
+        for state in stateQueue:
+            for wordID, nextState in self.transitions[state].items():
+                failure = self.failures[state]
+                while failure != 0 and wordID not in self.transitions[failure]:
+                    failure = self.failures[failure]
+                failure = self.transitions[failure].get(wordID, 0)
+
+                self.failures[nextState] = failure
+                self.outputs[nextState] = self.outputs[nextState] + self.outputs[failure]
+                stateQueue.append(nextState)
+
+        return
+
+    def __len__(self):
+        return len(self.transitions)
+
+    def FindAll(self, tokenIDs) -> dict:
+        """Returns a dict that maps each position in tokenIDs where at least one phrase starts to the set of the
+        lengths of the phrases that start there."""
+
+        transitions = self.transitions
+        failures = self.failures
+        outputs = self.outputs
+
+        phraseStarts = {}
+        state = 0
+
+        for position, wordID in enumerate(tokenIDs):
+
+            while state != 0 and wordID not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(wordID, 0)
+
+            for numWords in outputs[state]:
+                phraseStart = position - numWords + 1
+                if phraseStart in phraseStarts:
+                    phraseStarts[phraseStart].add(numWords)
+                else:
+                    phraseStarts[phraseStart] = {numWords}
+
+        return phraseStarts
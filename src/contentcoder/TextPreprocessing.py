@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Everything that happens to a text before it gets tokenized: punctuation counting, case folding, abbreviation
+handling, and number counting. This lives on its own so that anything else that codes texts can share it and be
+sure to get the same numbers that ContentCoder.Analyze() does."""
+
+import re
+
+from functools import lru_cache
+
+# what ContentCoder.numberPatternRegex starts out as. it has no capture groups, since we only ever count matches.
+numberRegex = re.compile(r'\d+(?:,\d+)*(?:\.\d+)?')
+
+
+def preprocessText(inputText, punctStopList, abbreviations, numberPattern=numberRegex):
+    """Prepares a text for tokenization and counts what needs to be counted along the way.
+
+    Returns a tuple of (preprocessedText, punctCounts, numberCount). punctCounts is a list of the AllPunct,
+    Period, Comma, QMark, Exclam, and Apostro counts, in that order. AllPunct counts every single-character
+    entry of punctStopList. Numbers are whatever numberPattern finds in the preprocessed text."""
+
+    punctCounts = [len(inputText) - len(inputText.translate(getPunctDeletionTable(frozenset(punctStopList)))),
+                   inputText.count('.'),
+                   inputText.count(','),
+                   inputText.count('?'),
+                   inputText.count('!'),
+                   inputText.count('\'') + inputText.count('’')]
+
+    preprocessedText = normalizeText(inputText, abbreviations)
+
+    numberCount = len(numberPattern.findall(preprocessedText))
+
+    return preprocessedText, punctCounts, numberCount
+
+
+def normalizeText(inputText, abbreviations):
+    """Lowercases a text, collapses its whitespace, and swaps in the tokenizer-friendly form of any abbreviations."""
+
+    textSplit = inputText.lower().split()
+
+    return ' '.join([abbreviations.get(word, word) for word in textSplit])
+
+
+@lru_cache(maxsize=16)
+def getPunctDeletionTable(punctStopList):
+    """Builds a str.translate() table that deletes every single-character entry of punctStopList. Whatever
+    translate() removes from a text is exactly what we would have counted one character at a time."""
+
+    return dict.fromkeys([ord(punctItem) for punctItem in punctStopList if len(punctItem) == 1])
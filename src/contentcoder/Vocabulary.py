@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+
+class Vocabulary:
+    """Interns the words of a dictionary's multi-word literal phrases as small integer IDs.
+
+    Each phrase is stored as a tuple of word IDs, one set of tuples per n-gram length. A text's tokens are mapped to
+    IDs once (tokens that appear in no phrase all get -1, which no phrase contains), after which checking whether
+    an n-gram is a literal phrase is just a matter of hashing a slice of small ints. We never have to build the
+    joined n-gram string unless there is something (a literal match, or a wildcard that might match) to build it
+    for. Single words are left out entirely, since ContentCoder caches those separately."""
+
+    unknownID = -1
+
+    def __init__(self, dictDataStandard):
+
+        self.wordIDs = {}
+
+        # numWords -> set of tuples of word IDs
+        self.phrases = {}
+
+        for numWords, dicTerms in dictDataStandard.items():
+            if numWords < 2:
+                continue
+            self.phrases[numWords] = set([tuple([self.Intern(word) for word in dicTerm.split(' ')])
+                                          for dicTerm in dicTerms])
+
+        return
+
+    def __len__(self):
+        return len(self.wordIDs)
+
+    def Intern(self, word) -> int:
+        """Returns the ID for word, giving it a new one if it doesn't have one yet."""
+        return self.wordIDs.setdefault(word, len(self.wordIDs))
+
+    def Lookup(self, tokens) -> tuple:
+        """Maps a list of tokens to a tuple of word IDs, with Vocabulary.unknownID for any token not in any phrase."""
+        wordIDs = self.wordIDs
+        unknownID = self.unknownID
+        return tuple([wordIDs.get(token, unknownID) for token in tokens])
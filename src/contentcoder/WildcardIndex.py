@@ -0,0 +1,372 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import re
+import sys
+
+from bisect import bisect_left
+
+
+class WildcardIndex:
+    """Finds the highest-priority wildcard entry that matches a target string.
+
+    The index is built from one of the ContentCodingDictionary.dictDataWildsList[numWords] lists. An entry's
+    priority is simply its position in that list, so the result is always the same entry that the old linear
+    regex scan would have found. Plain prefix entries (e.g., 'happ*') are stored in a character trie, and plain
+    suffix entries (e.g., '*ness') in a second trie of reversed suffixes, which means that looking them up costs
+    time proportional to the length of the target string rather than the number of wildcards in the dictionary.
+
+    Everything else (e.g., 'h*ppy' or '*appi*') is filed under its literal prefix in the first trie, or failing
+    that, under its literal suffix in the second one, so that it only ever gets tested against strings that
+    start (or end) the right way. Only entries with wildcards at both ends have to be tested against everything.
+    Testing an entry is done with plain string searches for its literal fragments rather than with its regex."""
+
+    def __init__(self, wildcardList):
+
+        self.entries = list(wildcardList)
+        self.numEntries = len(self.entries)
+
+        # each node is a dict of character -> child node. the empty string key holds the priority of the
+        # best plain entry that ends at that node, and the None key holds a list of (priority, fragments)
+        # for the other entries that need testing once we get there. neither can collide with a character.
+        self.prefixTrie = {}
+        self.suffixTrie = {}
+
+        # (priority, fragments) for entries that start and end with wildcards, kept in priority order
+        self.unanchoredEntries = []
+
+        for priority in range(0, self.numEntries):
+            fragments = splitWildcardFragments(self.entries[priority])
+
+            if len(fragments) == 2 and fragments[1] == '':
+                # entries are visited in priority order, so the first one to claim a node wins
+                self.__GetNode(self.prefixTrie, fragments[0]).setdefault('', priority)
+            elif len(fragments) == 2 and fragments[0] == '':
+                self.__GetNode(self.suffixTrie, fragments[1][::-1]).setdefault('', priority)
+            elif fragments[0] != '':
+                self.__GetNode(self.prefixTrie, fragments[0]).setdefault(None, []).append((priority, fragments))
+            elif fragments[-1] != '':
+                self.__GetNode(self.suffixTrie, fragments[-1][::-1]).setdefault(None, []).append((priority, fragments))
+            else:
+                self.unanchoredEntries.append((priority, fragments))
+
+        return
+
+    def __GetNode(self, trie, key):
+        """Returns the trie node for key, creating it (and any nodes on the way to it) if need be. Should not be
+        called outside of WildcardIndex class."""
+
+        node = trie
+        for character in key:
+            node = node.setdefault(character, {})
+
+        return node
+
+    def __Walk(self, trie, characters, plainMatches, candidates):
+        """Follows characters down the trie for as far as it goes, adding the priorities of the plain entries along
+        the way to plainMatches and the entries that still need testing to candidates. Should not be called outside
+        of WildcardIndex class."""
+
+        node = trie
+
+        for character in characters:
+            if '' in node:
+                plainMatches.append(node[''])
+            if None in node:
+                candidates.extend(node[None])
+
+            node = node.get(character)
+            if node is None:
+                return
+
+        if '' in node:
+            plainMatches.append(node[''])
+        if None in node:
+            candidates.extend(node[None])
+
+        return
+
+    def Match(self, targetString):
+        """Returns the highest-priority wildcard entry matching targetString, or None if nothing matches."""
+
+        # a wildcard's regex can't match across a line break, and our fragment searches don't know that.
+        # tokens never have line breaks in them, so this is only here for completeness.
+        if '\n' in targetString:
+            return self.MatchRegEx(targetString)
+
+        # walk down both tries, picking up the plain entries that match and any other entries worth testing
+        plainMatches = []
+        candidates = []
+        self.__Walk(self.prefixTrie, targetString, plainMatches, candidates)
+        self.__Walk(self.suffixTrie, targetString[::-1], plainMatches, candidates)
+
+        bestPriority = min(plainMatches, default=self.numEntries)
+
+        # only the candidates that outrank our best plain hit need to be tested
+        for priority, fragments in candidates:
+            if priority < bestPriority and fragmentsMatch(targetString, fragments):
+                bestPriority = priority
+
+        for priority, fragments in self.unanchoredEntries:
+            if priority >= bestPriority:
+                break
+            if fragmentsMatch(targetString, fragments):
+                bestPriority = priority
+                break
+
+        if bestPriority < self.numEntries:
+            return self.entries[bestPriority]
+
+        return None
+
+    def MatchAll(self, targetString) -> list:
+        """Returns the priorities of all of the entries that match targetString, in no particular order. An entry
+        with exactly the same fragments as a higher-priority entry is never reported, since it can never win."""
+
+        if '\n' in targetString:
+            return [priority for priority in range(0, self.numEntries)
+                    if re.match(fragmentsRegEx(splitWildcardFragments(self.entries[priority])), targetString)]
+
+        matches = []
+        candidates = []
+        self.__Walk(self.prefixTrie, targetString, matches, candidates)
+        self.__Walk(self.suffixTrie, targetString[::-1], matches, candidates)
+
+        matches.extend([priority for priority, fragments in candidates if fragmentsMatch(targetString, fragments)])
+        matches.extend([priority for priority, fragments in self.unanchoredEntries
+                        if fragmentsMatch(targetString, fragments)])
+
+        return matches
+
+    def MatchRegEx(self, targetString):
+        """Same as Match(), but tests every entry's regex in priority order."""
+
+        for dicTerm in self.entries:
+            if re.match(fragmentsRegEx(splitWildcardFragments(dicTerm)), targetString) is not None:
+                return dicTerm
+
+        return None
+
+
+class WildcardPhraseIndex:
+    """Matches multi-word wildcard entries (e.g., 'look* forward to') against a run of tokens, one token at a time.
+
+    As long as none of the tokens has a space in it, the spaces in an entry have to line up with the spaces between
+    the tokens, so none of the entry's wildcards can ever reach from one word into the next. An entry matches if
+    and only if each of its words matches the token in the same spot. Every distinct word of every entry goes into
+    a single WildcardIndex, which tells us all of the words that a token matches in one lookup. That answer is
+    remembered for each token, so overlapping windows (and later texts) never have to work it out again."""
+
+    def __init__(self, dictDataWildsList, tokenMemoryCapacity=100000):
+
+        # numWords -> the wildcard list that priorities refer to
+        self.entries = {}
+
+        # numWords -> {first word ID: [(priority, word IDs), ...]}, each list in priority order
+        self.entriesByFirstWord = {}
+
+        # the IDs of the words that a token matches. emptied whenever it fills up.
+        self.tokenWords = {}
+        self.tokenMemoryCapacity = tokenMemoryCapacity
+
+        # words with the same fragments match the same tokens, so they share an ID
+        wordIDs = {}
+        wordPatterns = []
+
+        for numWords, wildcardList in dictDataWildsList.items():
+            if numWords < 2:
+                continue
+
+            self.entries[numWords] = list(wildcardList)
+            entriesByFirstWord = {}
+
+            for priority in range(0, len(wildcardList)):
+                entryWordIDs = []
+                for word in wildcardList[priority].split(' '):
+                    wordKey = tuple(splitWildcardFragments(word))
+                    if wordKey not in wordIDs:
+                        wordIDs[wordKey] = len(wordPatterns)
+                        wordPatterns.append(word)
+                    entryWordIDs.append(wordIDs[wordKey])
+
+                entriesByFirstWord.setdefault(entryWordIDs[0], []).append((priority, tuple(entryWordIDs)))
+
+            self.entriesByFirstWord[numWords] = entriesByFirstWord
+
+        self.wordIndex = WildcardIndex(wordPatterns)
+
+        return
+
+    def TokenWords(self, token) -> frozenset:
+        """Returns the IDs of all of the entry words that token matches."""
+
+        tokenWords = self.tokenWords.get(token)
+
+        if tokenWords is None:
+            tokenWords = frozenset(self.wordIndex.MatchAll(token))
+            if len(self.tokenWords) >= self.tokenMemoryCapacity:
+                self.tokenWords.clear()
+            self.tokenWords[token] = tokenWords
+
+        return tokenWords
+
+    def CanStart(self, token, numWords) -> bool:
+        """Checks whether any numWords-long entry has a first word that matches token."""
+
+        entriesByFirstWord = self.entriesByFirstWord.get(numWords)
+        if not entriesByFirstWord:
+            return False
+
+        for wordID in self.TokenWords(token):
+            if wordID in entriesByFirstWord:
+                return True
+
+        return False
+
+    def Match(self, tokens):
+        """Returns the highest-priority entry matching tokens (none of which may contain a space or a line break),
+        or None if nothing matches."""
+
+        numWords = len(tokens)
+
+        entriesByFirstWord = self.entriesByFirstWord.get(numWords)
+        if not entriesByFirstWord:
+            return None
+
+        # the entry words that each token matches. a token that matches none of them rules out every entry.
+        windowWords = []
+        for token in tokens:
+            tokenWords = self.tokenWords.get(token)
+            if tokenWords is None:
+                tokenWords = self.TokenWords(token)
+            if not tokenWords:
+                return None
+            windowWords.append(tokenWords)
+
+        bestPriority = None
+
+        for firstWordID in windowWords[0]:
+            for priority, entryWordIDs in entriesByFirstWord.get(firstWordID, ()):
+                if bestPriority is not None and priority >= bestPriority:
+                    break
+                for wordPosition in range(1, numWords):
+                    if entryWordIDs[wordPosition] not in windowWords[wordPosition]:
+                        break
+                else:
+                    bestPriority = priority
+                    break
+
+        if bestPriority is None:
+            return None
+
+        return self.entries[numWords][bestPriority]
+
+
+def splitWildcardFragments(dicTerm):
+    """Splits a wildcard entry into the literal fragments that sit between its wildcards, using the same rules
+    as compileWildcard(): an escaped asterisk is a literal asterisk, and every other asterisk is a wildcard.
+    Runs of consecutive wildcards are collapsed, since they match exactly the same strings as a single one."""
+
+    fragments = dicTerm.replace('\\*', '\x00').split('*')
+    fragments = [fragment.replace('\x00', '*') for fragment in fragments]
+
+    if len(fragments) > 2:
+        fragments = [fragments[0]] + [fragment for fragment in fragments[1:-1] if fragment != ''] + [fragments[-1]]
+
+    return fragments
+
+
+def fragmentsMatch(targetString, fragments):
+    """Checks whether targetString (which must not contain a line break) is matched by the wildcard entry that
+    splitWildcardFragments() split into fragments. The first fragment has to start the string, the last one has
+    to end it, and the ones in between have to turn up, in order, somewhere in the middle. Taking the leftmost
+    occurrence of each middle fragment always leaves the most room for the rest, so one pass is enough."""
+
+    if len(fragments) == 1:
+        return targetString == fragments[0]
+
+    firstFragment = fragments[0]
+    lastFragment = fragments[-1]
+
+    if (len(targetString) < len(firstFragment) + len(lastFragment) or not targetString.startswith(firstFragment)
+            or not targetString.endswith(lastFragment)):
+        return False
+
+    position = len(firstFragment)
+    end = len(targetString) - len(lastFragment)
+
+    for fragment in fragments[1:-1]:
+        position = targetString.find(fragment, position, end)
+        if position < 0:
+            return False
+        position += len(fragment)
+
+    return True
+
+
+def fragmentsRegEx(fragments):
+    """Returns the regex pattern for a wildcard entry that has been split into fragments. It matches exactly the
+    same strings as the entry's compileWildcard() regex."""
+
+    return '^' + '.*'.join([re.escape(fragment) for fragment in fragments]) + '$'
+
+
+class SortedTermIndex:
+    """Finds every term in a list that a wildcard entry matches, without testing the entry against all of them.
+
+    The terms are kept sorted twice: as they are, and reversed. The terms that a wildcard entry could possibly match
+    all start with its first literal fragment (or end with its last one), so they sit in a single range of one of
+    those sorted lists, which we find with a binary search. Only the terms in the narrower of the two ranges get
+    tested. Entries that start and end with wildcards still have to be tested against everything."""
+
+    def __init__(self, terms):
+
+        self.terms = list(terms)
+
+        # positions into self.terms, sorted by the term (or the reversed term) that they point to
+        self.forwardOrder = sorted(range(0, len(self.terms)), key=lambda position: self.terms[position])
+        self.forwardKeys = [self.terms[position] for position in self.forwardOrder]
+
+        self.reversedOrder = sorted(range(0, len(self.terms)), key=lambda position: self.terms[position][::-1])
+        self.reversedKeys = [self.terms[position][::-1] for position in self.reversedOrder]
+
+        return
+
+    def __Range(self, sortedKeys, prefix):
+        """Returns the (start, end) of the keys that begin with prefix. Should not be called outside of
+        SortedTermIndex class."""
+
+        start = bisect_left(sortedKeys, prefix)
+
+        # the first string after every string that starts with prefix
+        if ord(prefix[-1]) < sys.maxunicode:
+            end = bisect_left(sortedKeys, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        else:
+            end = start
+            while end < len(sortedKeys) and sortedKeys[end].startswith(prefix):
+                end += 1
+
+        return start, end
+
+    def Matches(self, dicTerm) -> list:
+        """Returns the positions (in the original list of terms) of every term that dicTerm matches, in order.
+        A term matches if compileWildcard(dicTerm) would match all of it."""
+
+        fragments = splitWildcardFragments(dicTerm)
+
+        ranges = []
+        if fragments[0] != '':
+            start, end = self.__Range(self.forwardKeys, fragments[0])
+            ranges.append((end - start, self.forwardOrder, start, end))
+        if fragments[-1] != '':
+            start, end = self.__Range(self.reversedKeys, fragments[-1][::-1])
+            ranges.append((end - start, self.reversedOrder, start, end))
+
+        if len(ranges) == 0:
+            candidates = range(0, len(self.terms))
+        else:
+            _, order, start, end = min(ranges, key=lambda termRange: termRange[0])
+            candidates = sorted(order[start:end])
+
+        # dictionary terms never have line breaks in them, so the fragment search gives the same answer as the regex
+        return [position for position in candidates if fragmentsMatch(self.terms[position], fragments)]
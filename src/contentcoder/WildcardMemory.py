@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+import threading
+
+from collections import OrderedDict
+
+# returned by WildcardMemory.Get() when a string has never been resolved. we can't use None for this,
+# since None is what we remember for strings that did not match any wildcard at all.
+notInMemory = object()
+
+
+class WildcardMemory:
+    """A bounded memory of wildcard resolutions for a single n-gram length.
+
+    Maps a target string to the wildcard entry that captured it, or to None if no wildcard matched it. Once
+    the memory holds 'capacity' strings, the least recently used string is forgotten to make room for the
+    next one. A capacity of None means the memory is never trimmed.
+
+    A single memory can be shared by several threads. Everything that reads or changes it holds a lock, but only
+    for as long as a dict lookup or two takes."""
+
+    def __init__(self, capacity=100000):
+
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+
+        return
+
+    def __getstate__(self):
+        # locks can't be pickled (e.g., when a ContentCoder gets sent to AnalyzeBatch()'s worker processes)
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, targetString):
+        return targetString in self.entries
+
+    def Get(self, targetString):
+        """Returns the remembered wildcard entry (or None) for targetString, or notInMemory if we haven't
+        seen targetString before."""
+
+        with self.lock:
+            wildcardEntry = self.entries.get(targetString, notInMemory)
+
+            if wildcardEntry is notInMemory:
+                self.misses += 1
+            else:
+                self.entries.move_to_end(targetString)
+                self.hits += 1
+
+        return wildcardEntry
+
+    def Put(self, targetString, wildcardEntry):
+        """Remembers which wildcard entry captured targetString. Use None for strings that matched nothing."""
+
+        if self.capacity is not None and self.capacity <= 0:
+            return
+
+        with self.lock:
+            self.entries[targetString] = wildcardEntry
+            self.entries.move_to_end(targetString)
+
+            if self.capacity is not None and len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+        return
+
+    def Clear(self):
+        """Forgets everything that has been remembered. The hit/miss/eviction counts are kept."""
+        with self.lock:
+            self.entries.clear()
+        return
+
+    def Items(self) -> list:
+        """Returns a list of (targetString, wildcardEntry) pairs for everything that is remembered, least recently
+        used first."""
+        with self.lock:
+            return list(self.entries.items())
+
+    def ResetStats(self):
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+        return
+
+    def Stats(self) -> dict:
+        """Returns the size, capacity, and hit/miss/eviction counts of this memory."""
+
+        with self.lock:
+            lookups = self.hits + self.misses
+
+            return {'size': len(self.entries),
+                    'capacity': self.capacity,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'hitRate': self.hits / lookups if lookups > 0 else 0.0}
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""The 'contentcoder' command: codes a corpus with a dictionary and writes one row of results per text.
+
+Texts are streamed in and results are streamed out, so memory use stays flat no matter how big the input is.
+
+Examples:
+    contentcoder --dict LIWC2015.dic --input comments.csv --text-column comment_text --id-column id --output out.csv
+    contentcoder --dict my.dicx --input posts.jsonl --output results.jsonl --workers 8
+    cat texts.txt | contentcoder --dict my.dic > results.csv
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+import time
+
+from collections import deque
+
+from .ContentCoder import ContentCoder
+
+
+def main(argv=None):
+
+    try:
+        return codeCorpus(getArgParser().parse_args(argv))
+
+    except BrokenPipeError:
+        # whoever was reading our output (e.g., 'head') has stopped listening. python would otherwise
+        # complain about this again while flushing stdout on the way out.
+        sys.stdout = None
+        return 1
+
+
+def codeCorpus(args):
+    """Does the actual work of main(), once the command line arguments have been parsed."""
+
+    inputFormat = args.input_format or guessFormat(args.input, default='text')
+    outputFormat = args.output_format or guessFormat(args.output, default='csv')
+
+    if inputFormat == 'text' and args.text_column is not None:
+        print('Note: --text-column is ignored for plain text input, where every line is a text.', file=sys.stderr)
+
+    # the dictionary prints its progress to stdout, which might be where our results are going
+    with contextlib.redirect_stdout(sys.stderr):
+        cc = ContentCoder(dicFilename=args.dict, fileEncoding=args.dict_encoding)
+
+    csv.field_size_limit(sys.maxsize)
+
+    with openInput(args.input, args.encoding) as fin, openOutput(args.output, args.output_encoding) as fout:
+
+        # the ids of the texts that have been handed off for coding, but haven't come back yet. results come
+        # back in order, so we just match them up as they arrive.
+        pendingIDs = deque()
+
+        def textsToCode():
+            for textID, text in readTexts(fin, inputFormat, args.text_column or 'text', args.id_column):
+                pendingIDs.append(textID)
+                yield text
+
+        header = cc.GetResultsHeader()
+        idColumnName = args.id_column or 'id'
+
+        if outputFormat == 'csv':
+            csvw = csv.writer(fout)
+            csvw.writerow([idColumnName] + header)
+
+        numTexts = 0
+        numTokens = 0
+        startTime = time.perf_counter()
+        lastReport = startTime
+
+        for results in cc.AnalyzeBatch(textsToCode(),
+                                       workers=args.workers,
+                                       chunksize=args.chunksize,
+                                       backend=args.backend,
+                                       relativeFreq=not args.raw_counts,
+                                       dropPunct=not args.keep_punct,
+                                       wildcardMem=not args.no_wildcard_memory):
+
+            textID = pendingIDs.popleft()
+            resultsArray = cc.GetResultsArray(results, rounding=args.rounding)
+
+            if outputFormat == 'csv':
+                csvw.writerow([textID] + resultsArray)
+            else:
+                rowOut = {idColumnName: textID}
+                rowOut.update(zip(header, resultsArray))
+                fout.write(json.dumps(rowOut, ensure_ascii=False) + '\n')
+
+            numTexts += 1
+            numTokens += results['WC']
+
+            if not args.quiet and time.perf_counter() - lastReport >= args.report_every:
+                lastReport = time.perf_counter()
+                reportThroughput(numTexts, numTokens, lastReport - startTime)
+
+        if not args.quiet:
+            reportThroughput(numTexts, numTokens, time.perf_counter() - startTime, final=True)
+
+    return 0
+
+
+def getArgParser():
+
+    parser = argparse.ArgumentParser(prog='contentcoder',
+                                     description='Codes texts with a dictionary (.dic, .dicx, .csv, or compiled .ccd) '
+                                                 'and writes one row of results per text.')
+
+    parser.add_argument('--dict', required=True, help='the dictionary file to code with')
+    parser.add_argument('--dict-encoding', default='utf-8-sig', help='encoding of the dictionary file')
+
+    parser.add_argument('--input', default='-', help='the texts to code (default: read from stdin)')
+    parser.add_argument('--input-format', choices=['csv', 'jsonl', 'text'],
+                        help='csv, jsonl, or text (one text per line). Guessed from the file extension if not given.')
+    parser.add_argument('--text-column', help='the CSV column or JSON field that holds the text (default: text)')
+    parser.add_argument('--id-column', help='a CSV column or JSON field to pass through to the output as an id. '
+                                            'Texts are numbered from 1 if this is not given.')
+
+    parser.add_argument('--output', default='-', help='where to write the results (default: stdout)')
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'],
+                        help='csv or jsonl. Guessed from the file extension if not given.')
+    parser.add_argument('--encoding', default='utf-8-sig',
+                        help='encoding of the input file (the default also skips a byte order mark, if there is one)')
+    parser.add_argument('--output-encoding', default='utf-8',
+                        help='encoding of the output file. Use utf-8-sig to start a CSV file with the byte order mark '
+                             'that Excel looks for (JSON Lines readers will reject it).')
+
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes to code with')
+    parser.add_argument('--backend', choices=['process', 'thread'], default='process',
+                        help='code with worker processes or threads (threads only help on free-threaded Python)')
+    parser.add_argument('--chunksize', type=int, default=64, help='texts sent to a worker at a time')
+
+    parser.add_argument('--raw-counts', action='store_true', help='output raw counts instead of relative frequencies')
+    parser.add_argument('--keep-punct', action='store_true', help='keep punctuation while coding')
+    parser.add_argument('--no-wildcard-memory', action='store_true', help='do not remember past wildcard matches')
+    parser.add_argument('--rounding', type=int, default=4, help='number of decimal places in the output')
+
+    parser.add_argument('--report-every', type=float, default=10.0,
+                        help='seconds between throughput reports on stderr')
+    parser.add_argument('--quiet', action='store_true', help='do not report throughput')
+
+    return parser
+
+
+def guessFormat(filename, default):
+
+    if filename == '-':
+        return default
+
+    filenameLower = filename.lower()
+
+    if filenameLower.endswith('.csv'):
+        return 'csv'
+    elif filenameLower.endswith('.jsonl') or filenameLower.endswith('.ndjson'):
+        return 'jsonl'
+    elif filenameLower.endswith('.txt'):
+        return 'text'
+
+    return default
+
+
+def openInput(filename, encoding):
+    if filename == '-':
+        return openStandardStream(sys.stdin, encoding)
+    return open(filename, 'r', encoding=encoding, newline='')
+
+
+def openOutput(filename, encoding):
+    if filename == '-':
+        return openStandardStream(sys.stdout, encoding)
+    return open(filename, 'w', encoding=encoding, newline='')
+
+
+@contextlib.contextmanager
+def openStandardStream(stream, encoding):
+    """Reads or writes stdin/stdout with the encoding that was asked for, rather than whatever the terminal or
+    PYTHONIOENCODING says. The stream itself is left open when we're done with it."""
+
+    # streams that have been swapped out for ones with no bytes underneath them are used as they are
+    if not hasattr(stream, 'buffer'):
+        yield stream
+        return
+
+    stream.flush()
+    wrapped = io.TextIOWrapper(stream.buffer, encoding=encoding, newline='')
+    try:
+        yield wrapped
+    finally:
+        wrapped.flush()
+        wrapped.detach()
+
+
+def readTexts(fin, inputFormat, textColumn, idColumn):
+    """Yields (id, text) pairs, one at a time, from an open file."""
+
+    if inputFormat == 'csv':
+        for rowNumber, row in enumerate(csv.DictReader(fin), start=1):
+            yield (row[idColumn] if idColumn else rowNumber), (row[textColumn] or '')
+
+    elif inputFormat == 'jsonl':
+        rowNumber = 0
+        for line in fin:
+            if line.strip() == '':
+                continue
+            rowNumber += 1
+            row = json.loads(line)
+            yield (row[idColumn] if idColumn else rowNumber), (row[textColumn] or '')
+
+    else:
+        for rowNumber, line in enumerate(fin, start=1):
+            yield rowNumber, line.rstrip('\r\n')
+
+    return
+
+
+def reportThroughput(numTexts, numTokens, elapsedSeconds, final=False):
+
+    elapsedSeconds = max(elapsedSeconds, 1e-9)
+
+    print(('Finished: ' if final else 'Progress: ') +
+          str(numTexts) + ' texts, ' + str(numTokens) + ' words in ' + str(round(elapsedSeconds, 1)) + 's (' +
+          str(round(numTexts / elapsedSeconds, 1)) + ' texts/sec, ' +
+          str(round(numTokens / elapsedSeconds, 1)) + ' words/sec)', file=sys.stderr)
+
+    return
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -168,17 +168,11 @@ class Tokenizer:
         except UnicodeDecodeError:
             s = str(s).encode('string_escape')
             s = str(s)
-        # Fix HTML character entitites:
-        s = self.__html2unicode(s)
-        # Tokenize:
-        words = word_re.findall(s)
-        # findaall返回的是元素为tuple的list，将其转化为一维的list
-        words = sum([list(i) for i in words], [])
-        # 筛选掉其中为空的元素
-        words = list(filter(lambda x : x!='', words))
-        # list_words = (lambda x : x[0] in words)
-        # return list_words
-        
+        # Fix HTML character entitites. Every entity starts with an ampersand, so most texts can skip this:
+        if '&' in s:
+            s = self.__html2unicode(s)
+
+        urls = None
         if self.preserve_keywords:
             preserve_dict = {}
             usernames = username_re.findall(s)
@@ -188,14 +182,29 @@ class Tokenizer:
             preserve_dict['url'] = urls
             preserve_dict['hashtag'] = hashtags
             self.preserve_dict = preserve_dict
-            words = list(filter(lambda x : x not in urls, words)) 
+            urls = set(urls)
+
+        lowercase = not self.preserve_case
+        emoticon_search = emoticon_re.search
 
+        # Tokenize. Every match holds the whole token in group 1. Urls also fill group 2, since the url pattern
+        # has a group of its own, and they have always come out of the tokenizer twice because of this. We keep
+        # doing the same so that results don't change.
+        words = []
+        for match in word_re.finditer(s):
+            for word in match.groups():
+                if not word:
+                    continue
+                if urls is not None and word in urls:
+                    continue
+                # Possibly alter the case, but avoid changing emoticons like :D into :d:
+                if lowercase:
+                    lowered = word.lower()
+                    if lowered != word and not emoticon_search(word):
+                        word = lowered
+                words.append(word)
 
-        # Possible alter the case, but avoid changing emoticons like :D into :d:
-        if not self.preserve_case:            
-            words = map((lambda x : x if emoticon_re.search(x) else x.lower()), words)
-        
-        return list(words)
+        return words
     
     def get_preserve_dict(self):
         if self.preserve_keywords: 
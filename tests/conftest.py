@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Fixtures that are shared by the tests."""
+
+import contextlib
+import io
+
+import pytest
+
+from contentcoder.ContentCoder import ContentCoder
+
+
+@pytest.fixture
+def makeCoder():
+    """Returns a function that makes a ContentCoder, without all of the chatter."""
+
+    def makeQuietCoder(**kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return ContentCoder(**kwargs)
+
+    return makeQuietCoder
+
+
+@pytest.fixture
+def codedCounts():
+    """Returns a function that codes a text and keeps the raw Dic, WC and category counts."""
+
+    def countText(cc, text):
+        results = cc.Analyze(text, relativeFreq=False, retainCaptures=True)
+        return {column: value for column, value in results.items() if column in ['Dic', 'WC'] + cc.dict.catNames}
+
+    return countText
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks that AnalyzeMatrix() gives the same numbers as Analyze(), and that it won't fill a matrix that doesn't
+fit the results."""
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+dictString = '%\n1\tposemo\n2\tnegemo\n%\nhappy\t1\nhapp*\t1\nsad\t2\nlook* forward\t1\n'
+texts = ['so happy', 'sad and looking forward to it', '', 'happiness is 42']
+
+
+def testMatchesAnalyze(makeCoder):
+    cc = makeCoder(dictString=dictString)
+
+    matrix, columnNames = cc.AnalyzeMatrix(texts)
+
+    assert matrix.shape == (len(texts), len(columnNames))
+    for rowIndex, text in enumerate(texts):
+        results = cc.Analyze(text)
+        assert list(matrix[rowIndex]) == [results[columnName] for columnName in columnNames]
+
+
+def testFillsOut(makeCoder):
+    cc = makeCoder(dictString=dictString)
+    expected, columnNames = cc.AnalyzeMatrix(texts, relativeFreq=False)
+
+    out = numpy.full((10, len(columnNames)), -1.0)
+    filled, _ = cc.AnalyzeMatrix(iter(texts), relativeFreq=False, out=out)
+
+    # the rows that were filled come back as a view, and the rest of 'out' is left alone
+    assert len(filled) == len(texts)
+    assert numpy.shares_memory(filled, out)
+    assert (filled == expected).all()
+    assert (out[len(texts):] == -1.0).all()
+
+
+@pytest.mark.parametrize('outShape, outType', [((4,), numpy.float64),
+                                               ((4, 3), numpy.float64),
+                                               (None, numpy.float32),
+                                               (None, numpy.int64),
+                                               ((3, None), numpy.float64)])
+def testRejectsBadOut(makeCoder, outShape, outType):
+    cc = makeCoder(dictString=dictString, collectStats=True)
+    numColumns = len(cc.GetResultsHeader())
+
+    if outShape is None:
+        outShape = (len(texts), numColumns)
+    elif outShape[-1] is None:
+        outShape = (outShape[0], numColumns)
+
+    with pytest.raises(ValueError):
+        cc.AnalyzeMatrix(texts, out=numpy.zeros(outShape, dtype=outType))
+
+    # nothing was coded
+    assert cc.Stats()['texts'] == 0
+
+
+def testTooManyTextsFromGenerator(makeCoder):
+    cc = makeCoder(dictString=dictString)
+    out = numpy.zeros((2, len(cc.GetResultsHeader())))
+
+    with pytest.raises(ValueError, match='more texts'):
+        cc.AnalyzeMatrix((text for text in texts), out=out)
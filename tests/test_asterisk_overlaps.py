@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks the rows that ExportAsteriskOverlaps() writes, with and without worker processes."""
+
+import contextlib
+import csv
+import io
+import random
+
+dictString = ('%\n1\tposemo\n2\tnegemo\n3\tsocial\n%\n'
+              'happy\t1\nhapp*\t1\nhappiness\t1\t2\n*ness\t2\nsad\t2\nsadness\t2\t3\nsa*\t2\nlook*\t1\nlooking\t3\n'
+              'look* forward\t1\nlooking forward\t3\nwe\t3\nthe\t3\n')
+
+
+def exportedRows(cc, filename, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        cc.dict.ExportAsteriskOverlaps(filename, **kwargs)
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as fin:
+        return list(csv.reader(fin))
+
+
+def testOverlaps(makeCoder, tmp_path):
+    cc = makeCoder(dictString=dictString)
+
+    rows = exportedRows(cc, str(tmp_path / 'overlaps.csv'))
+
+    assert rows[0] == ['Wildcard', 'WildcardCats', 'Overlaps', 'OverlapCats', 'OverlapUniqueCats']
+    assert [(row[0], row[2]) for row in rows[1:]] == [('happ*', 'happiness'),
+                                                      ('happ*', 'happy'),
+                                                      ('look*', 'look* forward'),
+                                                      ('look*', 'looking'),
+                                                      ('look*', 'looking forward'),
+                                                      ('look* forward', 'looking forward'),
+                                                      ('sa*', 'sad'),
+                                                      ('sa*', 'sadness'),
+                                                      ('*ness', 'happiness'),
+                                                      ('*ness', 'sadness')]
+
+    # the categories are written as sets, so their order isn't fixed
+    categories = {(row[0], row[2]): [set(cats.split(', ')) - {''} for cats in row[1:5:2] + row[4:5]]
+                  for row in rows[1:]}
+    assert categories[('*ness', 'sadness')] == [{'negemo'}, {'negemo', 'social'}, {'social'}]
+    assert categories[('happ*', 'happy')] == [{'posemo'}, {'posemo'}, set()]
+
+
+def testWorkersMatch(makeCoder, tmp_path):
+    rng = random.Random(1)
+    letters = 'abcd'
+    dicTerms = set()
+    while len(dicTerms) < 300:
+        word = ''.join(rng.choice(letters) for _ in range(rng.randint(1, 5)))
+        wordShape = rng.random()
+        dicTerms.add(word + '*' if wordShape < 0.2 else '*' + word if wordShape < 0.3 else word)
+    cc = makeCoder(dictString='%\n1\tfirst\n2\tsecond\n%\n' +
+                              ''.join([dicTerm + '\t' + str(rng.randint(1, 2)) + '\n' for dicTerm in sorted(dicTerms)]))
+
+    expected = exportedRows(cc, str(tmp_path / 'one.csv'))
+    assert len(expected) > 100
+
+    assert exportedRows(cc, str(tmp_path / 'two.csv'), workers=2, chunksize=4) == expected
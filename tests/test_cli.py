@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks the encodings that the contentcoder command reads and writes with."""
+
+import codecs
+import contextlib
+import csv
+import io
+import json
+
+import pytest
+
+from contentcoder import cli
+
+dictString = '%\n1\tposemo\n%\nhappy\t1\nhapp*\t1\n'
+
+
+def runCLI(tmp_path, inputBytes, inputName, outputName, *extraArgs):
+    dictFilename = tmp_path / 'dictionary.dic'
+    dictFilename.write_text(dictString, encoding='utf-8')
+
+    inputFilename = tmp_path / inputName
+    inputFilename.write_bytes(inputBytes)
+
+    outputFilename = tmp_path / outputName
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        assert cli.main(['--dict', str(dictFilename), '--input', str(inputFilename),
+                         '--output', str(outputFilename), '--quiet'] + list(extraArgs)) == 0
+
+    return outputFilename.read_bytes()
+
+
+@pytest.mark.parametrize('inputBOM', [b'', codecs.BOM_UTF8])
+def testJSONLOutputHasNoBOM(tmp_path, inputBOM):
+    inputBytes = inputBOM + 'id,text\n1,so happy\n2,happiness is here\n'.encode('utf-8')
+
+    outputBytes = runCLI(tmp_path, inputBytes, 'texts.csv', 'results.jsonl', '--id-column', 'id')
+
+    assert not outputBytes.startswith(codecs.BOM_UTF8)
+
+    # every line has to be strict JSON, the first one included
+    rows = [json.loads(line) for line in outputBytes.decode('utf-8').splitlines()]
+    assert [row['id'] for row in rows] == ['1', '2']
+    assert rows[0]['posemo'] > 0
+
+
+def testCSVOutputEncoding(tmp_path):
+    inputBytes = 'so happy\n'.encode('utf-8')
+
+    outputBytes = runCLI(tmp_path, inputBytes, 'texts.txt', 'results.csv')
+    assert not outputBytes.startswith(codecs.BOM_UTF8)
+
+    outputBytes = runCLI(tmp_path, inputBytes, 'texts.txt', 'results.csv', '--output-encoding', 'utf-8-sig')
+    assert outputBytes.startswith(codecs.BOM_UTF8)
+    assert next(csv.reader(io.StringIO(outputBytes.decode('utf-8-sig'))))[0] == 'id'
+
+
+def testStandardStreamEncodings(tmp_path, monkeypatch):
+    dictFilename = tmp_path / 'dictionary.dic'
+    dictFilename.write_text('%\n1\tposemo\n%\nhäppy\t1\n', encoding='utf-8')
+
+    # the encodings that were asked for win over whatever stdin and stdout were set up with
+    monkeypatch.setattr('sys.stdin', io.TextIOWrapper(io.BytesIO('so häppy\n'.encode('latin-1')), encoding='ascii'))
+    stdoutBytes = io.BytesIO()
+    monkeypatch.setattr('sys.stdout', io.TextIOWrapper(stdoutBytes, encoding='ascii'))
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        assert cli.main(['--dict', str(dictFilename), '--input', '-', '--output', '-', '--input-format', 'text',
+                         '--output-format', 'jsonl', '--encoding', 'latin-1', '--output-encoding', 'utf-16',
+                         '--quiet']) == 0
+
+    rows = [json.loads(line) for line in stdoutBytes.getvalue().decode('utf-16').splitlines()]
+    assert rows[0]['posemo'] > 0
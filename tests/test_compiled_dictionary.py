@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks that compiled (.ccd) dictionaries load back exactly as they were saved, and that anything else is
+refused with a ValueError instead of leaving the coder with an empty dictionary."""
+
+import contextlib
+import io
+import pickle
+import struct
+
+import pytest
+
+from contentcoder.ContentCodingDictionary import compiledDictMagic, compiledDictVersion
+
+dictString2007 = ('%\n1\tposemo\n2\tnegemo\n3\tsocial\n%\n'
+                  'happy\t1\nhapp*\t1\n*ness\t1\t2\nsad\t2\nlook* forward to\t1\t3\n'
+                  'we\t3\nwe are\t3\n*c * *\t2\n1\\*2\t3\n')
+
+dictString2022 = ('DicTerm,posemo,negemo\n'
+                  'happy,1,\n'
+                  'happ*,0.5,\n'
+                  'sad,,1.25\n'
+                  'not happy,,2\n')
+
+
+@pytest.mark.parametrize('dictString, dictFormat', [(dictString2007, '2007'), (dictString2022, '2022')])
+def testCompiledRoundTrip(makeCoder, tmp_path, dictString, dictFormat):
+    original = makeCoder(dictString=dictString, dictFormat=dictFormat)
+
+    filename = str(tmp_path / 'dictionary.ccd')
+    with contextlib.redirect_stdout(io.StringIO()):
+        original.dict.Compile(filename)
+    compiled = makeCoder(dicFilename=filename)
+
+    for attributeName in ['maxWords', 'numCats', 'numberOfWildcards', 'catNames', 'catOrder',
+                          'catNamesHierarchical', 'dictDataStandard', 'dictDataWildsList']:
+        assert getattr(compiled.dict, attributeName) == getattr(original.dict, attributeName), attributeName
+
+    # the same terms, in the same order, with the same categories and the same kinds of weights
+    assert ([(dicTerm, list(categories.items())) for dicTerm, categories in compiled.dict.dictTermCatMap.items()] ==
+            [(dicTerm, list(categories.items())) for dicTerm, categories in original.dict.dictTermCatMap.items()])
+    assert ([type(catWeight) for categories in compiled.dict.dictTermCatMap.values() for catWeight in categories.values()] ==
+            [type(catWeight) for categories in original.dict.dictTermCatMap.values() for catWeight in categories.values()])
+
+    text = 'We are so happy and full of happiness. I look forward to it! Sad, sad. bb ac (800) 123-4567 1*2'
+    assert compiled.Analyze(text, relativeFreq=False) == original.Analyze(text, relativeFreq=False)
+
+    # a compiled dictionary can still be changed, unlike a flat one
+    with contextlib.redirect_stdout(io.StringIO()):
+        compiled.dict.UpdateCategories('brandnew', {compiled.dict.catNames[0]: 1})
+    assert 'brandnew' in compiled.dict.dictTermCatMap
+
+
+def testManyCategories(makeCoder, tmp_path):
+    # more categories than fit in 16 bits
+    numCats = 70000
+    dictString = ('%\n' + ''.join([str(catNumber) + '\tcat' + str(catNumber) + '\n'
+                                   for catNumber in range(1, numCats + 1)]) +
+                  '%\nhappy\t1\t' + str(numCats) + '\nsad\t65536\n')
+    original = makeCoder(dictString=dictString)
+
+    filename = str(tmp_path / 'dictionary.ccd')
+    with contextlib.redirect_stdout(io.StringIO()):
+        original.dict.Compile(filename)
+    compiled = makeCoder(dicFilename=filename)
+
+    assert compiled.dict.catNames == original.dict.catNames
+    assert compiled.dict.dictTermCatMap == original.dict.dictTermCatMap
+
+    text = 'happy sad'
+    assert compiled.Analyze(text, relativeFreq=False) == original.Analyze(text, relativeFreq=False)
+
+
+def writeFile(tmp_path, contents):
+    filename = str(tmp_path / 'dictionary.ccd')
+    with open(filename, 'wb') as fout:
+        fout.write(contents)
+    return filename
+
+
+def testNotACompiledDictionary(makeCoder, tmp_path):
+    with pytest.raises(ValueError, match='not a compiled dictionary'):
+        makeCoder(dicFilename=writeFile(tmp_path, b'%\n1\tcat\n%\ncat\t1\n'))
+
+
+def testDifferentVersion(makeCoder, tmp_path):
+    with pytest.raises(ValueError, match='different version'):
+        makeCoder(dicFilename=writeFile(tmp_path, compiledDictMagic + struct.pack('>H', compiledDictVersion + 1)))
+
+
+def testPickleIsNeverLoaded(makeCoder, tmp_path):
+    # the old format was a pickle after the header, which could run anything that it liked when it was loaded
+    class Exploit:
+        def __reduce__(self):
+            return (exec, ('raise SystemExit("pickle was loaded")',))
+
+    contents = compiledDictMagic + struct.pack('>H', compiledDictVersion) + pickle.dumps(Exploit())
+
+    with pytest.raises(ValueError, match='damaged'):
+        makeCoder(dicFilename=writeFile(tmp_path, contents))
+
+
+@pytest.mark.parametrize('keepBytes', [0, 10, 40, 200, -8])
+def testDamagedFile(makeCoder, tmp_path, keepBytes):
+    filename = str(tmp_path / 'original.ccd')
+    with contextlib.redirect_stdout(io.StringIO()):
+        makeCoder(dictString=dictString2007).dict.Compile(filename)
+    with open(filename, 'rb') as fin:
+        contents = fin.read()
+
+    headerLength = len(compiledDictMagic) + struct.calcsize('>H')
+
+    with pytest.raises(ValueError):
+        makeCoder(dicFilename=writeFile(tmp_path, contents[:headerLength + keepBytes] if keepBytes >= 0
+                                        else contents[:keepBytes]))
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks that ProfileDictionary() counts a sample the same way that collectStats=True counts it."""
+
+import random
+
+import pytest
+
+dictString = ('%\n1\tposemo\n2\tnegemo\n%\n'
+              'happy\t1\nhapp*\t1\n*ness\t1\t2\nsa*\t2\n*a*\t2\nlook* forward\t1\n*c * *\t2\nvery *\t1\n'
+              'not happy\t2\n')
+
+words = ['happy', 'happiness', 'sad', 'sadness', 'looking', 'forward', 'very', 'not', 'bc', 'ac', 'the', 'cat',
+         '(800) 123-4567', 'and', 'so']
+
+
+@pytest.mark.parametrize('wildcardEngine', ['trie', 'regex'])
+def testProfileMatchesStats(makeCoder, wildcardEngine):
+    rng = random.Random(1)
+    texts = [' '.join([rng.choice(words) for _ in range(0, 30)]) for _ in range(0, 40)]
+
+    statsCoder = makeCoder(dictString=dictString, wildcardEngine=wildcardEngine, collectStats=True)
+    for text in texts:
+        statsCoder.Analyze(text, wildcardMem=False)
+    stats = statsCoder.Stats()
+
+    # anything coded beforehand mustn't change the profile, and the profile mustn't change anything else
+    cc = makeCoder(dictString=dictString, wildcardEngine=wildcardEngine, collectStats=True)
+    for text in texts[:10]:
+        cc.Analyze(text)
+    statsBefore = cc.Stats()
+
+    sample = cc.ProfileDictionary(sampleTexts=texts)['sample']
+
+    assert cc.Stats()['wildcardScans'] == statsBefore['wildcardScans']
+    for counterName in ['texts', 'tokens', 'literalHits', 'wildcardHits', 'wildcardScans']:
+        assert sample[counterName] == stats[counterName], counterName
+    assert sample['wildcardScansPerToken'] == stats['wildcardScans'] / stats['tokens']
+
+    # with the regex engine, Stats() counts every pattern tested, which is what the profile works out per entry
+    if wildcardEngine == 'regex':
+        assert sample['regExAttemptsPerToken'] == pytest.approx(stats['wildcardAttempts'] / stats['tokens'])
+        assert sample['regExAttemptsPerMatch'] == pytest.approx(stats['attemptsPerMatch'])
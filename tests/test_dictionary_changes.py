@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks that ContentCoder never codes with what it worked out from an older version of the dictionary."""
+
+import contextlib
+import io
+
+dictString = '%\n1\tposemo\n2\tnegemo\n%\nhappy\t1\nhapp*\t1\nsad\t2\nlook* forward\t1\n'
+
+
+def dicPosNeg(counts):
+    return counts['Dic'], counts['posemo'], counts['negemo']
+
+
+def testUpdateCategoriesEmptiesCaches(makeCoder, codedCounts):
+    cc = makeCoder(dictString=dictString)
+    text = 'happy happiness sad looking forward'
+    assert dicPosNeg(codedCounts(cc, text)) == (5, 4, 1)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        cc.dict.UpdateCategories('happ*', {})
+        cc.dict.UpdateCategories('sad', {'posemo': 1})
+
+    assert dicPosNeg(codedCounts(cc, text)) == (4, 4, 0)
+
+
+def testMarkChangedAfterDirectChanges(makeCoder, codedCounts):
+    cc = makeCoder(dictString=dictString)
+    text = 'happy happiness sad looking forward'
+    assert dicPosNeg(codedCounts(cc, text)) == (5, 4, 1)
+
+    # changing the attributes directly doesn't tell anyone, so they have to be told
+    cc.dict.dictTermCatMap['sad'] = {'posemo': 1}
+    cc.dict.dictTermCatMap.pop('happ*')
+    cc.dict.dictDataWildsList[1].remove('happ*')
+    cc.dict.dictTermCatMap['very sad'] = {'negemo': 1}
+    cc.dict.dictDataStandard[2].add('very sad')
+    cc.dict.MarkChanged()
+
+    assert cc.dict.maxWords == 2
+    assert cc.dict.numberOfWildcards == 1
+    assert dicPosNeg(codedCounts(cc, text)) == (4, 4, 0)
+
+    # and the results have to match a dictionary that was made that way in the first place
+    fresh = makeCoder(dictString='%\n1\tposemo\n2\tnegemo\n%\nhappy\t1\nsad\t1\nlook* forward\t1\n'
+                                 'very sad\t2\n')
+    for text in ['happy happiness sad looking forward', 'very sad', 'so very sad and looking forward']:
+        assert codedCounts(cc, text) == codedCounts(fresh, text)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks what the Write*() serializers, and the exports and strings built on them, put out."""
+
+import contextlib
+import io
+import json
+
+import pytest
+
+dictString = ('%\n1\tposemo\n2\tnegemo\n3\tsocial\n%\n'
+              'happy\t1\nhapp*\t1\n*ness\t1\t2\nsad\t2\nlook* forward to\t1\t3\nwe\t3\n')
+
+expected2007 = ('%\r\n1\tposemo\r\n2\tnegemo\r\n3\tsocial\r\n%\r\n'
+                'happ*\t1\r\nhappy\t1\r\nlook* forward to\t1\t3\r\nsad\t2\r\nwe\t3\r\n*ness\t1\t2')
+
+expected2022 = ('DicTerm,posemo,negemo,social\r\n'
+                'happ*,X,,\r\nhappy,X,,\r\nlook* forward to,X,,X\r\nsad,,X,\r\nwe,,,X\r\n*ness,X,X,\r\n')
+
+expectedJSON = {'happy': {'posemo': 1.0},
+                'happ*': {'posemo': 1.0},
+                '*ness': {'posemo': 1.0, 'negemo': 1.0},
+                'sad': {'negemo': 1.0},
+                'look* forward to': {'posemo': 1.0, 'social': 1.0},
+                'we': {'social': 1.0}}
+
+
+def written(writeMethod, *args, **kwargs):
+    fout = io.StringIO()
+    writeMethod(fout, *args, **kwargs)
+    return fout.getvalue()
+
+
+def readFile(filename):
+    with open(filename, 'r', encoding='utf-8', newline='') as fin:
+        return fin.read()
+
+
+def testWriteDict2007(makeCoder, tmp_path):
+    cc = makeCoder(dictString=dictString)
+
+    assert written(cc.dict.WriteDict2007) == expected2007
+    assert cc.dict.DictToString2007() == expected2007
+
+    # only the terms that were asked for, in the order that they were given
+    assert written(cc.dict.WriteDict2007, dicTerms=['sad', 'happy']) == ('%\r\n1\tposemo\r\n2\tnegemo\r\n3\tsocial'
+                                                                         '\r\n%\r\nsad\t2\r\nhappy\t1')
+
+    filename = str(tmp_path / 'dictionary.dic')
+    separateFolder = str(tmp_path / 'separate') + '/'
+    with contextlib.redirect_stdout(io.StringIO()):
+        cc.dict.ExportDict2007Format(filename, separateDicts=True, separateDictsFolder=separateFolder)
+    assert readFile(filename) == expected2007
+    assert readFile(separateFolder + '002_negemo.dic') == '%\r\n2\tnegemo\r\n%\r\nsad\t2\r\n*ness\t2'
+
+    # and what was written reads back in as the same dictionary
+    reloaded = makeCoder(dictString=expected2007)
+    assert reloaded.dict.dictTermCatMap == cc.dict.dictTermCatMap
+
+
+def testWriteDict2022(makeCoder, tmp_path):
+    cc = makeCoder(dictString=dictString)
+
+    assert written(cc.dict.WriteDict2022) == expected2022
+    assert cc.dict.DictToString2022() == expected2022
+
+    filename = str(tmp_path / 'dictionary.dicx')
+    with contextlib.redirect_stdout(io.StringIO()):
+        cc.dict.ExportDict2022Format(filename)
+    assert readFile(filename) == expected2022
+
+
+@pytest.mark.parametrize('indent', [4, None])
+def testWriteDictJSON(makeCoder, tmp_path, indent):
+    cc = makeCoder(dictString=dictString)
+
+    jsonString = written(cc.dict.WriteDictJSON, indent=indent)
+    assert jsonString == json.dumps(expectedJSON, indent=indent)
+
+    filename = str(tmp_path / 'dictionary.json')
+    with contextlib.redirect_stdout(io.StringIO()):
+        cc.dict.ExportDictJSON(filename, 'utf-8', indent=indent)
+    assert readFile(filename) == jsonString
+
+
+def testWeightedDictionary(makeCoder):
+    # weights survive the trip out to LIWC-22 format and back
+    cc = makeCoder(dictString='DicTerm,posemo,negemo\nhappy,2,\nhapp*,1,\nsad,,3\nnot happy,,4\n', dictFormat='2022')
+
+    reloaded = makeCoder(dictString=cc.dict.DictToString2022(), dictFormat='2022')
+
+    assert reloaded.dict.dictTermCatMap == cc.dict.dictTermCatMap
+    assert json.loads(written(reloaded.dict.WriteDictJSON)) == json.loads(written(cc.dict.WriteDictJSON))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks that every combination of wildcardEngine, internVocabulary and phraseEngine codes random texts exactly
+the same way as the original approach (testing every wildcard's regex, with no vocabulary and no automaton)."""
+
+import itertools
+import random
+
+import pytest
+
+syllables = ['ha', 'pp', 'y', 'sa', 'd', 'ne', 'ss', 'lo', 'ok']
+
+engineArgs = [{'wildcardEngine': wildcardEngine, 'internVocabulary': internVocabulary, 'phraseEngine': phraseEngine}
+              for wildcardEngine, internVocabulary, phraseEngine
+              in itertools.product(['trie', 'regex'], [True, False], ['lookup', 'ahocorasick'])]
+
+
+def randomWord(rng):
+    return ''.join(rng.choice(syllables) for _ in range(rng.randint(1, 3)))
+
+
+def randomDictionary(rng, numTerms=40):
+    """Returns a 2022-format dictionary with weighted categories and a mix of literal words, wildcards, and
+    phrases of both."""
+
+    dicTerms = set()
+    while len(dicTerms) < numTerms:
+        words = []
+        for _ in range(rng.choice([1, 1, 1, 2, 2, 3])):
+            wordShape = rng.random()
+            if wordShape < 0.2:
+                words.append(randomWord(rng) + '*')
+            elif wordShape < 0.3:
+                words.append('*' + randomWord(rng))
+            elif wordShape < 0.35 and len(words) > 0:
+                words.append('*')
+            else:
+                words.append(randomWord(rng))
+        dicTerms.add(' '.join(words))
+
+    lines = ['DicTerm,first,second']
+    for dicTerm in sorted(dicTerms):
+        lines.append(dicTerm + ',' + rng.choice(['1', '', '0.5']) + ',' + rng.choice(['', '2', '1.25']))
+
+    return '\n'.join(lines) + '\n'
+
+
+def randomText(rng, numWords=60):
+    words = []
+    for _ in range(0, numWords):
+        wordShape = rng.random()
+        if wordShape < 0.05:
+            words.append(str(rng.randint(0, 5000)))
+        elif wordShape < 0.1:
+            words.append(randomWord(rng) + rng.choice(['.', ',', '!', '?']))
+        else:
+            words.append(randomWord(rng).capitalize() if wordShape < 0.15 else randomWord(rng))
+
+    return ' '.join(words)
+
+
+@pytest.mark.parametrize('seed', range(0, 10))
+def testEnginesAgree(makeCoder, seed):
+    rng = random.Random(seed)
+    dictString = randomDictionary(rng)
+    texts = [randomText(rng) for _ in range(0, 30)]
+
+    reference = makeCoder(dictString=dictString, dictFormat='2022', wildcardEngine='regex', internVocabulary=False,
+                          phraseEngine='lookup')
+    expected = [reference.Analyze(text, retainCaptures=True) for text in texts]
+
+    for coderArgs in engineArgs:
+        cc = makeCoder(dictString=dictString, dictFormat='2022', **coderArgs)
+        assert [cc.Analyze(text, retainCaptures=True) for text in texts] == expected, coderArgs
+        assert cc.capturedFreqs == reference.capturedFreqs, coderArgs
+
+        # and again, now that the wildcard memory and token cache have seen every one of the texts
+        assert [cc.Analyze(text) for text in texts] == [reference.Analyze(text) for text in texts], coderArgs
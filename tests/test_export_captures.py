@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks the captured-word frequencies that ExportCaptures() writes out."""
+
+import codecs
+import contextlib
+import io
+
+import pytest
+
+dictString = '%\n1\tposemo\n2\tnegemo\n%\nhappy\t1\nhapp*\t1\n*ness\t1\t2\nsad\t2\nlook* forward\t1\nzebra\t2\n'
+texts = ['So happy, happier than the happiest.',
+         'Sadness and happiness; sad. Looking forward, look forward!',
+         'happier happier']
+
+header = 'dicTerm,captured,count,categories\r\n'
+wildcardRows = ('*ness,sadness,1,"posemo, negemo"\r\n'
+                'happ*,happier,3,posemo\r\n'
+                'happ*,happiest,1,posemo\r\n'
+                'happ*,happiness,1,posemo\r\n')
+phraseRows = ('look* forward,look forward,1,posemo\r\n'
+              'look* forward,looking forward,1,posemo\r\n')
+
+
+def exported(cc, filename, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        cc.ExportCaptures(filename, **kwargs)
+    with open(filename, 'rb') as fin:
+        exportedBytes = fin.read()
+
+    assert exportedBytes.startswith(codecs.BOM_UTF8)
+    return exportedBytes.decode('utf-8-sig')
+
+
+def codedCoder(makeCoder, texts):
+    cc = makeCoder(dictString=dictString)
+    for text in texts:
+        cc.Analyze(text, retainCaptures=True)
+    return cc
+
+
+@pytest.mark.parametrize('exportArgs, expected', [
+    ({}, header + wildcardRows + 'happy,happy,1,posemo\r\n' + phraseRows + 'sad,sad,1,negemo\r\nzebra,,0,negemo\r\n'),
+    ({'fullset': False}, header + wildcardRows + 'happy,happy,1,posemo\r\n' + phraseRows + 'sad,sad,1,negemo\r\n'),
+    ({'wildcardsOnly': True, 'fullset': False}, header + wildcardRows + phraseRows),
+])
+def testExportCaptures(makeCoder, tmp_path, exportArgs, expected):
+    cc = codedCoder(makeCoder, texts)
+    capturedBefore = cc.capturedFreqs
+
+    assert exported(cc, str(tmp_path / 'captures.csv'), **exportArgs) == expected
+
+    # exporting doesn't fill anything in
+    assert cc.capturedFreqs == capturedBefore
+
+
+def testMergedCapturesExportTheSame(makeCoder, tmp_path):
+    expected = exported(codedCoder(makeCoder, texts), str(tmp_path / 'all.csv'))
+
+    # the same texts, coded in two places and brought together afterwards
+    filename = str(tmp_path / 'captures.json')
+    codedCoder(makeCoder, texts[:1]).SaveCaptures(filename)
+    cc = codedCoder(makeCoder, texts[1:])
+    cc.LoadCaptures(filename)
+
+    assert exported(cc, str(tmp_path / 'merged.csv')) == expected
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks that flat (.ccf) dictionaries code exactly the same way as the dictionaries that they were made from."""
+
+import contextlib
+import io
+import pickle
+import random
+import struct
+
+import pytest
+
+from contentcoder.ContentCodingDictionary import compiledDictMagic
+from contentcoder.FlatDictionary import FlatDictionary, attachFlatDictionary, openFlatDictionary
+
+dictString = ('%\n1\tposemo\n2\tnegemo\n3\tsocial\n%\n'
+              'happy\t1\nhapp*\t1\n*ness\t1\t2\nsad\t2\nlook* forward to\t1\t3\n'
+              'we\t3\nwe are\t3\n*c * *\t2\nvery *\t1\n1\\*2\t3\n')
+
+words = ['happy', 'happiness', 'sad', 'sadness', 'looking', 'forward', 'to', 'we', 'are', 'very', 'bc', 'ac',
+         '(800) 123-4567', '1*2', 'the', 'cat']
+
+
+def testManyCategories(makeCoder, tmp_path):
+    # more categories than fit in 16 bits
+    numCats = 70000
+    dictString = ('%\n' + ''.join([str(catNumber) + '\tcat' + str(catNumber) + '\n'
+                                   for catNumber in range(1, numCats + 1)]) +
+                  '%\nhappy\t1\t' + str(numCats) + '\nsad\t65536\n')
+    original = makeCoder(dictString=dictString)
+
+    filename = str(tmp_path / 'dictionary.ccf')
+    with contextlib.redirect_stdout(io.StringIO()):
+        original.dict.ExportFlat(filename)
+    flat = makeCoder(flatDictionary=openFlatDictionary(filename))
+
+    assert flat.dict.dictTermCatMap['happy'] == {'cat1': 1, 'cat' + str(numCats): 1}
+    assert flat.dict.dictTermCatMap['sad'] == {'cat65536': 1}
+
+    text = 'happy sad'
+    assert flat.Analyze(text, relativeFreq=False) == original.Analyze(text, relativeFreq=False)
+
+
+def flatCoders(makeCoder, tmp_path, original, wildcardEngine):
+    """Yields (how, coder) for each of the ways that a flat copy of original's dictionary can be read."""
+
+    filename = str(tmp_path / 'dictionary.ccf')
+    with contextlib.redirect_stdout(io.StringIO()):
+        original.dict.ExportFlat(filename)
+    yield 'mmap', makeCoder(dicFilename=filename, wildcardEngine=wildcardEngine)
+
+    sharedMemory = original.dict.ShareFlat()
+    try:
+        yield 'sharedMemory', makeCoder(flatDictionary=attachFlatDictionary(sharedMemory.name),
+                                        wildcardEngine=wildcardEngine)
+    finally:
+        sharedMemory.close()
+        sharedMemory.unlink()
+
+    # a compiled dictionary is a flat dictionary behind a header of its own, so it can be attached to as well
+    filename = str(tmp_path / 'dictionary.ccd')
+    with contextlib.redirect_stdout(io.StringIO()):
+        original.dict.Compile(filename)
+    with open(filename, 'rb') as fin:
+        compiledBytes = fin.read()
+    attached = makeCoder(dictString=dictString, wildcardEngine=wildcardEngine)
+    attached.dict.AttachFlat(FlatDictionary(compiledBytes[len(compiledDictMagic) + struct.calcsize('>H'):]),
+                             verbose=False)
+    yield 'compiled', attached
+
+
+@pytest.mark.parametrize('wildcardEngine', ['trie', 'regex'])
+def testFlatMatchesLoaded(makeCoder, tmp_path, wildcardEngine):
+    rng = random.Random(1)
+    texts = [' '.join([rng.choice(words) for _ in range(0, 30)]) for _ in range(0, 30)]
+
+    original = makeCoder(dictString=dictString, wildcardEngine=wildcardEngine)
+    expected = [original.Analyze(text, retainCaptures=True) for text in texts]
+
+    for how, flat in flatCoders(makeCoder, tmp_path, original, wildcardEngine):
+        for attributeName in ['maxWords', 'numCats', 'numberOfWildcards', 'catNames', 'catOrder',
+                              'catNamesHierarchical', 'dictDataWildsList']:
+            assert getattr(flat.dict, attributeName) == getattr(original.dict, attributeName), (how, attributeName)
+        assert dict(flat.dict.dictTermCatMap) == original.dict.dictTermCatMap, how
+        assert ({numWords: set(dicTerms) for numWords, dicTerms in flat.dict.dictDataStandard.items()} ==
+                original.dict.dictDataStandard), how
+
+        assert [flat.Analyze(text, retainCaptures=True) for text in texts] == expected, how
+        assert flat.capturedFreqs == original.capturedFreqs, how
+
+        # a flat dictionary can't be changed
+        with contextlib.redirect_stdout(io.StringIO()):
+            flat.dict.UpdateCategories('brandnew', {'posemo': 1})
+        assert 'brandnew' not in flat.dict.dictTermCatMap, how
+
+        # pickled, it points at the same block rather than carrying a copy of it
+        if how != 'compiled':
+            assert len(pickle.dumps(flat.dict.flatDictionary)) < 1000, how
+            assert pickle.loads(pickle.dumps(flat.dict.flatDictionary)).catNames == flat.dict.catNames, how
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks that skipping the phrase lengths whose wildcard first word can't match never changes what Analyze()
+finds. Everything is compared against a coder that tests every phrase length with the regex engine."""
+
+import random
+
+import pytest
+
+letters = 'abc'
+
+
+@pytest.fixture
+def makeUnprunedCoder(makeCoder):
+    """Returns a function that makes a ContentCoder that tries every phrase length at every word (the way that the
+    original coder did) and never uses the WildcardPhraseIndex."""
+
+    def makeEveryLengthCoder(dictString):
+        cc = makeCoder(dictString=dictString, wildcardEngine="regex", internVocabulary=False)
+
+        everyLength = tuple(sorted([numWords for numWords in cc.dict.dictDataStandard.keys() if numWords > 1],
+                                   reverse=True))
+        cc.dict.PhraseLengthsStartingWith = lambda word: everyLength
+        cc.dict.PhraseLengthsRuledOut = lambda word: frozenset()
+
+        return cc
+
+    return makeEveryLengthCoder
+
+
+def randomWord(rng):
+    return ''.join(rng.choice(letters) for _ in range(rng.randint(1, 3)))
+
+
+def randomDictionary(rng, numTerms=10):
+    """Returns a small 2007-format dictionary that's mostly multi-word entries, most of them starting with a
+    leading wildcard ('*ab'), which is the kind of first word that rules out the most phrase lengths."""
+
+    dicTerms = set()
+    while len(dicTerms) < numTerms:
+        words = [randomWord(rng) for _ in range(rng.randint(1, 4))]
+
+        firstWordShape = rng.random()
+        if firstWordShape < 0.6:
+            words[0] = '*' + words[0]
+        elif firstWordShape < 0.75:
+            words[0] = words[0] + '*'
+
+        for wordPosition in range(1, len(words)):
+            laterWordShape = rng.random()
+            if laterWordShape < 0.4:
+                words[wordPosition] = '*'
+            elif laterWordShape < 0.5:
+                words[wordPosition] = words[wordPosition] + '*'
+
+        dicTerms.add(' '.join(words))
+
+    return ('%\n1\tfirst\n2\tsecond\n%\n' +
+            '\n'.join([dicTerm + '\t' + str(rng.randint(1, 2)) for dicTerm in sorted(dicTerms)]) + '\n')
+
+
+def randomText(rng, numWords=40):
+    """Returns a text of short words with the odd phone number, which the tokenizer keeps as a single token."""
+
+    words = []
+    for _ in range(0, numWords):
+        if rng.random() < 0.1:
+            words.append('(%03d) %03d-%04d' % (rng.randint(200, 999), rng.randint(0, 999), rng.randint(0, 9999)))
+        else:
+            words.append(randomWord(rng))
+
+    return ' '.join(words)
+
+
+@pytest.mark.parametrize('wildcardEngine', ['trie', 'regex'])
+def testPhoneNumberLaterInPhrase(makeCoder, makeUnprunedCoder, codedCounts, wildcardEngine):
+    # 'bb' can't match '*c', but the joined phrase 'bb ac (800) 123-4567' still matches '*c * *' starting at 'ac'
+    dictString = '%\n1\tcat\n%\n*c * *\t1\n'
+    text = 'bb ac (800) 123-4567'
+
+    cc = makeCoder(dictString=dictString, wildcardEngine=wildcardEngine)
+
+    assert codedCounts(cc, text)['Dic'] == 3
+    assert codedCounts(cc, text) == codedCounts(makeUnprunedCoder(dictString), text)
+
+
+@pytest.mark.parametrize('seed', range(0, 20))
+def testPrunedMatchesUnpruned(makeCoder, makeUnprunedCoder, codedCounts, seed):
+    rng = random.Random(seed)
+    dictString = randomDictionary(rng)
+    texts = [randomText(rng) for _ in range(0, 20)]
+
+    unprunedCoder = makeUnprunedCoder(dictString)
+    expected = [codedCounts(unprunedCoder, text) for text in texts]
+
+    for coderArgs in [{'wildcardEngine': 'trie'},
+                      {'wildcardEngine': 'regex'},
+                      {'wildcardEngine': 'trie', 'phraseEngine': 'ahocorasick'}]:
+        cc = makeCoder(dictString=dictString, **coderArgs)
+        assert [codedCounts(cc, text) for text in texts] == expected, coderArgs
+        assert cc.capturedFreqs == unprunedCoder.capturedFreqs, coderArgs
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Checks that a saved wildcard memory is only ever used when it can be trusted."""
+
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+dictString = '%\n1\tposemo\n2\tnegemo\n%\nhapp*\t1\n*ness\t1\t2\nsa*\t2\n'
+text = 'happy happiness sad sadness saturday the cat'
+
+
+def testSaveAndLoad(makeCoder, codedCounts, tmp_path):
+    filename = str(tmp_path / 'memory.json')
+
+    cc = makeCoder(dictString=dictString)
+    expected = codedCounts(cc, text)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cc.SaveWildcardMemory(filename)
+
+    # nothing is left behind but the file itself
+    assert os.listdir(str(tmp_path)) == ['memory.json']
+
+    reloaded = makeCoder(dictString=dictString)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert reloaded.dict.LoadWildcardMemory(filename)
+    assert reloaded.dict.wildcardMemory[1].Items() == cc.dict.wildcardMemory[1].Items()
+    assert codedCounts(reloaded, text) == expected
+
+
+@pytest.mark.parametrize('contents', ['', '{"version": 1', '[1, 2]', '{"version": 1}', 'not json at all',
+                                      None])
+def testDamagedFile(makeCoder, codedCounts, tmp_path, contents):
+    filename = str(tmp_path / 'memory.json')
+
+    cc = makeCoder(dictString=dictString)
+    expected = codedCounts(cc, text)
+
+    if contents is None:
+        # the right fingerprint, but remembering a term that isn't in the dictionary
+        with contextlib.redirect_stdout(io.StringIO()):
+            cc.SaveWildcardMemory(filename)
+        with open(filename, 'r', encoding='utf-8') as fin:
+            memoryIn = json.load(fin)
+        memoryIn['memory']['1'] = [['sadness', 'sad*']]
+        contents = json.dumps(memoryIn)
+
+    with open(filename, 'w', encoding='utf-8') as fout:
+        fout.write(contents)
+
+    fresh = makeCoder(dictString=dictString)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        assert not fresh.dict.LoadWildcardMemory(filename)
+    assert 'Ignoring it' in output.getvalue()
+
+    assert all(len(memory) == 0 for memory in fresh.dict.wildcardMemory.values())
+    assert codedCounts(fresh, text) == expected